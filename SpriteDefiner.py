@@ -14,6 +14,7 @@ import pyxel
 import json
 from collections import namedtuple
 from enum import Enum
+from core.sprite_atlas import atlas_path_for, read_image_bank, save_atlas, scan_image_bank
 
 # アプリケーションの状態管理
 class AppState(Enum):
@@ -76,6 +77,11 @@ class SpriteDefiner:
         self.command_input = ""  # 現在のコマンド用入力テキスト
         self.edit_locked_sprite = None  # 編集中にロックされたスプライト位置
         
+        # 自動走査結果（F5で作成）- 空でないセルと重複タイルのアトラス表
+        self.atlas = None
+        self.ATLAS_MARK_COLOR = pyxel.COLOR_YELLOW  # 名前未定義の空でないセル
+        self.DUPLICATE_MARK_COLOR = pyxel.COLOR_ORANGE  # 他のセルと同じ画像のセル
+        
         
         self.message = "Use arrow keys to move (auto-select), F1 for EDIT, F2 for VIEW, Shift+Enter for legacy naming"
         
@@ -153,6 +159,10 @@ class SpriteDefiner:
             self.app_state = AppState.SAVE_CONFIRM
             self.message = "Save to sprites.json? Y to confirm, N to cancel"
         
+        # 自動走査・アトラス表の書き出し (F5 - VIEWモードのみ)
+        if pyxel.btnp(pyxel.KEY_F5) and self.app_state == AppState.VIEW:
+            self._scan_atlas()
+        
         # 読み込み機能 (F11 - VIEWモードのみ)
         if pyxel.btnp(pyxel.KEY_F11) and self.app_state == AppState.VIEW:
             self._load_from_json()
@@ -567,6 +577,27 @@ class SpriteDefiner:
             # 保存失敗時のエラーメッセージ
             self.message = f"Save error: {e}"
     
+    # イメージバンクを自動走査してアトラス表を書き出す
+    def _scan_atlas(self):
+        """イメージバンク0を走査し、空でないセル・重複タイルを検出して sprites.atlas.json に保存"""
+        image = pyxel.images[0]
+        self.atlas = scan_image_bank(read_image_bank(image), image.width, image.height, self.SPRITE_SIZE)
+        
+        named = {(data['x'], data['y']) for data in self.sprites.values()}
+        unnamed = [coords for coords in self.atlas.non_empty_cells() if coords not in named]
+        
+        # 重複タイルの報告（画面は英語のみのため詳細は標準出力へ）
+        for group in self.atlas.duplicates:
+            print("Duplicate tiles: " + ", ".join(f"({x}, {y})" for x, y in group))
+        
+        atlas_path = atlas_path_for("sprites.json")
+        try:
+            save_atlas(atlas_path, self.atlas, self.RESOURCE_FILE)
+            self.message = (f"F5: {self.atlas.non_empty_count} cells, {len(self.atlas.tiles)} tiles, "
+                            f"{len(self.atlas.duplicates)} dup groups, {len(unnamed)} unnamed -> {atlas_path}")
+        except OSError as e:
+            self.message = f"Atlas save error: {e}"
+    
     def _load_from_json(self):
         """JSONファイルからスプライトを読み込み"""
         try:
@@ -610,6 +641,9 @@ class SpriteDefiner:
         # グリッドの描画
         self._draw_grid()
         
+        # 自動走査結果の描画
+        self._draw_atlas_marks()
+        
         # マウスホバー時のハイライト描画
         self._draw_hover()
         
@@ -639,7 +673,7 @@ class SpriteDefiner:
         if self.app_state == AppState.EDIT:
             pyxel.text(10, controls_y, "EDIT mode active - movement locked | F2: Exit+Save | F3: Save", pyxel.COLOR_RED)
         else:
-            pyxel.text(10, controls_y, "Arrow Keys: Auto-Select | F1: EDIT | F10: Save | F11: Load | F12: Quit | Shift+Enter: Legacy", pyxel.COLOR_PINK)
+            pyxel.text(10, controls_y, "Arrow Keys: Auto-Select | F1: EDIT | F5: Scan | F10: Save | F11: Load | F12: Quit | Shift+Enter: Legacy", pyxel.COLOR_PINK)
         pyxel.text(10, controls_y + 8, f"Cursor: ({self.cursor_sprite[0]}, {self.cursor_sprite[1]})", pyxel.COLOR_GRAY)
     
     def _draw_sprite_sheet(self):
@@ -671,6 +705,19 @@ class SpriteDefiner:
                 grid_color
             )
     
+    def _draw_atlas_marks(self):
+        """自動走査結果を描画（名前未定義の空でないセル・重複タイルのセルに印を付ける）"""
+        if self.atlas is None:
+            return
+        named = {(data['x'], data['y']) for data in self.sprites.values()}
+        for x, y in self.atlas.non_empty_cells():
+            if (x, y) not in named:
+                pyxel.pset(self.sprite_display_x + x + 1, self.sprite_display_y + y + 1, self.ATLAS_MARK_COLOR)
+        for group in self.atlas.duplicates:
+            for x, y in group:
+                pyxel.pset(self.sprite_display_x + x + self.SPRITE_SIZE - 2,
+                           self.sprite_display_y + y + 1, self.DUPLICATE_MARK_COLOR)
+    
     def _draw_hover(self):
         """ホバーハイライトを描画"""
         if self.hover_sprite:
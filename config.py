@@ -31,6 +31,11 @@ class GridConfig:
     GRID_ORIGIN_X: int = 16
     GRID_ORIGIN_Y: int = 80
 
+    # 静的レイヤーキャッシュ（グリッド線・バスバー・デバイススプライト）
+    # 未使用のイメージバンクを左から順にタイルとして使用する
+    STATIC_LAYER_BANKS: tuple = (1, 2)
+    STATIC_LAYER_BANK_SIZE: int = 256
+
 
 # =============================================================================
 # UI Configuration
@@ -60,6 +65,13 @@ class UIBehaviorConfig:
     SHOW_GRID_LINES: bool = True    # Grid line display ON/OFF
     SHOW_DEBUG_INFO: bool = False   # Debug info display ON/OFF
 
+    # Rendering settings
+    SKIP_UNCHANGED_FRAMES: bool = True  # True: 表示内容に変化がないフレームは再描画を省略
+
+class EditHistoryConfig:
+    """Edit History (Undo/Redo) Configuration Constants"""
+    MAX_UNDO_DEPTH: int = 200  # Undo可能な最大操作数（ドラッグ配置などのグループは1操作）
+
 class DialogConfig:
     """Dialog System Configuration Constants"""
     # Device ID input dialog settings
@@ -82,6 +94,9 @@ class PLCConfig:
     DEFAULT_SCAN_TIME_MS: int = 100
     MIN_SCAN_TIME_MS: int = 50
     MAX_SCAN_TIME_MS: int = 500
+    SCAN_TIME_STEP_MS: int = 10       # F7/F8 step in RUN mode
+    WATCHDOG_TIME_MS: int = 200       # Scan longer than this raises a WDT error (PLC stops)
+    MAX_CATCHUP_SCANS: int = 3        # Late periods executed back-to-back before skipping
     
     # Device settings
     MAX_DEVICES: int = 100
@@ -173,6 +188,7 @@ class PLCRunState(Enum):
     """PLC Execution State Definition - Controlled by F5 Key"""
     STOPPED = "STOPPED"        # Stopped (editing enabled state)
     RUNNING = "RUNNING"        # Running (real-time circuit analysis)
+    ERROR = "WDT ERROR"        # Watchdog timeout (scanning stopped until F5/F6 reset)
 
 
 # =============================================================================
@@ -230,6 +246,7 @@ class TimerConfig:
     TIME_UNIT = 1          # 時間単位（1ms）
     DEFAULT_PRESET = 1000  # デフォルトプリセット値（1000ms = 1.0秒）
     FRAME_THRESHOLD = 990  # 990ms超過で1秒完了判定（30FPS対応）
+    SCAN_TIME_MS = 33      # 1スキャン（30FPSの1フレーム）あたりのタイマー加算値
 
 class CounterConfig:
     """カウンター設定定数（PLC標準準拠）"""
@@ -368,4 +385,81 @@ class DataOperationConfig:
         "UNDERFLOW": "Value underflow", 
         "DIV_BY_ZERO": "Division by zero",
         "INVALID_OPERAND": "Invalid operand value"
-    }
\ No newline at end of file
+    }
+
+# =============================================================================
+# Autosave Configuration (自動保存)
+# =============================================================================
+class AutosaveConfig:
+    """自動保存設定"""
+    ENABLED: bool = True
+    FILENAME: str = ".pyplc/autosave.csv"  # 自動保存先（作業ディレクトリ相対。回路ファイルと混ざらないよう専用ディレクトリ）
+    DEBOUNCE_SECONDS: float = 2.0        # 最後の編集からこの時間変更がなければ保存
+    MAX_DELAY_SECONDS: float = 15.0      # 編集が続いていてもこの時間以内には必ず保存
+    RETRY_INTERVAL_SECONDS: float = 5.0  # 書き込み失敗時の再試行間隔
+
+# =============================================================================
+# Modbus-TCP Server Configuration
+# =============================================================================
+class ModbusConfig:
+    """Modbus-TCPサーバー設定（HMI・テストツール連携用）"""
+    ENABLED: bool = False                 # True: RUN中にデバイスイメージを公開
+    HOST: str = "127.0.0.1"               # localhostのみで待ち受け
+    PORT: int = 5020                      # 502は特権ポートのため既定は5020
+    # コイル／ディスクリート入力のアドレス割り付け（先頭アドレス + デバイス番号）
+    COIL_BASES = {"X": 0, "Y": 1000, "M": 2000}
+    # 保持／入力レジスタのアドレス割り付け（先頭アドレス + デバイス番号）
+    REGISTER_BASES = {"D": 0, "T": 8000, "C": 9000}
+    # クライアントから書き込み可能なコイル（外部入力のみ）
+    WRITABLE_COIL_PREFIXES = ("X",)
+
+# =============================================================================
+# Shared Memory I/O Image Configuration (仮想立ち上げ・プラントモデル連携)
+# =============================================================================
+class SharedMemoryConfig:
+    """共有メモリ入出力イメージ設定"""
+    DEFAULT_NAME: str = "pyplc_io"            # 共有メモリブロック名
+    POLL_INTERVAL_SECONDS: float = 0.0002     # ハンドシェイク待機時のポーリング間隔
+    LOCKSTEP_TIMEOUT_SECONDS: float = 5.0     # LOCKSTEP時にプラント応答を待つ最大時間
+
+# =============================================================================
+# Circuit CSV Format Configuration (回路CSVの列名: core/CircuitCsvFormat.md)
+# =============================================================================
+class CircuitCsvConfig:
+    """回路CSVの列名設定"""
+    # 基本列（先頭列名 → row, col, device_type, address, state の列名）
+    # フォーマット1: Ver3標準 / フォーマット2: 旧フォーマット
+    BASIC_COLUMNS = {
+        'row': ('row', 'col', 'device_type', 'address', 'state'),
+        'Row': ('Row', 'Col', 'DeviceType', 'DeviceID', 'State'),
+    }
+    # 拡張列（タイマー・カウンター・データレジスタ・比較命令用、存在しない列はデフォルト値）
+    EXTENDED_COLUMNS = (
+        'preset_value', 'current_value', 'timer_active', 'last_input_state',
+        'operation', 'compare_left', 'compare_operator', 'compare_right',
+    )
+
+# =============================================================================
+# Circuit Preview Configuration (ファイルオープンダイアログのプレビュー)
+# =============================================================================
+class CircuitPreviewConfig:
+    """回路プレビュー設定"""
+    INDEX_FILENAME: str = ".pyplc/preview_index.json"  # 概要索引の保存先（作業ディレクトリ相対）
+    MAX_INDEX_ENTRIES: int = 2000                      # 索引に保持する最大ファイル数（古い順に削除）
+
+# =============================================================================
+# Startup Profile Configuration (起動時間計測: main.py --startup-profile)
+# =============================================================================
+class StartupProfileConfig:
+    """起動時間計測設定"""
+    TARGET_MS: float = 1500.0  # 起動から最初のフレームまでの目標時間（低スペック操作パネル想定）
+
+# =============================================================================
+# Task Configuration (定周期タスク: 行範囲をメインスキャンとは別周期で実行)
+# =============================================================================
+class TaskConfig:
+    """定周期タスク設定（優先度は0が最高）"""
+    MAIN_TASK_PRIORITY: int = 31   # メインタスク（割り当てのない行）の優先度（最低）
+    MIN_TASK_PERIOD_MS: int = 1    # 定周期タスクの最短周期
+    # 起動時に登録するタスク（例: {"name": "FAST", "rows": (0, 3), "period_ms": 20, "priority": 0}）
+    TASKS: list = []
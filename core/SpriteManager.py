@@ -1,7 +1,14 @@
 
 import json
-from typing import Dict, Optional, Tuple, Any
+import logging
+import os
+from typing import Dict, Optional, Set, Tuple, Any
 from config import DeviceType
+from core.atomic_file import atomic_write
+from core.sprite_atlas import (EMPTY_TILE, SpriteAtlas, atlas_path_for, bank_digest,
+                               load_atlas, read_image_bank, scan_image_bank)
+
+logger = logging.getLogger(__name__)
 
 class SpriteManager:
     """
@@ -9,6 +16,24 @@ class SpriteManager:
     - JSONファイルをロードし、スプライトデータをキャッシュします。
     - デバイスタイプと状態から、対応するスプライトの描画情報（x, y）を返します。
     """
+
+    # config.pyのデバイス名 → sprites.jsonのNAME 対応表
+    SPRITE_NAME_ALIASES: Dict[str, str] = {
+        "TIMER_TON": "TIMER",
+        "COUNTER_CTU": "COUNTER",
+        "RST": "RESET",
+        "DATA_REGISTER": "D_DEV",
+        "COMPARE_DEVICE": "COMP",
+    }
+    # 通電状態に関係なく固定のACT_NAMEを持つデバイス
+    FIXED_ACT_NAMES: Dict[str, str] = {
+        "DEL": "DEL",
+        "EMPTY": "EMPTY",
+    }
+    # コンパイル済みルックアップテーブル（sprites.json → sprites.lut.json、元ファイルのサイズ・更新時刻で検証）
+    COMPILED_LUT_SUFFIX = ".lut.json"
+    COMPILED_LUT_VERSION = 1
+
     def __init__(self, json_path: str):
         """
         SpriteManagerの初期化。
@@ -19,12 +44,24 @@ class SpriteManager:
         self.sprite_size = 0
         self.resource_file = ""
         self._sprite_map: Dict[str, Any] = {}
+        # (DeviceType, 表示状態) → (x, y) のルックアップテーブル（ロード時に構築）
+        self._sprite_lut: Dict[Tuple[DeviceType, bool], Tuple[int, int]] = {}
+        self._reported_misses: Set[Tuple[DeviceType, bool]] = set()
+        # イメージバンクのアトラス表（pyxel.load後に attach_atlas() で設定）
+        self.atlas_path = atlas_path_for(json_path)
+        self.atlas: Optional[SpriteAtlas] = None
         self._load_sprites(json_path)
 
     def _load_sprites(self, json_path: str):
         """
         JSONファイルからスプライト情報を読み込み、内部キャッシュを構築する。
+        コンパイル済みルックアップテーブルが最新であれば、そちらを読み込んで構築を省略する。
         """
+        compiled_path = os.path.splitext(json_path)[0] + self.COMPILED_LUT_SUFFIX
+        source_key = self._source_key(json_path)
+        if source_key is not None and self._load_compiled_lut(compiled_path, source_key):
+            return
+
         try:
             with open(json_path, 'r') as f:
                 data = json.load(f)
@@ -35,7 +72,7 @@ class SpriteManager:
 
             # スプライト定義をキャッシュ
             self._sprite_map = data.get("sprites", {})
-            print("SpriteManager: スプライト情報の読み込みに成功しました。")
+            logger.info("SpriteManager: スプライト情報の読み込みに成功しました。")
 
         except FileNotFoundError:
             print(f"エラー: スプライトファイルが見つかりません: {json_path}")
@@ -44,10 +81,105 @@ class SpriteManager:
             print(f"エラー: スプライトファイルのJSON形式が正しくありません: {json_path}")
             self._sprite_map = {}
 
+        self._build_lookup_table()
+        if source_key is not None:
+            self._save_compiled_lut(compiled_path, source_key)
+
+    @staticmethod
+    def _source_key(json_path: str) -> Optional[Tuple[int, int]]:
+        """スプライト定義ファイルの (サイズ, 更新時刻)。存在しない場合None"""
+        try:
+            stat_result = os.stat(json_path)
+        except OSError:
+            return None
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def _load_compiled_lut(self, compiled_path: str, source_key: Tuple[int, int]) -> bool:
+        """
+        コンパイル済みルックアップテーブルを読み込む
+
+        Returns:
+            bool: 元ファイルと一致するテーブルを読み込めた場合True
+        """
+        try:
+            with open(compiled_path, 'r') as f:
+                data = json.load(f)
+            if (data.get("version") != self.COMPILED_LUT_VERSION or
+                    (data.get("source_size"), data.get("source_mtime_ns")) != source_key):
+                return False
+            lut = {(DeviceType[name], is_energized): (x, y) for name, is_energized, x, y in data["lut"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self.sprite_size = data.get("sprite_size", 8)
+        self.resource_file = data.get("resource_file", "")
+        self._sprite_lut = lut
+        self._reported_misses = set()
+        return True
+
+    def _save_compiled_lut(self, compiled_path: str, source_key: Tuple[int, int]) -> None:
+        """ルックアップテーブルを書き出す（書き込めない環境では次回も通常の読み込みを行う）"""
+        data = {
+            "version": self.COMPILED_LUT_VERSION,
+            "source_size": source_key[0],
+            "source_mtime_ns": source_key[1],
+            "sprite_size": self.sprite_size,
+            "resource_file": self.resource_file,
+            "lut": [[device_type.name, is_energized, x, y]
+                    for (device_type, is_energized), (x, y) in self._sprite_lut.items()],
+        }
+        try:
+            atomic_write(compiled_path, lambda f: json.dump(data, f))
+        except OSError as e:
+            logger.info("SpriteManager: コンパイル済みテーブルを保存できません: %s", e)
+
+    def _build_lookup_table(self) -> None:
+        """
+        スプライト定義から (DeviceType, 表示状態) → (x, y) のテーブルを構築する。
+        名前の別名（TIMER/COUNTER/RESET/D_DEV/COMP）もここで解決する。
+        """
+        by_name: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        for sprite_info in self._sprite_map.values():
+            key = (sprite_info.get("NAME"), sprite_info.get("ACT_NAME"))
+            # 同一NAME/ACT_NAMEが複数ある場合は従来の線形検索と同じく先頭を優先
+            if key not in by_name:
+                by_name[key] = (sprite_info["x"], sprite_info["y"])
+
+        self._sprite_lut = {}
+        self._reported_misses = set()
+        for device_type in DeviceType:
+            target_name = self.SPRITE_NAME_ALIASES.get(device_type.name, device_type.name)
+            for is_energized in (True, False):
+                target_act_name = self.FIXED_ACT_NAMES.get(device_type.name, "TRUE" if is_energized else "FALSE")
+                coords = by_name.get((target_name, target_act_name))
+                if coords is not None:
+                    self._sprite_lut[(device_type, is_energized)] = coords
+
+    def attach_atlas(self, image) -> None:
+        """
+        イメージバンクのアトラス表を設定し、定義済みスプライトが空セルを指していないか確認する。
+        SpriteDefinerが書き出したアトラス表がバンクと一致しない（または無い）場合はその場で走査する。
+
+        Args:
+            image: pyxel.images[0]（pyxel.load後）
+        """
+        data = read_image_bank(image)
+        sprite_size = self.sprite_size or 8
+        atlas = load_atlas(self.atlas_path)
+        if atlas is None or atlas.sprite_size != sprite_size or atlas.bank_digest != bank_digest(data):
+            atlas = scan_image_bank(data, image.width, image.height, sprite_size)
+            logger.info("SpriteManager: アトラス表をイメージバンクから再構築しました（%d tiles）", len(atlas.tiles))
+        self.atlas = atlas
+
+        for (device_type, is_energized), (x, y) in self._sprite_lut.items():
+            if atlas.tile_index_at(x, y) == EMPTY_TILE:
+                logger.warning("Sprite points at an empty cell: device_type=%s, is_energized=%s, (%d, %d)",
+                               device_type.name, is_energized, x, y)
+
     def get_sprite_coords(self, device_type: DeviceType, is_energized: bool) -> Optional[Tuple[int, int]]:
         """
         デバイスタイプと通電状態から、対応するスプライトの(x, y)座標を取得する。
-        現在のフラットなJSON構造に対応するため、線形検索を行う。
+        ロード時に構築したルックアップテーブルを1回参照するのみ。
 
         Args:
             device_type (DeviceType): デバイスの種別 (Enum)。
@@ -56,39 +188,13 @@ class SpriteManager:
         Returns:
             Optional[Tuple[int, int]]: スプライトの(x, y)座標。見つからない場合はNone。
         """
-        target_name = device_type.name
-        target_act_name = "TRUE" if is_energized else "FALSE"
-
-        # DELやEMPTYのような特殊なケースに対応
-        if target_name == "DEL":
-            target_act_name = "DEL"
-        elif target_name == "EMPTY":
-            target_act_name = "EMPTY"
-        
-        # タイマー・カウンター・リセット・データレジスタのスプライト名マッピング（config.py名 → sprites.json名）
-        elif target_name == "TIMER_TON":
-            target_name = "TIMER"
-        elif target_name == "COUNTER_CTU":
-            target_name = "COUNTER"
-        elif target_name == "RST":
-            target_name = "RESET"
-        elif target_name == "DATA_REGISTER":
-            target_name = "D_DEV"
-        elif target_name == "COMPARE_DEVICE":
-            target_name = "COMP"
-
-        for key, sprite_info in self._sprite_map.items():
-            if sprite_info.get("NAME") == target_name and sprite_info.get("ACT_NAME") == target_act_name:
-                return (sprite_info["x"], sprite_info["y"])
-        
-        # 見つからなかった場合のデバッグ情報
-        print(f"[SPRITE DEBUG] Not found: target_name='{target_name}', target_act_name='{target_act_name}'")
-        print(f"[SPRITE DEBUG] Available sprites:")
-        for key, sprite_info in self._sprite_map.items():
-            if sprite_info.get("NAME") == target_name:  # 同じNAMEのもののみ表示
-                print(f"  - {key}: NAME='{sprite_info.get('NAME')}', ACT_NAME='{sprite_info.get('ACT_NAME')}'")
-        
-        return None
+        key = (device_type, bool(is_energized))
+        coords = self._sprite_lut.get(key)
+        if coords is None and key not in self._reported_misses:
+            # 見つからなかった場合は組み合わせごとに1回だけ報告
+            self._reported_misses.add(key)
+            logger.warning("Sprite not found: device_type=%s, is_energized=%s", device_type.name, key[1])
+        return coords
 
     def find_device_at_screen_pos(self, mouse_x: int, mouse_y: int, grid_system) -> Optional[Tuple[Any, int, int]]:
         """
@@ -0,0 +1,111 @@
+"""
+PyPlc Ver3 Address Allocator Module
+作成日: 2025-08-29
+目標: デフォルトアドレス生成用の空きアドレス管理（配置ごとのグリッド全走査を廃止）
+"""
+
+import heapq
+import re
+from typing import Dict, List, Optional, Tuple
+
+# 割り当て対象のプレフィックスと番号範囲（従来の X001～X999 検索と同じ）
+ALLOCATABLE_PREFIXES = ("X", "Y", "M", "T", "C", "D")
+FIRST_NUMBER = 1
+LAST_NUMBER = 999
+
+# 割り当て候補と同じ表記（プレフィックス + 3桁ゼロ埋め）のアドレスのみ使用中として扱う
+_CANONICAL_ADDRESS = re.compile(r"^([A-Z])(\d{3})$")
+
+
+class _PrefixPool:
+    """
+    1プレフィックス分の使用状況
+    - frontier未満の番号は「使用中」か「freedヒープに登録済み」のどちらか
+    - 最小空き番号は freedヒープの先頭と frontier の小さい方（遅延削除で償却O(1)～O(log n)）
+    """
+
+    __slots__ = ("used", "freed", "frontier")
+
+    def __init__(self):
+        self.used: Dict[int, int] = {}  # 番号 → 使用デバイス数
+        self.freed: List[int] = []
+        self.frontier = FIRST_NUMBER
+
+    def acquire(self, number: int) -> None:
+        self.used[number] = self.used.get(number, 0) + 1
+
+    def release(self, number: int) -> None:
+        count = self.used.get(number, 0)
+        if count <= 1:
+            self.used.pop(number, None)
+            if number < self.frontier:
+                heapq.heappush(self.freed, number)
+        else:
+            self.used[number] = count - 1
+
+    def lowest_free(self) -> Optional[int]:
+        freed = self.freed
+        while freed and freed[0] in self.used:
+            heapq.heappop(freed)  # 再使用された番号を遅延削除
+        if freed:
+            return freed[0]
+        while self.frontier in self.used:
+            self.frontier += 1
+        return self.frontier if self.frontier <= LAST_NUMBER else None
+
+
+class AddressAllocator:
+    """
+    プレフィックス（X/Y/M/T/C/D）ごとの空きアドレス管理
+    GridSystemがデバイスの配置・削除・アドレス変更のたびに差分更新する
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, _PrefixPool] = {prefix: _PrefixPool() for prefix in ALLOCATABLE_PREFIXES}
+
+    @staticmethod
+    def _parse(address: str) -> Optional[Tuple[str, int]]:
+        """'X005' → ('X', 5)。割り当て対象外の表記はNone"""
+        if not address:
+            return None
+        match = _CANONICAL_ADDRESS.match(address.upper())
+        if not match or match.group(1) not in ALLOCATABLE_PREFIXES:
+            return None
+        number = int(match.group(2))
+        if not FIRST_NUMBER <= number <= LAST_NUMBER:
+            return None
+        return match.group(1), number
+
+    def acquire(self, address: str) -> None:
+        """アドレスを使用中にする（デバイス配置・アドレス設定時）"""
+        parsed = self._parse(address)
+        if parsed:
+            self._pools[parsed[0]].acquire(parsed[1])
+
+    def release(self, address: str) -> None:
+        """アドレスの使用を1つ解除する（デバイス削除・アドレス変更時）"""
+        parsed = self._parse(address)
+        if parsed:
+            self._pools[parsed[0]].release(parsed[1])
+
+    def reset(self, addresses=()) -> None:
+        """全アドレスを解放し、指定アドレスを使用中として再登録する（一括読み込み時）"""
+        self._pools = {prefix: _PrefixPool() for prefix in ALLOCATABLE_PREFIXES}
+        for address in addresses:
+            self.acquire(address)
+
+    def next_free_address(self, prefix: str) -> str:
+        """
+        指定プレフィックスの最小空きアドレスを返す（予約はしない）
+
+        Args:
+            prefix: "X" / "Y" / "M" / "T" / "C" / "D"
+
+        Returns:
+            str: 例 "X003"（空きが無い場合は従来通り "<prefix>999"）
+        """
+        pool = self._pools.get(prefix.upper())
+        number = pool.lowest_free() if pool else None
+        if number is None:
+            return f"{prefix}{LAST_NUMBER:03d}"
+        return f"{prefix}{number:03d}"
@@ -0,0 +1,52 @@
+# PyPlc Ver3 Atomic File Write
+# 作成日: 2025-08-22
+# 目標: 書き込み途中のクラッシュで回路ファイルが壊れないよう、一時ファイル経由で置き換える
+
+import os
+import stat
+import tempfile
+from typing import Callable, IO
+
+
+def atomic_write(filename: str, write_func: Callable[[IO], object], binary: bool = False) -> None:
+    """
+    一時ファイルに書き込み、fsync後に os.replace で目的ファイルと置き換える
+    途中で失敗した場合、既存ファイルは変更されず一時ファイルは削除される
+
+    Args:
+        filename: 書き込み先ファイル名
+        write_func: ファイルオブジェクトを受け取り内容を書き込む関数
+        binary: Trueの場合はバイナリモード、Falseの場合はUTF-8テキスト（newline=''）
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=directory)
+    try:
+        if binary:
+            file_obj = os.fdopen(fd, 'wb')
+        else:
+            file_obj = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        with file_obj:
+            write_func(file_obj)
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+
+        # mkstempは0600で作成するため、既存ファイルの権限を引き継ぐ（新規時は0644）
+        if os.path.exists(filename):
+            os.chmod(temp_path, stat.S_IMODE(os.stat(filename).st_mode))
+        else:
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, filename)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # 置き換え（ディレクトリエントリ）の永続化（POSIXのみ）
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
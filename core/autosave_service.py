@@ -0,0 +1,148 @@
+# PyPlc Ver3 Autosave Service
+# 作成日: 2025-08-22
+# 目標: 編集内容をバックグラウンドで自動保存（フレームループをディスクI/Oでブロックしない）
+
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from config import AutosaveConfig
+from core.atomic_file import atomic_write
+from core.grid_system import GridSystem
+
+
+class AutosaveService:
+    """
+    回路の自動保存サービス
+    - GridSystem.edit_generation を変更カウンタとして監視する
+    - 連続した編集はまとめて1回の保存にする（最終編集から一定時間後、または最大遅延で保存）
+    - スナップショットはUIスレッドで取得し、CSV化と書き込みはワーカースレッドで行う
+    - 書き込みは一時ファイル + fsync + os.replace によるアトミック置き換え
+    """
+
+    def __init__(self, grid_system: GridSystem, filename: str = AutosaveConfig.FILENAME):
+        """
+        Args:
+            grid_system: 監視対象のGridSystemインスタンス
+            filename: 自動保存先ファイル名
+        """
+        self.grid_system = grid_system
+        self.filename = filename
+        self.enabled = AutosaveConfig.ENABLED
+
+        # 変更検出（UIスレッドのみが更新）
+        self._observed_generation = grid_system.edit_generation
+        self._last_change_time = 0.0
+        self._dirty_since: Optional[float] = None
+
+        # 保存結果（ワーカースレッドが更新、UIスレッドが参照）
+        self._saved_generation = grid_system.edit_generation
+        self.save_count = 0
+        self.last_saved_time: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._last_error_time: Optional[float] = None
+
+        # ワーカースレッド（保存中は_idleがクリアされる）
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopped = False
+        self._start_worker()
+
+    def _start_worker(self) -> None:
+        """ワーカースレッドを起動する"""
+        self._thread = threading.Thread(target=self._worker_loop, name="PyPlcAutosave", daemon=True)
+        self._thread.start()
+
+    @property
+    def is_dirty(self) -> bool:
+        """未保存の編集があるか"""
+        return self.grid_system.edit_generation != self._saved_generation
+
+    def mark_saved(self) -> None:
+        """明示的な保存・読み込み直後に呼び出し、現在の状態を保存済みとして扱う"""
+        self._saved_generation = self.grid_system.edit_generation
+        self._observed_generation = self._saved_generation
+        self._dirty_since = None
+
+    def update(self) -> None:
+        """
+        フレームごとの更新処理（UIスレッド）
+        保存条件を満たした場合のみスナップショットを取得してワーカーへ渡す
+        """
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        generation = self.grid_system.edit_generation
+        if generation != self._observed_generation:
+            self._observed_generation = generation
+            self._last_change_time = now
+            if self._dirty_since is None:
+                self._dirty_since = now
+
+        if generation == self._saved_generation:
+            self._dirty_since = None
+            return
+        if not self._thread.is_alive() and not self._stopped:
+            # 予期しない終了に備えてワーカーを起動し直す（未処理の要求は破棄）
+            print("Autosave worker stopped unexpectedly, restarting")
+            self._queue = queue.Queue()
+            self._idle.set()
+            self._start_worker()
+        if not self._idle.is_set():
+            return  # 前回の保存が書き込み中
+        if self._last_error_time is not None and now - self._last_error_time < AutosaveConfig.RETRY_INTERVAL_SECONDS:
+            return
+        if self._dirty_since is None:
+            self._dirty_since = now  # 保存失敗後の再試行
+
+        quiet = now - self._last_change_time >= AutosaveConfig.DEBOUNCE_SECONDS
+        overdue = now - self._dirty_since >= AutosaveConfig.MAX_DELAY_SECONDS
+        if not (quiet or overdue):
+            return
+
+        self._enqueue_snapshot(generation)
+
+    def flush(self) -> None:
+        """未保存の編集を待機時間に関係なく保存する（終了時、stop()の前に呼び出す）"""
+        if self.enabled and self.is_dirty:
+            self._enqueue_snapshot(self.grid_system.edit_generation)
+
+    def _enqueue_snapshot(self, generation: int) -> None:
+        """スナップショットを取得してワーカーへ渡す（値のみのリストなのでワーカーへ安全に渡せる）"""
+        rows: List[list] = list(self.grid_system.iter_csv_rows())
+        self._dirty_since = None
+        self._idle.clear()
+        self._queue.put((generation, rows))
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """ワーカースレッドを停止する（書き込み中の保存は完了を待つ）"""
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _worker_loop(self) -> None:
+        """ワーカースレッド: スナップショットをCSV化してアトミックに書き込む"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            generation, rows = item
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+                atomic_write(self.filename, lambda f: GridSystem.write_csv_rows(f, rows))
+                self._saved_generation = generation
+                self.save_count += 1
+                self.last_saved_time = time.time()
+                self.last_error = None
+                self._last_error_time = None
+            except Exception as e:
+                # OSError以外（csv.Error, UnicodeEncodeError等）でもワーカーを止めず、次回の再試行に任せる
+                self.last_error = str(e)
+                self._last_error_time = time.monotonic()
+                print(f"Autosave error: {e}")
+            finally:
+                self._idle.set()
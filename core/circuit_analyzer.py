@@ -4,10 +4,10 @@ PyPlc Ver3 Circuit Analyzer Module
 目標: 通電ロジックの実装と自己保持回路の実現
 """
 
-from typing import Set, Tuple, Optional
+from typing import Iterable, Set, Tuple, Optional
 from core.grid_system import GridSystem
 from core.device_base import PLCDevice
-from config import DeviceType
+from config import DeviceType, TimerConfig
 
 class CircuitAnalyzer:
     """ラダー図の回路を解析し、各デバイスの通電状態を決定するエンジン"""
@@ -15,14 +15,35 @@ class CircuitAnalyzer:
     def __init__(self, grid_system: GridSystem):
         """CircuitAnalyzerの初期化"""
         self.grid = grid_system
+        # 1スキャンあたりのタイマー加算値（ms）。周期スケジューラー使用時はスキャン周期を設定する
+        self.scan_time_ms = TimerConfig.SCAN_TIME_MS
+        # 実行中のスキャンが対象とする行と、そのタイマー加算値（solve_rows()で設定）
+        self._scan_rows: Iterable[int] = range(self.grid.rows)
+        self._timer_step_ms = self.scan_time_ms
 
     def solve_ladder(self) -> None:
         """ラダー図全体の通電解析を実行する（1スキャンに相当）"""
-        # 1. GridSystemに依頼して、全デバイスの通電状態を正しくリセットする
-        self.grid.reset_all_energized_states()
+        self.solve_rows(None)
+
+    def solve_rows(self, rows: Optional[Iterable[int]], scan_time_ms: Optional[int] = None) -> None:
+        """
+        指定した行（タスクに割り当てたラング）のみ通電解析を実行する（マルチレートタスクの1回分）
+        - 通電状態のリセット・電力トレース・タイマー等の命令処理は指定行のデバイスのみが対象
+        - コイルによる接点更新・RST/ZRSTの対象・比較命令のオペランドは全行が対象（タスク間のデバイス共有）
+        - ラングが複数行にまたがる場合は、同じタスクにすべての行を含めること
+
+        Args:
+            rows: 対象行（Noneで全行 = solve_ladder()）
+            scan_time_ms: 指定行のタイマー加算値（Noneで self.scan_time_ms）。タスク周期を渡す
+        """
+        self._scan_rows = range(self.grid.rows) if rows is None else rows
+        self._timer_step_ms = self.scan_time_ms if scan_time_ms is None else scan_time_ms
+
+        # 1. GridSystemに依頼して、対象行のデバイスの通電状態を正しくリセットする
+        self.grid.reset_all_energized_states(None if rows is None else self._scan_rows)
 
         # 2. 各行の左バスから電力のトレースを開始
-        for r in range(self.grid.rows):
+        for r in self._scan_rows:
             left_bus = self.grid.get_device(r, 0)
             # L_SIDEはリセット処理で既を通電済みのはず
             if left_bus and left_bus.is_energized:
@@ -124,7 +145,7 @@ class CircuitAnalyzer:
         """
         import pyxel
         
-        for row in range(self.grid.rows):
+        for row in self._scan_rows:
             for col in range(self.grid.cols):
                 device = self.grid.get_device(row, col)
                 if not device:
@@ -146,8 +167,6 @@ class CircuitAnalyzer:
         Args:
             timer_device: タイマーデバイス
         """
-        from config import TimerConfig
-        
         # 通電状態確認
         if timer_device.is_energized:
             if not timer_device.timer_active:
@@ -158,7 +177,7 @@ class CircuitAnalyzer:
                 
             else:
                 # フレームベースタイマー実行中（1フレーム = 約33.3ms）
-                timer_device.current_value += 33  # 30FPSで約33ms/フレーム
+                timer_device.current_value += self._timer_step_ms  # スキャン（タスク）周期分加算（既定: 30FPSの1フレーム約33ms）
                 
                 # print(f"[TIMER DEBUG] {timer_device.address} RUNNING - current={timer_device.current_value}ms, preset={timer_device.preset_value}ms")
                 
@@ -212,7 +231,7 @@ class CircuitAnalyzer:
         """
         # 1. 通電中のRSTのターゲットアドレスを収集
         target_addresses: set[str] = set()
-        for row in range(self.grid.rows):
+        for row in self._scan_rows:
             for col in range(self.grid.cols):
                 device = self.grid.get_device(row, col)
                 if device and device.device_type == DeviceType.RST and device.is_energized and device.address:
@@ -250,7 +269,7 @@ class CircuitAnalyzer:
         """
         # 1. 通電中のZRSTのテキストを収集
         zrst_texts: list[str] = []
-        for row in range(self.grid.rows):
+        for row in self._scan_rows:
             for col in range(self.grid.cols):
                 device = self.grid.get_device(row, col)
                 if device and device.device_type == DeviceType.ZRST and device.is_energized and device.address:
@@ -341,7 +360,7 @@ class CircuitAnalyzer:
         - データレジスタから値を取得し、比較演算を実行
         - 比較結果をCompareデバイスのstateに反映
         """
-        for row in range(self.grid.rows):
+        for row in self._scan_rows:
             for col in range(self.grid.cols):
                 device = self.grid.get_device(row, col)
                 if device and device.device_type == DeviceType.COMPARE_DEVICE and device.is_energized:
@@ -490,7 +509,7 @@ class CircuitAnalyzer:
         all_coil_addresses = set()
         energized_coil_addresses = set()
         
-        for row in range(self.grid.rows):
+        for row in self._scan_rows:
             for col in range(self.grid.cols):
                 device = self.grid.get_device(row, col)
                 if (device and 
@@ -541,7 +560,7 @@ class CircuitAnalyzer:
         
         継続通電中は演算を行わない（フレーム毎実行を防止）
         """
-        for row in range(self.grid.rows):
+        for row in self._scan_rows:
             for col in range(self.grid.cols):
                 device = self.grid.get_device(row, col)
                 if (device and device.device_type == DeviceType.DATA_REGISTER):
@@ -0,0 +1,230 @@
+# PyPlc Ver3 Circuit Binary Format
+# 作成日: 2025-08-21
+# 目標: 大規模回路向けのコンパクトなバイナリ保存形式（CSVと併用）
+
+import mmap
+import os
+import struct
+from typing import Dict, List, Union
+
+from config import DeviceType
+from core.atomic_file import atomic_write
+from core.device_base import PLCDevice
+from core.grid_system import GridSystem
+
+# バイナリ回路ファイルの拡張子
+BINARY_EXTENSION = ".pyplc"
+
+# ファイル構造（リトルエンディアン）
+#   ヘッダー      : magic(4s) version(H) rows(H) cols(H) flags(H) string_count(I) device_count(I)
+#   文字列テーブル: string_count × [length(H) + UTF-8 bytes]  ※インデックス0は常に空文字列
+#   デバイス      : device_count × 固定長レコード
+#     row(H) col(H) bits(B) pad(x) preset_value(q) current_value(q)
+#     device_type, address, operation, compare_left, compare_operator, compare_right（文字列インデックス）
+# バージョン1は preset_value / current_value が int32(i)。演算結果がint32を超えても保存できるよう
+# バージョン2で int64(q) に拡張した（バージョン1のファイルも読み込み可能）
+FORMAT_MAGIC = b"PPLC"
+FORMAT_VERSION = 2
+HEADER_STRUCT = struct.Struct("<4sHHHHII")
+
+# flags: 文字列インデックス幅（0: uint16 / 1: uint32）
+FLAG_WIDE_STRING_INDEX = 0x0001
+RECORD_STRUCT_NARROW = struct.Struct("<HHBxqqHHHHHH")
+RECORD_STRUCT_WIDE = struct.Struct("<HHBxqqIIIIII")
+# バージョン → (uint16インデックス用, uint32インデックス用) レコード構造
+RECORD_STRUCTS = {
+    1: (struct.Struct("<HHBxiiHHHHHH"), struct.Struct("<HHBxiiIIIIII")),
+    FORMAT_VERSION: (RECORD_STRUCT_NARROW, RECORD_STRUCT_WIDE),
+}
+STRING_LENGTH_STRUCT = struct.Struct("<H")
+
+# bits: 論理フラグ
+BIT_STATE = 0x01
+BIT_TIMER_ACTIVE = 0x02
+BIT_LAST_INPUT_STATE = 0x04
+
+
+class CircuitBinaryFormat:
+    """
+    回路データのバイナリ形式エンコード・デコードを行うクラス
+    文字列はテーブル化して重複を排除し、デバイスは固定長レコードで格納する
+    """
+
+    @staticmethod
+    def is_binary_filename(filename: str) -> bool:
+        """ファイル名がバイナリ回路形式の拡張子を持つか判定する"""
+        return filename.lower().endswith(BINARY_EXTENSION)
+
+    @classmethod
+    def encode(cls, grid_system: GridSystem) -> bytes:
+        """
+        グリッド上のユーザーデバイス（バスバー除外）をバイナリ形式に変換する
+
+        Args:
+            grid_system: 対象のGridSystemインスタンス
+
+        Returns:
+            bytes: バイナリ回路データ
+
+        Raises:
+            ValueError: 設定値・現在値が int64 の範囲を超える場合
+        """
+        strings: List[str] = [""]
+        string_index: Dict[str, int] = {"": 0}
+
+        def intern(value) -> int:
+            text = str(value) if value else ""
+            index = string_index.get(text)
+            if index is None:
+                index = len(strings)
+                string_index[text] = index
+                strings.append(text)
+            return index
+
+        records = []
+        for row_devices in grid_system.grid_data:
+            for device in row_devices:
+                if device is None or device.device_type in (DeviceType.L_SIDE, DeviceType.R_SIDE):
+                    continue
+                row, col = device.position
+                bits = ((BIT_STATE if device.state else 0) |
+                        (BIT_TIMER_ACTIVE if device.timer_active else 0) |
+                        (BIT_LAST_INPUT_STATE if device.last_input_state else 0))
+                # operationはDATA_REGISTERのみ意味を持つ
+                operation = getattr(device, 'operation', '') if device.device_type == DeviceType.DATA_REGISTER else ''
+                records.append((
+                    row, col, bits,
+                    int(device.preset_value or 0), int(device.current_value or 0),
+                    intern(device.device_type.value), intern(device.address), intern(operation),
+                    intern(device.compare_left), intern(device.compare_operator), intern(device.compare_right),
+                ))
+
+        wide = len(strings) > 0xFFFF
+        record_struct = RECORD_STRUCT_WIDE if wide else RECORD_STRUCT_NARROW
+        flags = FLAG_WIDE_STRING_INDEX if wide else 0
+
+        chunks = [HEADER_STRUCT.pack(FORMAT_MAGIC, FORMAT_VERSION, grid_system.rows, grid_system.cols,
+                                     flags, len(strings), len(records))]
+        for text in strings:
+            encoded = text.encode("utf-8")
+            chunks.append(STRING_LENGTH_STRUCT.pack(len(encoded)))
+            chunks.append(encoded)
+        pack = record_struct.pack
+        for record in records:
+            try:
+                chunks.append(pack(*record))
+            except struct.error:
+                raise ValueError(f"Device value out of range at row {record[0]}, col {record[1]}: "
+                                 f"preset={record[3]}, current={record[4]}")
+        return b"".join(chunks)
+
+    @classmethod
+    def decode_into(cls, grid_system: GridSystem, buffer: Union[bytes, memoryview, mmap.mmap]) -> int:
+        """
+        バイナリ回路データを解析し、グリッドへ一括配置する
+
+        Args:
+            grid_system: 読み込み先のGridSystemインスタンス
+            buffer: バイナリ回路データ（bytes / memoryview / mmap）
+
+        Returns:
+            int: 配置したデバイス数
+
+        Raises:
+            ValueError: 形式が不正、未対応バージョン、またはグリッドサイズが一致しない場合
+        """
+        if len(buffer) < HEADER_STRUCT.size:
+            raise ValueError("Invalid circuit binary: file too short")
+        magic, version, rows, cols, flags, string_count, device_count = HEADER_STRUCT.unpack_from(buffer, 0)
+        if magic != FORMAT_MAGIC:
+            raise ValueError("Invalid circuit binary: bad magic")
+        if version not in RECORD_STRUCTS:
+            raise ValueError(f"Unsupported circuit binary version: {version}")
+        if (rows, cols) != (grid_system.rows, grid_system.cols):
+            raise ValueError(f"Circuit binary grid size mismatch: file {rows}x{cols}, "
+                             f"grid {grid_system.rows}x{grid_system.cols}")
+
+        # 文字列テーブル
+        offset = HEADER_STRUCT.size
+        strings: List[str] = []
+        unpack_length = STRING_LENGTH_STRUCT.unpack_from
+        for _ in range(string_count):
+            (length,) = unpack_length(buffer, offset)
+            offset += STRING_LENGTH_STRUCT.size
+            strings.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+            offset += length
+
+        narrow_struct, wide_struct = RECORD_STRUCTS[version]
+        record_struct = wide_struct if flags & FLAG_WIDE_STRING_INDEX else narrow_struct
+        end = offset + device_count * record_struct.size
+        if end > len(buffer):
+            raise ValueError("Invalid circuit binary: truncated device records")
+
+        # DeviceType文字列は種類数が少ないため先に解決しておく
+        type_cache: Dict[int, DeviceType] = {}
+        devices: List[PLCDevice] = []
+        for (row, col, bits, preset_value, current_value, type_i, address_i,
+             operation_i, compare_left_i, compare_operator_i, compare_right_i) in record_struct.iter_unpack(buffer[offset:end]):
+            device_type = type_cache.get(type_i)
+            if device_type is None:
+                try:
+                    device_type = DeviceType(strings[type_i])
+                except ValueError:
+                    continue
+                type_cache[type_i] = device_type
+
+            device = PLCDevice(device_type=device_type, position=(row, col), address=strings[address_i])
+            device.state = bool(bits & BIT_STATE)
+            if device_type in (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU, DeviceType.DATA_REGISTER):
+                device.preset_value = preset_value
+                device.current_value = current_value
+            if device_type in (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU):
+                device.timer_active = bool(bits & BIT_TIMER_ACTIVE)
+                device.last_input_state = bool(bits & BIT_LAST_INPUT_STATE)
+            elif device_type == DeviceType.DATA_REGISTER:
+                device.operation = strings[operation_i] or 'MOV'
+                # 立ち上がりエッジ検出用状態初期化
+                device.last_energized_state = False
+            elif device_type == DeviceType.COMPARE_DEVICE:
+                device.compare_left = strings[compare_left_i]
+                device.compare_operator = strings[compare_operator_i]
+                device.compare_right = strings[compare_right_i]
+            devices.append(device)
+
+        return grid_system.bulk_load_devices(devices)
+
+    @classmethod
+    def save(cls, grid_system: GridSystem, filename: str) -> None:
+        """
+        バイナリ回路ファイルを保存する
+
+        Args:
+            grid_system: 保存対象のGridSystemインスタンス
+            filename: 保存先ファイル名
+        """
+        data = cls.encode(grid_system)
+        # 一時ファイル経由でアトミックに置き換え
+        atomic_write(filename, lambda binfile: binfile.write(data), binary=True)
+
+    @classmethod
+    def load(cls, grid_system: GridSystem, filename: str, use_mmap: bool = True) -> int:
+        """
+        バイナリ回路ファイルを読み込む
+
+        Args:
+            grid_system: 読み込み先のGridSystemインスタンス
+            filename: 読み込みファイル名
+            use_mmap: Trueの場合はファイルをメモリマップして読み込む（コピーを作らない）
+
+        Returns:
+            int: 配置したデバイス数
+        """
+        with open(filename, 'rb') as binfile:
+            if use_mmap and os.fstat(binfile.fileno()).st_size > 0:
+                with mmap.mmap(binfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        return cls.decode_into(grid_system, view)
+                    finally:
+                        view.release()
+            return cls.decode_into(grid_system, binfile.read())
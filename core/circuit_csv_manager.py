@@ -9,6 +9,8 @@ from datetime import datetime
 from typing import Optional
 from config import DeviceType
 from core.grid_system import GridSystem
+from core.circuit_binary_format import CircuitBinaryFormat
+from core.atomic_file import atomic_write
 
 class CircuitCsvManager:
     """
@@ -26,6 +28,7 @@ class CircuitCsvManager:
     def save_circuit_to_csv(self, filename: Optional[str] = None) -> bool:
         """
         CSV形式で回路情報を保存
+        拡張子が .pyplc の場合はバイナリ形式で保存する
         
         Args:
             filename: 保存ファイル名（未指定時はタイムスタンプ付き自動生成）
@@ -38,17 +41,17 @@ class CircuitCsvManager:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"circuit_{timestamp}.csv"
+            elif CircuitBinaryFormat.is_binary_filename(filename):
+                # バイナリ形式で保存
+                CircuitBinaryFormat.save(self.grid_system, filename)
+                return True
             else:
                 # .csv拡張子を自動追加（既に拡張子がある場合は追加しない）
                 if not filename.lower().endswith('.csv'):
                     filename = f"{filename}.csv"
             
-            # grid_system.to_csv()を使用して拡張フォーマットで保存
-            csv_data = self.grid_system.to_csv()
-            # print(f"[DEBUG] Saving {len(csv_data)} characters to {filename}")  # デバッグログ
-            
-            with open(filename, 'w', encoding='utf-8') as csvfile:
-                csvfile.write(csv_data)
+            # grid_system.write_csv()で拡張フォーマットを1行ずつ書き出し（一時ファイル経由でアトミックに置き換え）
+            atomic_write(filename, self.grid_system.write_csv)
                 
             return True
                 
@@ -59,6 +62,7 @@ class CircuitCsvManager:
     def load_circuit_from_csv(self, filename: Optional[str] = None) -> bool:
         """
         CSV形式で回路情報を読み込み
+        拡張子が .pyplc の場合はバイナリ形式として読み込む
         
         Args:
             filename: 読み込みファイル名（未指定時は最新ファイル自動選択）
@@ -78,15 +82,16 @@ class CircuitCsvManager:
                 filename = max(csv_files, key=os.path.getctime)
                 
             print(f"Loading from: {filename}")
+
+            if CircuitBinaryFormat.is_binary_filename(filename):
+                # バイナリ形式（mmapで読み込み）
+                CircuitBinaryFormat.load(self.grid_system, filename, use_mmap=True)
+                return True
             
-            # CSVファイル読み込み
-            with open(filename, 'r', encoding='utf-8') as csvfile:
-                csv_data = csvfile.read()
-            
-            # print(f"[DEBUG] CSV data length: {len(csv_data)} characters")  # デバッグログ
-            # grid_system.from_csv()を使用して読み込み
-            result = self.grid_system.from_csv(csv_data)
-            # print(f"[DEBUG] from_csv result: {result}")  # デバッグログ
+            # CSVファイル読み込み（grid_system.read_csv()で1行ずつ解析）
+            with open(filename, 'r', encoding='utf-8', newline='') as csvfile:
+                result = self.grid_system.read_csv(csvfile)
+            # print(f"[DEBUG] read_csv result: {result}")  # デバッグログ
             return result
             
         except Exception as e:
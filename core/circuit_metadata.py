@@ -0,0 +1,192 @@
+# PyPlc Ver3 Circuit Metadata Index
+# 作成日: 2025-08-30
+# 目標: ファイルオープンダイアログのプレビュー用に、回路CSVの概要（デバイス数・使用アドレス等）を
+#       ワーカースレッドで遅延計算し、パス・サイズ・更新時刻をキーにディスク上の索引へキャッシュする
+
+import csv
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from config import CircuitCsvConfig, CircuitPreviewConfig
+from core.atomic_file import atomic_write
+
+INDEX_VERSION = 2  # 2: created（ヘッダーコメントの作成日時）を追加
+
+
+def read_circuit_metadata(path: str) -> dict:
+    """
+    回路CSVを1行ずつ読み、概要を集計する（デバイスは生成せず、ファイル全体もメモリに展開しない）
+
+    Args:
+        path: 回路CSVファイルのパス
+
+    Returns:
+        dict: {"device_total", "device_counts": {種別: 数}, "addresses": [使用アドレス],
+               "rows": 使用行数, "cols": 使用列数, "created": 作成日時（ヘッダーコメント）}
+    """
+    device_counts: Dict[str, int] = {}
+    addresses = set()
+    max_row = max_col = -1
+    created = ""
+
+    with open(path, 'r', encoding='utf-8', newline='') as csvfile:
+        def data_lines():
+            nonlocal created
+            for line in csvfile:
+                stripped = line.strip()
+                if stripped.startswith('#'):
+                    if stripped.startswith('# Created:'):
+                        created = stripped[len('# Created:'):].strip()
+                    continue
+                yield line
+
+        reader = csv.reader(data_lines(), skipinitialspace=True)
+        header = next(reader, None)
+        column_index = {name: i for i, name in enumerate(header)} if header else {}
+        basic_columns = next((columns for key, columns in CircuitCsvConfig.BASIC_COLUMNS.items()
+                              if key in column_index), None)
+        if basic_columns is None:
+            raise ValueError("Unknown circuit CSV format")
+        missing = [name for name in basic_columns[:4] if name not in column_index]
+        if missing:
+            raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+        row_i, col_i, type_i, address_i = (column_index[name] for name in basic_columns[:4])
+
+        for values in reader:
+            try:
+                row = int(values[row_i])
+                col = int(values[col_i])
+                device_type = values[type_i]
+                address = values[address_i].strip().upper()
+            except (ValueError, IndexError):
+                continue
+            device_counts[device_type] = device_counts.get(device_type, 0) + 1
+            if address and address != "WIRE":
+                addresses.add(address)
+            max_row = max(max_row, row)
+            max_col = max(max_col, col)
+
+    return {
+        "device_total": sum(device_counts.values()),
+        "device_counts": dict(sorted(device_counts.items())),
+        "addresses": sorted(addresses),
+        "rows": max_row + 1,
+        "cols": max_col + 1,
+        "created": created,
+    }
+
+
+class CircuitMetadataIndex:
+    """
+    回路概要の索引（パス → サイズ・更新時刻・概要）
+    - get() は索引にあり、サイズと更新時刻が一致する場合のみ概要を返す（再解析なし）
+    - request() で未計算のファイルをワーカースレッドに依頼し、完了後に get() で取得する
+    - 依頼は最新の1件のみ保持する（選択を素早く移動した場合、途中のファイルは解析しない）
+    - 新規に計算した概要は、依頼が途切れた時点で索引ファイルへまとめて書き出す
+    """
+
+    def __init__(self, filename: str = CircuitPreviewConfig.INDEX_FILENAME):
+        """
+        Args:
+            filename: 索引ファイル名（作業ディレクトリ相対）
+        """
+        self.filename = filename
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._requested: Optional[str] = None
+        self._dirty = False
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        """索引ファイルを読み込む（存在しない・壊れている場合は空の索引）"""
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._entries = data.get("entries", {})
+        except (OSError, ValueError, AttributeError):
+            self._entries = {}
+
+    def _save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": INDEX_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+            atomic_write(self.filename, lambda f: json.dump(data, f, ensure_ascii=False))
+        except OSError as e:
+            print(f"Preview index save error: {e}")
+
+    @staticmethod
+    def _file_key(path: str):
+        """(絶対パス, サイズ, 更新時刻)。ファイルが無い場合None"""
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat_result.st_size, stat_result.st_mtime_ns
+
+    def get(self, path: str) -> Optional[dict]:
+        """
+        キャッシュ済みの概要を返す
+
+        Returns:
+            Optional[dict]: 概要（"modified"に更新時刻、解析失敗時は"error"を含む）。未計算・変更済みの場合None
+        """
+        key = self._file_key(path)
+        if key is None:
+            return None
+        abs_path, size, mtime_ns = key
+        with self._lock:
+            entry = self._entries.get(abs_path)
+        if entry is None or entry.get("size") != size or entry.get("mtime_ns") != mtime_ns:
+            return None
+        return entry["metadata"]
+
+    def request(self, path: str) -> None:
+        """概要の計算をワーカースレッドに依頼する（計算済みの場合は何もしない）"""
+        if self.get(path) is not None:
+            return
+        with self._condition:
+            self._requested = path
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="CircuitMetadataIndex", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while self._requested is None:
+                    self._condition.wait()
+                path, self._requested = self._requested, None
+            self._compute(path)
+            with self._lock:
+                idle = self._requested is None
+            if idle:
+                self._save()
+
+    def _compute(self, path: str) -> None:
+        key = self._file_key(path)
+        if key is None:
+            return
+        abs_path, size, mtime_ns = key
+        try:
+            metadata = read_circuit_metadata(path)
+        except (OSError, ValueError, UnicodeDecodeError, csv.Error) as e:
+            metadata = {"error": str(e)}
+        metadata["modified"] = mtime_ns / 1e9
+
+        with self._lock:
+            self._entries.pop(abs_path, None)
+            self._entries[abs_path] = {"size": size, "mtime_ns": mtime_ns, "metadata": metadata}
+            # 古い順に削除して索引を小さく保つ
+            while len(self._entries) > CircuitPreviewConfig.MAX_INDEX_ENTRIES:
+                del self._entries[next(iter(self._entries))]
+            self._dirty = True
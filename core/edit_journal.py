@@ -0,0 +1,172 @@
+"""
+PyPlc Ver3 Edit Journal Module
+作成日: 2025-08-23
+目標: 回路編集のUndo/Redo（グリッド全体のコピーではなく逆操作を記録する）
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from config import EditHistoryConfig
+from core.device_base import PLCDevice
+
+if TYPE_CHECKING:
+    from core.grid_system import GridSystem
+
+# 属性が存在しなかったことを表す番兵（Undo時は属性を削除する）
+MISSING_FIELD = object()
+
+
+@dataclass
+class PlaceCommand:
+    """デバイス配置（Undo: 取り外し / Redo: 同じデバイスを再配置）"""
+    device: PLCDevice
+
+    def undo(self, grid: "GridSystem") -> None:
+        grid._detach_device(*self.device.position)
+
+    def redo(self, grid: "GridSystem") -> None:
+        grid._attach_device(self.device)
+
+
+@dataclass
+class RemoveCommand:
+    """デバイス削除（Undo: 同じデバイスを再配置 / Redo: 取り外し）"""
+    device: PLCDevice
+
+    def undo(self, grid: "GridSystem") -> None:
+        grid._attach_device(self.device)
+
+    def redo(self, grid: "GridSystem") -> None:
+        grid._detach_device(*self.device.position)
+
+
+@dataclass
+class SetFieldsCommand:
+    """デバイス属性変更（アドレス・プリセット値・比較式など）"""
+    position: Tuple[int, int]
+    before: Dict[str, Any]
+    after: Dict[str, Any]
+
+    def undo(self, grid: "GridSystem") -> None:
+        grid._set_device_fields(self.position, self.before)
+
+    def redo(self, grid: "GridSystem") -> None:
+        grid._set_device_fields(self.position, self.after)
+
+
+class EditJournal:
+    """
+    編集操作のコマンドログ
+    - 1エントリ = 1回のユーザー操作（グループ化により複数セル操作も1エントリ）
+    - Undo/Redoは変更されたセル数に比例する時間で完了する
+    - 保持エントリ数は EditHistoryConfig.MAX_UNDO_DEPTH で制限する
+    """
+
+    def __init__(self, max_depth: int = EditHistoryConfig.MAX_UNDO_DEPTH):
+        """
+        Args:
+            max_depth: Undo可能な最大エントリ数
+        """
+        self._undo_stack: Deque[List[Any]] = deque(maxlen=max_depth)
+        self._redo_stack: Deque[List[Any]] = deque(maxlen=max_depth)
+        self._group: Optional[List[Any]] = None
+        self._group_depth = 0
+        self._suspend_depth = 0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo_stack)
+
+    def record(self, command: Any) -> None:
+        """
+        編集コマンドを記録する（グループ中はグループに追加）
+
+        Args:
+            command: undo(grid)/redo(grid) を持つコマンド
+        """
+        if self._suspend_depth:
+            return
+        if self._group is not None:
+            self._group.append(command)
+        else:
+            self._undo_stack.append([command])
+        self._redo_stack.clear()
+
+    def begin_group(self) -> None:
+        """複数の編集を1エントリにまとめる（ネスト可、ドラッグ操作などフレームを跨ぐ場合に使用）"""
+        if self._group_depth == 0:
+            self._group = []
+        self._group_depth += 1
+
+    def end_group(self) -> None:
+        """begin_group()で開始したグループを確定する（空のグループは記録しない）"""
+        if self._group_depth == 0:
+            return
+        self._group_depth -= 1
+        if self._group_depth == 0:
+            if self._group:
+                self._undo_stack.append(self._group)
+            self._group = None
+
+    @contextmanager
+    def group(self) -> Iterator[None]:
+        """with文で使用するグループ化"""
+        self.begin_group()
+        try:
+            yield
+        finally:
+            self.end_group()
+
+    @contextmanager
+    def suspended(self) -> Iterator[None]:
+        """記録を一時停止する（初期化・Undo/Redo適用中など）"""
+        self._suspend_depth += 1
+        try:
+            yield
+        finally:
+            self._suspend_depth -= 1
+
+    def clear(self) -> None:
+        """履歴を全て破棄する（ファイル読み込み時など）"""
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._group = [] if self._group_depth else None
+
+    def undo(self, grid: "GridSystem") -> bool:
+        """
+        直前のエントリを取り消す
+
+        Returns:
+            bool: 取り消しを実行した場合True
+        """
+        if self._group_depth or not self._undo_stack:
+            return False
+        entry = self._undo_stack.pop()
+        with self.suspended():
+            for command in reversed(entry):
+                command.undo(grid)
+        self._redo_stack.append(entry)
+        return True
+
+    def redo(self, grid: "GridSystem") -> bool:
+        """
+        取り消したエントリを再実行する
+
+        Returns:
+            bool: 再実行した場合True
+        """
+        if self._group_depth or not self._redo_stack:
+            return False
+        entry = self._redo_stack.pop()
+        with self.suspended():
+            for command in entry:
+                command.redo(grid)
+        self._undo_stack.append(entry)
+        return True
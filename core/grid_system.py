@@ -8,11 +8,14 @@ import pyxel
 import csv
 import io
 from datetime import datetime
-from typing import Optional, Tuple, List
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple, List
 
-from config import GridConfig, GridConstraints, DeviceType
+from config import GridConfig, GridConstraints, DeviceType, CircuitCsvConfig
 from core.device_base import PLCDevice
 from core.SpriteManager import sprite_manager # SpriteManagerをインポート
+from core.static_layer_cache import StaticLayerCache
+from core.address_allocator import AddressAllocator
+from core.edit_journal import EditJournal, PlaceCommand, RemoveCommand, SetFieldsCommand, MISSING_FIELD
 
 class GridSystem:
     """
@@ -31,7 +34,32 @@ class GridSystem:
         self.grid_data: List[List[Optional[PLCDevice]]] = [
             [None for _ in range(self.cols)] for _ in range(self.rows)
         ]
-        self._initialize_bus_bars()
+        # 編集世代カウンタ（配置・削除・アドレス変更のたびに加算、各種キャッシュの無効化に使用）
+        self.edit_generation: int = 0
+        self._static_layer = StaticLayerCache(self)
+
+        # 数値ラベル描画キャッシュ（edit_generation単位でラベル対象デバイスとアドレス索引を再構築）
+        self._label_index_generation: int = -1
+        self._label_devices: List[PLCDevice] = []
+        self._value_device_index: Dict[str, PLCDevice] = {}
+        # (row, col) -> (値タプル, 表示文字列, x, y, 幅, 文字色, 背景色)
+        self._label_cache: Dict[Tuple[int, int], tuple] = {}
+
+        # 同アドレス検索キャッシュ（正規化アドレス → 座標リスト、edit_generation変化時に破棄）
+        self._address_match_generation: int = -1
+        self._address_match_cache: Dict[str, List[Tuple[int, int]]] = {}
+
+        # 空きアドレス管理（デフォルトアドレス生成用、配置・削除・アドレス変更時に差分更新）
+        self.address_allocator = AddressAllocator()
+
+        # 編集履歴（Undo/Redo用の逆操作ログ）。バスバー初期配置は記録しない
+        self.journal = EditJournal()
+        with self.journal.suspended():
+            self._initialize_bus_bars()
+
+    def _mark_edited(self) -> None:
+        """グリッド構成が変更されたことを記録する（キャッシュ無効化用）"""
+        self.edit_generation += 1
 
     def _initialize_bus_bars(self):
         """左右のバスバーをグリッドに配置する"""
@@ -51,8 +79,8 @@ class GridSystem:
             return None
 
         new_device = PLCDevice(device_type=device_type, position=(row, col), address=address)
-        self.grid_data[row][col] = new_device
-        self._update_connections(new_device)
+        self._attach_device(new_device)
+        self.journal.record(PlaceCommand(new_device))
         return new_device
 
     def remove_device(self, row: int, col: int) -> bool:
@@ -61,6 +89,25 @@ class GridSystem:
         if device_to_remove is None or device_to_remove.device_type in [DeviceType.L_SIDE, DeviceType.R_SIDE]:
             return False
 
+        self._detach_device(row, col)
+        self.journal.record(RemoveCommand(device_to_remove))
+        return True
+
+    def _attach_device(self, device: PLCDevice) -> None:
+        """デバイスをその position に格納し、周囲との接続を張る（Undo/Redoと共通の基本操作）"""
+        row, col = device.position
+        self.grid_data[row][col] = device
+        self.address_allocator.acquire(device.address)
+        device.connections = {}
+        self._update_connections(device)
+        self._mark_edited()
+
+    def _detach_device(self, row: int, col: int) -> None:
+        """指定した座標のデバイスを取り外し、周囲からの接続を解除する（Undo/Redoと共通の基本操作）"""
+        device_to_remove = self.grid_data[row][col]
+        if device_to_remove is None:
+            return
+
         for direction, neighbor_pos in device_to_remove.connections.items():
             if neighbor_pos:
                 neighbor_device = self.get_device(neighbor_pos[0], neighbor_pos[1])
@@ -69,7 +116,32 @@ class GridSystem:
                     neighbor_device.connections[reverse_direction] = None
         
         self.grid_data[row][col] = None
-        return True
+        self.address_allocator.release(device_to_remove.address)
+        self._mark_edited()
+
+    def _set_device_fields(self, position: Tuple[int, int], fields: Dict[str, object]) -> None:
+        """デバイス属性を一括設定する（MISSING_FIELDの属性は削除）"""
+        device = self.get_device(*position)
+        if device is None:
+            return
+        for name, value in fields.items():
+            if name == 'address':
+                self.address_allocator.release(device.address)
+                self.address_allocator.acquire(value)
+            if value is MISSING_FIELD:
+                if name in device.__dict__:
+                    delattr(device, name)
+            else:
+                setattr(device, name, value)
+        self._mark_edited()
+
+    def undo(self) -> bool:
+        """直前の編集操作を取り消す（変更セル数に比例する時間）"""
+        return self.journal.undo(self)
+
+    def redo(self) -> bool:
+        """取り消した編集操作をやり直す"""
+        return self.journal.redo(self)
 
     def _update_connections(self, device: PLCDevice) -> None:
         """指定されたデバイスとその周囲のデバイスの接続情報を更新する"""
@@ -103,154 +175,67 @@ class GridSystem:
             # その他のデバイス（コイル、配線等）: 通電状態をそのまま表示
             return device.is_energized
 
-    def reset_all_energized_states(self) -> None:
-        """全デバイスの通電状態をリセット（配置は維持）"""
-        for row in range(self.rows):
+    def reset_all_energized_states(self, rows=None) -> None:
+        """
+        全デバイスの通電状態をリセット（配置は維持）
+
+        Args:
+            rows: 対象行（Noneで全行。マルチレートタスクが自分の行だけを解析する場合に指定）
+        """
+        rows = range(self.rows) if rows is None else rows
+        for row in rows:
             for col in range(self.cols):
                 device = self.get_device(row, col)
                 if device:
                     device.is_energized = False
         # 左バスバー（電源）のみTrueに設定
-        for row in range(self.rows):
+        for row in rows:
             left_bus = self.get_device(row, GridConstraints.get_left_bus_col())
             if left_bus:
                 left_bus.is_energized = True
 
     def draw(self) -> None:
         """グリッド線、バスバー、そして配置されたデバイスを描画する"""
-        self._draw_grid_lines() # 背景グリッド線を先に描画
-        self._draw_devices()
-        self._draw_timer_counter_values() # タイマー・カウンター数字を最前面に描画
-        self._draw_data_register_values() # データレジスタ数字を最前面に描画
-        self._draw_compare_values() # 比較デバイス条件を最前面に描画
-
-    def _draw_grid_lines(self) -> None:
-        """グリッド線を描画する"""
-        # 水平線
-        for r in range(self.rows):
-            y = self.origin_y + r * self.cell_size
-            x1 = self.origin_x + (GridConstraints.get_left_bus_col()) * self.cell_size
-            x2 = self.origin_x + (GridConstraints.get_right_bus_col()) * self.cell_size
-            pyxel.line(x1, y, x2, y, pyxel.COLOR_NAVY)
-        
-        # 垂直線
-        for c in range(GridConstraints.get_left_bus_col() + 1, GridConstraints.get_right_bus_col()):
-            x = self.origin_x + c * self.cell_size
-            y1 = self.origin_y
-            y2 = self.origin_y + (self.rows - 1) * self.cell_size
-            pyxel.line(x, y1, x, y2, pyxel.COLOR_NAVY)
-
-    def _draw_devices(self) -> None:
-        """グリッド上のすべてのデバイスをスプライトで描画する"""
-        sprite_size = sprite_manager.sprite_size
-        
-        # デバッグ用: 描画されるデバイス数をカウント（開発用、本来は不要）
-        device_count = 0
-        drawn_count = 0
-        
-        for r in range(self.rows):
-            for c in range(self.cols):
-                device = self.get_device(r, c)
-                if device:
-                    device_count += 1  # デバイス存在カウント
-                    draw_x = self.origin_x + c * self.cell_size - sprite_size // 2
-                    draw_y = self.origin_y + r * self.cell_size - sprite_size // 2
-
-                    # --- バスバーは当面の間、旧描画方式を維持 ---
-                    if device.device_type == DeviceType.L_SIDE:
-                        # バスバーの描画位置をグリッド線に合わせる
-                        bar_x = self.origin_x + c * self.cell_size
-                        pyxel.rect(bar_x -1, self.origin_y-8, 3, (self.rows) * self.cell_size, pyxel.COLOR_YELLOW)
-                        continue
-                    elif device.device_type == DeviceType.R_SIDE:
-                        bar_x = self.origin_x + c * self.cell_size
-                        pyxel.rect(bar_x - 1, self.origin_y-8, 3, (self.rows) * self.cell_size, pyxel.COLOR_LIGHT_BLUE)
-                        continue
-                    
-                    # --- デバイスのスプライト描画 ---
-                    # 接点の表示状態は論理状態と通電状態の組み合わせで決定
-                    display_energized = self._calculate_display_state(device)
-                    coords = sprite_manager.get_sprite_coords(device.device_type, display_energized)
-                    if coords:
-                        pyxel.blt(draw_x, draw_y, 0, coords[0], coords[1], sprite_size, sprite_size, 0)
-                        drawn_count += 1  # 描画カウント
-                        
-                    else:
-                        # スプライトが見つからない場合のフォールバック
-                        if not hasattr(self, '_sprite_error_logged'):
-                            self._sprite_error_logged = True
-                        pyxel.rect(draw_x, draw_y, sprite_size, sprite_size, pyxel.COLOR_PINK)
-                        drawn_count += 1  # 描画カウント（フォールバックも含む）
-        
-        # 描画情報（開発用）
-        if device_count > 2:  # バスバー以外のデバイスがある場合のみ表示
-            pyxel.text(10, 360, f"Devices: {device_count}, Drawn: {drawn_count}", pyxel.COLOR_WHITE)
+        # グリッド線・バスバー・デバイススプライトはキャッシュ済み静的レイヤーから転送
+        self._static_layer.draw()
+        # タイマー・カウンター → データレジスタ → 比較デバイスの順で数値ラベルを最前面に描画
+        self._draw_value_labels()
 
-    def _draw_timer_counter_values(self) -> None:
+    def to_csv(self) -> str:
         """
-        全タイマー・カウンターの現在値を最前面に描画
-        グリッド線の後で描画するため、線に隠れることがない
+        現在のグリッド状態をCSV形式の文字列として出力
+        バスバー（L_SIDE/R_SIDE）は除外し、配置されたデバイスのみを出力
         """
-        sprite_size = sprite_manager.sprite_size
-        
-        for r in range(self.rows):
-            for c in range(self.cols):
-                device = self.get_device(r, c)
-                if device and device.device_type in [DeviceType.TIMER_TON, DeviceType.COUNTER_CTU]:
-                    draw_x = self.origin_x + c * self.cell_size - sprite_size // 2
-                    draw_y = self.origin_y + r * self.cell_size - sprite_size // 2
-                    self._draw_timer_counter_value(device, draw_x, draw_y, sprite_size)
+        output = io.StringIO()
+        self.write_csv(output)
+        return output.getvalue()
 
-    def _draw_timer_counter_value(self, device: PLCDevice, draw_x: int, draw_y: int, sprite_size: int) -> None:
+    def write_csv(self, output: TextIO) -> int:
         """
-        タイマー・カウンター現在値表示（PLC標準準拠）
-        現在値をデバイススプライトの下部に数値で表示
-        
+        現在のグリッド状態をCSV形式でファイルオブジェクトへ1行ずつ書き出す
+        文字列全体を組み立てないため、回路規模に関係なくメモリ使用量は一定
+
         Args:
-            device: 描画対象デバイス
-            draw_x: スプライト描画X座標
-            draw_y: スプライト描画Y座標
-            sprite_size: スプライトサイズ
+            output: 書き込み先テキストファイルオブジェクト（newline=''で開くこと）
+
+        Returns:
+            int: 書き出したデバイス数
         """
-        if device.device_type not in [DeviceType.TIMER_TON, DeviceType.COUNTER_CTU]:
-            return
-        
-        # 現在値表示位置計算（スプライト下部中央）
-        value_x = draw_x + sprite_size // 4  # スプライト中央寄り
-        value_y = draw_y + sprite_size + 1   # スプライト下部に少し間隔
-        
-        # 現在値テキスト生成（半角英数字のみ）
-        if device.device_type == DeviceType.TIMER_TON:
-            # タイマー: 現在値/プリセット値形式で表示
-            current_val = getattr(device, 'current_value', 0)
-            preset_val = getattr(device, 'preset_value', 0)
-            value_text = f"{current_val}/{preset_val}"
-            #text_color = pyxel.COLOR_PURPLE  # 常時パープルで見やすく
-            text_color = pyxel.COLOR_LIME  # 常時パープルで見やすく
-            
-        elif device.device_type == DeviceType.COUNTER_CTU:
-            # カウンター: 現在値/プリセット値形式で表示
-            current_val = getattr(device, 'current_value', 0)
-            preset_val = getattr(device, 'preset_value', 0)
-            value_text = f"{current_val}/{preset_val}"
-            text_color = pyxel.COLOR_LIME  # 常時パープルで見やすく
-            #text_color = pyxel.COLOR_PURPLE  # 常時パープルで見やすく
-            
-        else:
-            return
-        
-        # 現在値表示（背景付き）
-        text_width = len(value_text) * 4
-        pyxel.rect(value_x - 1, value_y - 1, text_width + 2, 7, pyxel.COLOR_BLACK)
-        #pyxel.text(value_x, value_y, value_text, text_color)
-        pyxel.text(value_x, value_y, value_text, pyxel.COLOR_LIME)
+        return self.write_csv_rows(output, self.iter_csv_rows())
 
-    def to_csv(self) -> str:
+    @staticmethod
+    def write_csv_rows(output: TextIO, rows: Iterable[list]) -> int:
         """
-        現在のグリッド状態をCSV形式の文字列として出力
-        バスバー（L_SIDE/R_SIDE）は除外し、配置されたデバイスのみを出力
+        CSVヘッダーとデバイス行データをファイルオブジェクトへ書き出す
+        iter_csv_rows()のスナップショット（リスト）を別スレッドで書き出す用途にも使用する
+
+        Args:
+            output: 書き込み先テキストファイルオブジェクト（newline=''で開くこと）
+            rows: iter_csv_rows()が返す行データ
+
+        Returns:
+            int: 書き出したデバイス数
         """
-        output = io.StringIO()
         writer = csv.writer(output)
         
         # ヘッダー情報（コメント形式）
@@ -262,8 +247,23 @@ class GridSystem:
         # CSVヘッダー（拡張フォーマット）
         writer.writerow(['row', 'col', 'device_type', 'address', 'state', 'preset_value', 'current_value', 'timer_active', 'last_input_state', 'operation', 'compare_left', 'compare_operator', 'compare_right'])
         
-        # デバイスデータ出力（バスバー除外）
+        # デバイスデータ出力
         saved_count = 0  # 保存デバイス数カウント
+        for row_data in rows:
+            writer.writerow(row_data)
+            saved_count += 1
+        
+        # CSV保存完了
+        return saved_count
+
+    def iter_csv_rows(self) -> Iterator[list]:
+        """
+        配置済みデバイス（バスバー除外）をCSV行データとして順次返す
+
+        Yields:
+            list: row,col,device_type,address,state,preset_value,current_value,
+                  timer_active,last_input_state,operation,compare_left,compare_operator,compare_right
+        """
         for row in range(self.rows):
             for col in range(self.cols):
                 device = self.get_device(row, col)
@@ -280,7 +280,7 @@ class GridSystem:
                     compare_operator = getattr(device, 'compare_operator', '')
                     compare_right = getattr(device, 'compare_right', '')
                     
-                    writer.writerow([
+                    yield [
                         row,
                         col, 
                         device.device_type.value,
@@ -294,128 +294,177 @@ class GridSystem:
                         compare_left,
                         compare_operator,
                         compare_right
-                    ])
-                    saved_count += 1
-        
-        # CSV保存完了
-        return output.getvalue()
+                    ]
 
     def from_csv(self, csv_data: str) -> bool:
         """
         CSV形式の文字列からグリッド状態を復元
         現在のグリッドをクリアしてからデータを読み込む
         """
+        return self.read_csv(io.StringIO(csv_data))
+
+    def read_csv(self, input_stream: TextIO) -> bool:
+        """
+        ファイルオブジェクトからCSVを1行ずつ読み込み、グリッド状態を復元する
+        コメント行（#）は読み込みながら除外し、ファイル全体をメモリに展開しない
+
+        Args:
+            input_stream: 読み込み元テキストファイルオブジェクト（newline=''で開くこと）
+
+        Returns:
+            bool: 読み込み成功時True、失敗時False
+        """
         try:
-            # 現在のグリッドをクリア（バスバー以外）
-            self._clear_user_devices()
-            
-            # CSV読み込み（コメント行を事前除去）
-            lines = csv_data.strip().split('\n')
-            csv_lines = []
-            for line in lines:
-                if not line.strip().startswith('#'):
-                    csv_lines.append(line)
-            
-            # コメント除去後のCSVデータを再構築
-            clean_csv_data = '\n'.join(csv_lines)
-            
-            input_stream = io.StringIO(clean_csv_data)
-            reader = csv.DictReader(input_stream, skipinitialspace=True)
-            
-            loaded_count = 0
-            for line_num, row_data in enumerate(reader, start=1):
-                try:
-                    # データ解析（基本フィールド - 複数フォーマット対応）
-                    # フォーマット1: row,col,device_type,address,state (Ver3標準)
-                    # フォーマット2: Row,Col,DeviceType,DeviceID,IsEnergized,State (旧フォーマット)
-                    
-                    if 'row' in row_data:
-                        row = int(row_data['row'])
-                        col = int(row_data['col'])
-                        device_type_str = row_data['device_type']
-                        address = row_data['address']
-                        state_str = row_data['state']
-                    elif 'Row' in row_data:
-                        # 旧フォーマット対応
-                        row = int(row_data['Row'])
-                        col = int(row_data['Col'])
-                        device_type_str = row_data['DeviceType']
-                        address = row_data['DeviceID']
-                        state_str = row_data['State']
-                    else:
-                        # 不明なフォーマット
-                        continue
-                    
-                    # DeviceType変換
-                    device_type = DeviceType(device_type_str)
-                    
-                    # state変換（True/False文字列をboolに）
-                    state = state_str.lower() == 'true'
-                    
-                    # 拡張フィールド解析（後方互換性確保）
-                    preset_value = 0
-                    current_value = 0
-                    timer_active = False
-                    last_input_state = False
-                    operation = 'MOV'  # デフォルト操作
-                    compare_left = ''
-                    compare_operator = ''
-                    compare_right = ''
-                    
-                    # 拡張フィールドが存在する場合は取得
-                    if 'preset_value' in row_data:
-                        preset_value = int(row_data['preset_value']) if row_data['preset_value'] else 0
-                    if 'current_value' in row_data:
-                        current_value = int(row_data['current_value']) if row_data['current_value'] else 0
-                    if 'timer_active' in row_data:
-                        timer_active = row_data['timer_active'].lower() == 'true' if row_data['timer_active'] else False
-                    if 'last_input_state' in row_data:
-                        last_input_state = row_data['last_input_state'].lower() == 'true' if row_data['last_input_state'] else False
-                    if 'operation' in row_data:
-                        operation = row_data['operation'] if row_data['operation'] else 'MOV'
-                    # 比較フィールドが存在する場合は取得
-                    if 'compare_left' in row_data:
-                        compare_left = row_data['compare_left'] if row_data['compare_left'] else ''
-                    if 'compare_operator' in row_data:
-                        compare_operator = row_data['compare_operator'] if row_data['compare_operator'] else ''
-                    if 'compare_right' in row_data:
-                        compare_right = row_data['compare_right'] if row_data['compare_right'] else ''
-                    
-                    # デバイス配置
-                    new_device = self.place_device(row, col, device_type, address)
-                    if new_device:
-                        new_device.state = state
-                        
-                        # タイマー・カウンター・データレジスタ特有の値を設定
-                        if device_type in [DeviceType.TIMER_TON, DeviceType.COUNTER_CTU]:
-                            new_device.preset_value = preset_value
-                            new_device.current_value = current_value
-                            new_device.timer_active = timer_active
-                            new_device.last_input_state = last_input_state
-                        elif device_type == DeviceType.DATA_REGISTER:
-                            # データレジスタのpreset_value/current_value/operation設定
-                            new_device.preset_value = preset_value
-                            new_device.current_value = current_value
-                            new_device.operation = operation
-                            # 立ち上がりエッジ検出用状態初期化
-                            new_device.last_energized_state = False
-                        elif device_type == DeviceType.COMPARE_DEVICE:
-                            # 比較デバイスの比較設定を復元
-                            new_device.compare_left = compare_left
-                            new_device.compare_operator = compare_operator
-                            new_device.compare_right = compare_right
-                        
-                        loaded_count += 1
-                    
-                except (ValueError, KeyError) as e:
-                    continue
-            
+            # CSV読み込み（コメント行を逐次除外）
+            lines = (line for line in input_stream if not line.strip().startswith('#'))
+            self.bulk_load_devices(self._iter_csv_devices(csv.reader(lines, skipinitialspace=True)))
             # CSV読み込み完了
             return True
-            
+
         except Exception as e:
             return False
 
+    def _iter_csv_devices(self, reader) -> Iterator[PLCDevice]:
+        """
+        CSVリーダーの行データからデバイスを順次生成する
+
+        Args:
+            reader: csv.reader互換のイテレータ（先頭行はヘッダー）
+
+        Yields:
+            PLCDevice: 解析済みデバイス（不正行はスキップ）
+        """
+        header = next(reader, None)
+        column_index = {name: i for i, name in enumerate(header)} if header else {}
+
+        # データ解析（基本フィールド - 複数フォーマット対応）
+        basic_columns = None
+        for key, columns in CircuitCsvConfig.BASIC_COLUMNS.items():
+            if key in column_index:
+                basic_columns = columns
+                break
+        if basic_columns is None:
+            # 不明なフォーマット
+            return
+
+        row_i, col_i, type_i, address_i, state_i = (column_index.get(name) for name in basic_columns)
+        (preset_i, current_i, timer_active_i, last_input_i,
+         operation_i, compare_left_i, compare_operator_i, compare_right_i) = (
+            column_index.get(name, -1) for name in CircuitCsvConfig.EXTENDED_COLUMNS)
+
+        for values in reader:
+            try:
+                row = int(values[row_i])
+                col = int(values[col_i])
+                device_type = DeviceType(values[type_i])
+                new_device = PLCDevice(device_type=device_type, position=(row, col), address=values[address_i])
+                new_device.state = values[state_i].lower() == 'true'
+
+                # 拡張フィールド解析（存在しない列・空欄はデフォルト値）
+                field_count = len(values)
+
+                # タイマー・カウンター・データレジスタ特有の値を設定
+                if device_type in (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU, DeviceType.DATA_REGISTER):
+                    preset_str = values[preset_i] if 0 <= preset_i < field_count else ''
+                    current_str = values[current_i] if 0 <= current_i < field_count else ''
+                    new_device.preset_value = int(preset_str) if preset_str else 0
+                    new_device.current_value = int(current_str) if current_str else 0
+
+                if device_type in (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU):
+                    timer_active_str = values[timer_active_i] if 0 <= timer_active_i < field_count else ''
+                    last_input_str = values[last_input_i] if 0 <= last_input_i < field_count else ''
+                    new_device.timer_active = timer_active_str.lower() == 'true'
+                    new_device.last_input_state = last_input_str.lower() == 'true'
+                elif device_type == DeviceType.DATA_REGISTER:
+                    # データレジスタのoperation設定（デフォルト操作: MOV）
+                    operation = values[operation_i] if 0 <= operation_i < field_count else ''
+                    new_device.operation = operation or 'MOV'
+                    # 立ち上がりエッジ検出用状態初期化
+                    new_device.last_energized_state = False
+                elif device_type == DeviceType.COMPARE_DEVICE:
+                    # 比較デバイスの比較設定を復元
+                    new_device.compare_left = values[compare_left_i] if 0 <= compare_left_i < field_count else ''
+                    new_device.compare_operator = values[compare_operator_i] if 0 <= compare_operator_i < field_count else ''
+                    new_device.compare_right = values[compare_right_i] if 0 <= compare_right_i < field_count else ''
+            except (ValueError, IndexError, TypeError):
+                continue
+
+            yield new_device
+
+    def bulk_load_devices(self, devices: Iterable[PLCDevice]) -> int:
+        """
+        ユーザーデバイスを全て置き換えて一括配置する
+        全デバイスをグリッドへ直接格納した後、接続情報を1回の走査でまとめて計算する
+
+        Args:
+            devices: 配置するデバイス（positionに配置される）
+
+        Returns:
+            int: 配置したデバイス数
+        """
+        # バスバーのみを残した新しいグリッドを用意（ユーザーデバイスのクリア）
+        left_col = GridConstraints.get_left_bus_col()
+        right_col = GridConstraints.get_right_bus_col()
+        new_grid: List[List[Optional[PLCDevice]]] = []
+        for row_devices in self.grid_data:
+            new_row: List[Optional[PLCDevice]] = [None] * self.cols
+            new_row[left_col] = row_devices[left_col]
+            new_row[right_col] = row_devices[right_col]
+            new_grid.append(new_row)
+
+        bus_types = (DeviceType.L_SIDE, DeviceType.R_SIDE)
+        rows, cols = self.rows, self.cols
+        loaded_count = 0
+        for device in devices:
+            row, col = device.position
+            # グリッド範囲外・配置済みセルはスキップ（バスバーのみ上書き可）
+            if not (0 <= row < rows and 0 <= col < cols):
+                continue
+            if new_grid[row][col] is not None and device.device_type not in bus_types:
+                continue
+            new_grid[row][col] = device
+            loaded_count += 1
+
+        # 構築済みグリッドへ差し替え、接続情報を一括計算
+        for r, new_row in enumerate(new_grid):
+            self.grid_data[r] = new_row
+        self._rebuild_connections()
+        self.address_allocator.reset(
+            device.address for row_devices in self.grid_data for device in row_devices if device is not None)
+        self._mark_edited()
+        # 読み込み前の編集履歴は無効になるため破棄
+        self.journal.clear()
+        return loaded_count
+
+    def _rebuild_connections(self) -> None:
+        """
+        全デバイスの接続情報をグリッドの1回の線形走査で再計算する
+        各セルについて右・下の隣接デバイスとのみ相互リンクを張る
+        """
+        grid_data = self.grid_data
+        for row_devices in grid_data:
+            for device in row_devices:
+                if device is not None:
+                    device.connections = {}
+
+        last_row = self.rows - 1
+        last_col = self.cols - 1
+        for r, row_devices in enumerate(grid_data):
+            below_row = grid_data[r + 1] if r < last_row else None
+            for c, device in enumerate(row_devices):
+                if device is None:
+                    continue
+                if c < last_col:
+                    right_device = row_devices[c + 1]
+                    if right_device is not None:
+                        device.connections['right'] = right_device.position
+                        right_device.connections['left'] = device.position
+                if below_row is not None:
+                    down_device = below_row[c]
+                    if down_device is not None:
+                        device.connections['down'] = down_device.position
+                        down_device.connections['up'] = device.position
+
     def _clear_user_devices(self) -> None:
         """
         ユーザー配置デバイスをクリア（バスバーは保持）
@@ -427,7 +476,10 @@ class GridSystem:
                 device = self.get_device(row, col)
                 if device and device.device_type not in [DeviceType.L_SIDE, DeviceType.R_SIDE]:
                     self.grid_data[row][col] = None
+                    self.address_allocator.release(device.address)
                     cleared_count += 1
+        if cleared_count:
+            self._mark_edited()
         # ユーザーデバイスクリア完了
 
     def update_device_address(self, row: int, col: int, new_address: str) -> bool:
@@ -444,11 +496,31 @@ class GridSystem:
         """
         device = self.get_device(row, col)
         if device:
-            device.address = new_address
+            self.update_device_parameters(row, col, address=new_address)
             return True
         else:
             return False
 
+    def update_device_parameters(self, row: int, col: int, **fields) -> bool:
+        """
+        指定した座標のデバイスの設定値（プリセット値・比較式・演算種別など）を更新
+
+        Args:
+            row: 行番号
+            col: 列番号
+            **fields: 更新する属性名と値（例: preset_value=10）
+
+        Returns:
+            bool: 更新成功時True、失敗時False
+        """
+        device = self.get_device(row, col)
+        if not device:
+            return False
+        before = {name: getattr(device, name, MISSING_FIELD) for name in fields}
+        self._set_device_fields((row, col), fields)
+        self.journal.record(SetFieldsCommand((row, col), before, dict(fields)))
+        return True
+
     def find_devices_by_address(self, target_address: str) -> List[Tuple[int, int]]:
         """
         指定アドレスと一致する全デバイスの座標を返す
@@ -459,12 +531,22 @@ class GridSystem:
             
         Returns:
             List[Tuple[int, int]]: 一致デバイスの(row, col)座標リスト
+            （キャッシュを共有するため呼び出し側で変更しないこと）
         """
         if not target_address or target_address.strip() == "":
             return []
         
-        matching_positions: List[Tuple[int, int]] = []
         normalized_target = target_address.upper().strip()
+
+        # 回路が変更されていなければ前回の検索結果を返す（ホバー中の毎フレーム呼び出し対策）
+        if self._address_match_generation != self.edit_generation:
+            self._address_match_cache.clear()
+            self._address_match_generation = self.edit_generation
+        cached = self._address_match_cache.get(normalized_target)
+        if cached is not None:
+            return cached
+
+        matching_positions: List[Tuple[int, int]] = []
         
         # 全グリッドをスキャンして同アドレスデバイスを検索
         for row in range(self.rows):
@@ -476,142 +558,155 @@ class GridSystem:
                     device.device_type not in [DeviceType.L_SIDE, DeviceType.R_SIDE]):
                     matching_positions.append((row, col))
         
+        self._address_match_cache[normalized_target] = matching_positions
         return matching_positions
 
-    def _draw_data_register_values(self) -> None:
+    # --- 数値ラベル描画（タイマー・カウンター・データレジスタ・比較デバイス） ---
+
+    def _refresh_label_index(self) -> None:
         """
-        全データレジスタのpreset/current値を最前面に描画
-        格式: preset/current 形式で表示
+        ラベル対象デバイス一覧と、現在値参照用のアドレス索引を再構築する
+        グリッド編集時（edit_generation変化時）のみ実行される
         """
-        sprite_size = sprite_manager.sprite_size
-        
-        for r in range(self.rows):
-            for c in range(self.cols):
-                device = self.get_device(r, c)
-                if device and device.device_type == DeviceType.DATA_REGISTER:
-                    draw_x = self.origin_x + c * self.cell_size - sprite_size // 2
-                    draw_y = self.origin_y + r * self.cell_size - sprite_size // 2
-                    self._draw_data_register_value(device, draw_x, draw_y, sprite_size)
+        if self._label_index_generation == self.edit_generation:
+            return
+
+        timer_counters: List[PLCDevice] = []
+        data_registers: List[PLCDevice] = []
+        compares: List[PLCDevice] = []
+        value_index: Dict[str, PLCDevice] = {}
+
+        for row in range(self.rows):
+            for col in range(self.cols):
+                device = self.grid_data[row][col]
+                if device is None:
+                    continue
+                device_type = device.device_type
+                if device_type in (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU):
+                    timer_counters.append(device)
+                elif device_type == DeviceType.DATA_REGISTER:
+                    data_registers.append(device)
+                elif device_type == DeviceType.COMPARE_DEVICE:
+                    compares.append(device)
+                    continue
+                else:
+                    continue
+                # 同一アドレスが複数ある場合は行優先で最初のデバイスを参照（従来の全探索と同じ）
+                if device.address:
+                    value_index.setdefault(device.address.upper(), device)
+
+        # 描画順はタイマー・カウンター → データレジスタ → 比較デバイス（重なり順を維持）
+        self._label_devices = timer_counters + data_registers + compares
+        self._value_device_index = value_index
+        self._label_cache.clear()
+        self._label_index_generation = self.edit_generation
 
-    def _draw_data_register_value(self, device: PLCDevice, draw_x: int, draw_y: int, sprite_size: int) -> None:
+    def _draw_value_labels(self) -> None:
         """
-        データレジスタのpreset/current値表示
-        デバイススプライトの下部にpreset/current形式で表示
-        
-        Args:
-            device: データレジスタデバイス
-            draw_x: スプライト描画X座標
-            draw_y: スプライト描画Y座標
-            sprite_size: スプライトサイズ
-        """
-        # preset_value (オペランド値) とcurrent_value (計算結果) を取得
-        preset_val = getattr(device, 'preset_value', 0)
-        current_val = getattr(device, 'current_value', 0)
-        
-        # "preset/current" 形式で表示文字列作成
-        value_text = f"{preset_val}/{current_val}"
-        
-        # 表示位置をスプライトの下部に設定
-        value_x = draw_x + 1
-        value_y = draw_y + sprite_size + 1
-        
-        # 背景付きで数値表示（見やすくするため）
-        text_width = len(value_text) * 4
-        pyxel.rect(value_x - 1, value_y - 1, text_width + 2, 7, pyxel.COLOR_BLACK)
-        pyxel.text(value_x, value_y, value_text, pyxel.COLOR_LIME)  # 黄緑で表示
+        ラベルを持つデバイスのみを走査し、キャッシュ済みラベルを描画する
+        表示文字列・幅・色は値が変化したときだけ再生成する
+        """
+        self._refresh_label_index()
+        label_cache = self._label_cache
+
+        for device in self._label_devices:
+            value_key = self._get_label_value_key(device)
+            cached = label_cache.get(device.position)
+            if cached is None or cached[0] != value_key:
+                cached = self._build_value_label(device, value_key)
+                label_cache[device.position] = cached
 
-    def _draw_compare_values(self) -> None:
+            text = cached[1]
+            if text is None:
+                continue
+            _, _, value_x, value_y, text_width, text_color, bg_color = cached
+            pyxel.rect(value_x - 1, value_y - 1, text_width + 2, 7, bg_color)
+            pyxel.text(value_x, value_y, text, text_color)
+
+    def _get_label_value_key(self, device: PLCDevice) -> tuple:
         """
-        全比較デバイスの条件式を最前面に描画
-        [D001(値) < 10] 形式で表示
+        ラベル表示内容を決定する値のタプルを返す（キャッシュの一致判定用）
+
+        Args:
+            device: ラベル対象デバイス
+
+        Returns:
+            tuple: 表示に影響する値の組
         """
-        sprite_size = sprite_manager.sprite_size
-        
-        for r in range(self.rows):
-            for c in range(self.cols):
-                device = self.get_device(r, c)
-                if device and device.device_type == DeviceType.COMPARE_DEVICE:
-                    draw_x = self.origin_x + c * self.cell_size - sprite_size // 2
-                    draw_y = self.origin_y + r * self.cell_size - sprite_size // 2
-                    self._draw_compare_value(device, draw_x, draw_y, sprite_size)
+        if device.device_type == DeviceType.COMPARE_DEVICE:
+            left = getattr(device, 'compare_left', '').strip()
+            return (
+                left,
+                getattr(device, 'compare_operator', '').strip(),
+                getattr(device, 'compare_right', '').strip(),
+                self._get_device_current_value(left),
+                bool(getattr(device, 'state', False)),
+            )
+        return (getattr(device, 'preset_value', 0), getattr(device, 'current_value', 0))
 
-    def _draw_compare_value(self, device: PLCDevice, draw_x: int, draw_y: int, sprite_size: int) -> None:
+    def _build_value_label(self, device: PLCDevice, value_key: tuple) -> tuple:
         """
-        比較デバイスの条件式表示
-        [D001(値) < 10] 形式で比較式と結果をデバイス下部に表示
-        
+        ラベルの表示文字列・位置・幅・色を生成する
+
         Args:
-            device: 比較デバイス
-            draw_x: スプライト描画X座標
-            draw_y: スプライト描画Y座標
-            sprite_size: スプライトサイズ
+            device: ラベル対象デバイス
+            value_key: _get_label_value_key() の戻り値
+
+        Returns:
+            tuple: (値タプル, 表示文字列 or None, x, y, 幅, 文字色, 背景色)
         """
-        if device.device_type != DeviceType.COMPARE_DEVICE:
-            return
-        
-        # 比較式の構成要素を取得
-        left = getattr(device, 'compare_left', '').strip()
-        operator = getattr(device, 'compare_operator', '').strip()
-        right = getattr(device, 'compare_right', '').strip()
-        
-        # 設定されていない場合は表示しない
-        if not (left and operator and right):
-            return
-        
-        # 左辺値の現在値を取得
-        left_value = self._get_device_current_value(left)
-        
-        # 条件式テキスト生成 [D001(15) < 10] 形式
-        condition_text = f"[{left}({left_value}){operator}{right}]"
-        
-        # 表示位置計算（スプライト下部中央）
-        value_x = draw_x - 2  # 少し左寄り（条件式が長いため）
-        value_y = draw_y + sprite_size + 1   # スプライト下部に間隔
-        
-        # 比較結果による色分け
-        result = getattr(device, 'state', False)
-        if result:
-            text_color = pyxel.COLOR_LIME   # TRUE: 緑
-            bg_color = pyxel.COLOR_DARK_BLUE
+        sprite_size = sprite_manager.sprite_size
+        row, col = device.position
+        draw_x = self.origin_x + col * self.cell_size - sprite_size // 2
+        draw_y = self.origin_y + row * self.cell_size - sprite_size // 2
+        value_y = draw_y + sprite_size + 1  # スプライト下部に少し間隔
+        text_color = pyxel.COLOR_LIME
+        bg_color = pyxel.COLOR_BLACK
+
+        if device.device_type in (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU):
+            # タイマー・カウンター: 現在値/プリセット値形式で表示（スプライト中央寄り）
+            preset_val, current_val = value_key
+            value_text = f"{current_val}/{preset_val}"
+            value_x = draw_x + sprite_size // 4
+
+        elif device.device_type == DeviceType.DATA_REGISTER:
+            # データレジスタ: preset/current 形式で表示
+            preset_val, current_val = value_key
+            value_text = f"{preset_val}/{current_val}"
+            value_x = draw_x + 1
+
         else:
-            text_color = pyxel.COLOR_RED    # FALSE: 赤
-            bg_color = pyxel.COLOR_BLACK
-        
-        # 背景付きで条件式表示
-        text_width = len(condition_text) * 4
-        pyxel.rect(value_x - 1, value_y - 1, text_width + 2, 7, bg_color)
-        pyxel.text(value_x, value_y, condition_text, text_color)
+            # 比較デバイス: [D001(15)<10] 形式、比較結果で色分け
+            left, operator, right, left_value, result = value_key
+            if not (left and operator and right):
+                # 設定されていない場合は表示しない
+                return (value_key, None, 0, 0, 0, 0, 0)
+            value_text = f"[{left}({left_value}){operator}{right}]"
+            value_x = draw_x - 2  # 少し左寄り（条件式が長いため）
+            if result:
+                text_color = pyxel.COLOR_LIME   # TRUE: 緑
+                bg_color = pyxel.COLOR_DARK_BLUE
+            else:
+                text_color = pyxel.COLOR_RED    # FALSE: 赤
+
+        return (value_key, value_text, value_x, value_y, len(value_text) * 4, text_color, bg_color)
 
     def _get_device_current_value(self, device_name: str) -> int:
         """
         デバイス名から現在値を取得する
-        データレジスタ・タイマー・カウンターに対応
-        
+        データレジスタ・タイマー・カウンターに対応（アドレス索引を参照）
+
         Args:
             device_name: デバイス名（例: "D0", "T001", "C005"）
-            
+
         Returns:
             int: デバイスの現在値、見つからない場合は0
         """
         if not device_name:
             return 0
-        
-        device_name = device_name.upper().strip()
-        
-        # グリッド上のすべてのデバイスから該当するものを検索
-        for row in range(self.rows):
-            for col in range(self.cols):
-                device = self.get_device(row, col)
-                if (device and 
-                    hasattr(device, 'address') and 
-                    device.address and 
-                    device.address.upper() == device_name):
-                    
-                    # デバイスタイプに応じて現在値を取得
-                    if device.device_type == DeviceType.DATA_REGISTER:
-                        return getattr(device, 'current_value', 0)
-                    elif device.device_type in [DeviceType.TIMER_TON, DeviceType.COUNTER_CTU]:
-                        return getattr(device, 'current_value', 0)
-        
-        # 見つからない場合は0を返す
-        return 0
+
+        self._refresh_label_index()
+        device = self._value_device_index.get(device_name.upper().strip())
+        if device is None:
+            return 0
+        return getattr(device, 'current_value', 0)
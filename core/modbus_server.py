@@ -0,0 +1,368 @@
+"""
+PyPlc Ver3 Modbus-TCP Server Module
+作成日: 2025-08-25
+目標: デバイスイメージをModbus-TCPで公開する（HMI・テストツール連携用、標準ライブラリのみ）
+
+アドレス割り付け（ModbusConfigで変更可能）:
+    コイル / ディスクリート入力 : X → COIL_BASES["X"] + 番号, Y → ..., M → ...
+    保持レジスタ               : D → 現在値, T/C → プリセット値
+    入力レジスタ               : D/T/C → 現在値
+    書き込み可能               : Xコイル（外部入力）、保持レジスタ（D現在値・T/Cプリセット値）
+"""
+
+import asyncio
+import re
+import struct
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import DeviceType, ModbusConfig
+from core.grid_system import GridSystem
+
+# ファンクションコード
+FC_READ_COILS = 0x01
+FC_READ_DISCRETE_INPUTS = 0x02
+FC_READ_HOLDING_REGISTERS = 0x03
+FC_READ_INPUT_REGISTERS = 0x04
+FC_WRITE_SINGLE_COIL = 0x05
+FC_WRITE_SINGLE_REGISTER = 0x06
+FC_WRITE_MULTIPLE_COILS = 0x0F
+FC_WRITE_MULTIPLE_REGISTERS = 0x10
+
+# 例外コード
+EXC_ILLEGAL_FUNCTION = 0x01
+EXC_ILLEGAL_DATA_ADDRESS = 0x02
+EXC_ILLEGAL_DATA_VALUE = 0x03
+
+# 1リクエストで扱える最大数（Modbus仕様）
+MAX_READ_BITS = 2000
+MAX_READ_REGISTERS = 125
+MAX_WRITE_BITS = 1968
+MAX_WRITE_REGISTERS = 123
+
+MBAP_HEADER = struct.Struct(">HHHB")  # transaction_id, protocol_id, length, unit_id
+
+_ADDRESS_PATTERN = re.compile(r"^([A-Z])(\d+)$")
+
+# 出力状態（コイル）を持つデバイス
+_OUTPUT_DEVICE_TYPES = (DeviceType.COIL_STD, DeviceType.COIL_REV)
+_CONTACT_DEVICE_TYPES = (DeviceType.CONTACT_A, DeviceType.CONTACT_B)
+_REGISTER_DEVICE_TYPES = (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU, DeviceType.DATA_REGISTER)
+
+
+def _split_address(address: str) -> Optional[Tuple[str, int]]:
+    """'X001' → ('X', 1)"""
+    match = _ADDRESS_PATTERN.match(address.upper())
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def _to_register(value) -> int:
+    """デバイス値を16bitレジスタ値に変換する（負値は2の補数）"""
+    return int(value) & 0xFFFF
+
+
+def _to_signed(value: int) -> int:
+    """16bitレジスタ値を符号付き整数に変換する"""
+    return value - 0x10000 if value & 0x8000 else value
+
+
+class DeviceImage:
+    """
+    1スキャン終了時点のデバイスイメージ（読み取り専用として共有する）
+    スキャン側で新しいインスタンスを作成して差し替えるため、ロックなしでクライアントから参照できる
+    """
+
+    __slots__ = ("bits", "holding", "inputs")
+
+    def __init__(self, bits: Dict[int, bool], holding: Dict[int, int], inputs: Dict[int, int]):
+        self.bits = bits
+        self.holding = holding
+        self.inputs = inputs
+
+    @classmethod
+    def capture(cls, grid_system: GridSystem) -> "DeviceImage":
+        """グリッドの現在状態からイメージを作成する"""
+        bits: Dict[int, bool] = {}
+        holding: Dict[int, int] = {}
+        inputs: Dict[int, int] = {}
+        coil_bases = ModbusConfig.COIL_BASES
+        register_bases = ModbusConfig.REGISTER_BASES
+
+        for row_devices in grid_system.grid_data:
+            for device in row_devices:
+                if device is None or not device.address:
+                    continue
+                parts = _split_address(device.address)
+                if parts is None:
+                    continue
+                prefix, number = parts
+                device_type = device.device_type
+
+                if prefix in coil_bases and (device_type in _OUTPUT_DEVICE_TYPES or device_type in _CONTACT_DEVICE_TYPES):
+                    index = coil_bases[prefix] + number
+                    # コイルの出力を優先（接点はコイルが無いアドレス: 主にXの状態）
+                    if device_type in _OUTPUT_DEVICE_TYPES or index not in bits:
+                        bits[index] = bool(device.state)
+                elif prefix in register_bases and device_type in _REGISTER_DEVICE_TYPES:
+                    index = register_bases[prefix] + number
+                    if index not in inputs:
+                        inputs[index] = _to_register(device.current_value or 0)
+                        if prefix == "D":
+                            holding[index] = inputs[index]
+                        else:
+                            holding[index] = _to_register(device.preset_value or 0)
+
+        return cls(bits, holding, inputs)
+
+
+class ModbusServer:
+    """
+    asyncioベースのModbus-TCPサーバー
+    - ネットワーク処理は専用スレッドのイベントループで行い、スキャンループをブロックしない
+    - 読み取りは直近スキャン終了時のイメージから応答する
+    - 書き込みはキューに積み、次スキャン開始時（apply_pending_writes）にまとめて反映する
+    """
+
+    def __init__(self, host: str = ModbusConfig.HOST, port: int = ModbusConfig.PORT):
+        """
+        Args:
+            host: 待ち受けアドレス（既定はlocalhostのみ）
+            port: 待ち受けポート（0の場合は空きポートを自動割り当て）
+        """
+        self.host = host
+        self.port = port
+        self.image = DeviceImage({}, {}, {})
+        self.client_count = 0
+        self._client_writers = set()
+
+        # (種別, インデックス, 値) 種別: "coil" / "register"
+        self._pending_writes: Deque[Tuple[str, int, int]] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._start_error: Optional[BaseException] = None
+
+    # --- ライフサイクル ---
+
+    def start(self) -> None:
+        """サーバースレッドを起動する（待ち受け開始まで待機）"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="PyPlcModbus", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            error, self._start_error = self._start_error, None
+            self._thread = None
+            raise error
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """サーバーを停止する"""
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._start_error = e
+            self._started.set()
+            loop.close()
+            return
+
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            # 待ち受けを止め、接続中クライアントを切断して処理の終了を待つ
+            self._server.close()
+            for writer in list(self._client_writers):
+                writer.close()
+            tasks = asyncio.all_tasks(loop)
+            if tasks:
+                loop.run_until_complete(asyncio.wait(tasks, timeout=1.0))
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    # --- スキャン境界での同期（スキャンスレッドから呼び出す） ---
+
+    def apply_pending_writes(self, grid_system: GridSystem) -> int:
+        """
+        クライアントからの書き込みをグリッドへ反映する（solve_ladder()の直前に呼び出す）
+
+        Returns:
+            int: 反映した書き込み数（該当デバイスが無い書き込みは数えない）
+        """
+        if not self._pending_writes:
+            return 0
+
+        # (プレフィックス, 番号) → デバイス一覧（書き込みごとにグリッドを走査しない）
+        # 読み出し側（DeviceImage.capture）と同じく番号を数値で扱い、X12 と X012 を同一視する
+        devices_by_address: Dict[Tuple[str, int], List] = {}
+        for row_devices in grid_system.grid_data:
+            for device in row_devices:
+                if device is not None and device.address:
+                    parts = _split_address(device.address)
+                    if parts is not None:
+                        devices_by_address.setdefault(parts, []).append(device)
+
+        applied = 0
+        while self._pending_writes:
+            kind, index, value = self._pending_writes.popleft()
+            address = self._resolve_address(kind, index)
+            if address is None:
+                continue
+            matched = False
+            for device in devices_by_address.get(address, ()):
+                if kind == "coil" and device.device_type in _CONTACT_DEVICE_TYPES:
+                    device.state = bool(value)
+                    matched = True
+                elif kind == "register" and device.device_type in _REGISTER_DEVICE_TYPES:
+                    if address[0] == "D":
+                        device.current_value = _to_signed(value)
+                    else:
+                        device.preset_value = value
+                    matched = True
+            if matched:
+                applied += 1
+        return applied
+
+    def publish(self, grid_system: GridSystem) -> None:
+        """スキャン終了時のデバイスイメージを公開する（solve_ladder()の直後に呼び出す）"""
+        self.image = DeviceImage.capture(grid_system)
+
+    @staticmethod
+    def _resolve_address(kind: str, index: int) -> Optional[Tuple[str, int]]:
+        """Modbusアドレスからデバイスアドレス (プレフィックス, 番号) を求める（範囲外はNone）"""
+        bases = ModbusConfig.COIL_BASES if kind == "coil" else ModbusConfig.REGISTER_BASES
+        best: Optional[Tuple[str, int]] = None
+        for prefix, base in bases.items():
+            if index >= base and (best is None or base > best[1]):
+                best = (prefix, base)
+        if best is None:
+            return None
+        prefix, base = best
+        return prefix, index - base
+
+    # --- プロトコル処理（イベントループスレッド） ---
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.client_count += 1
+        self._client_writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction_id, protocol_id, length, unit_id = MBAP_HEADER.unpack(header)
+                if length < 2 or length > 254:
+                    break  # 不正フレーム: 接続を切断
+                pdu = await reader.readexactly(length - 1)
+                if protocol_id != 0:
+                    continue
+                response = self.handle_pdu(pdu)
+                writer.write(MBAP_HEADER.pack(transaction_id, 0, len(response) + 1, unit_id) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.client_count -= 1
+            self._client_writers.discard(writer)
+            writer.close()
+
+    def handle_pdu(self, pdu: bytes) -> bytes:
+        """
+        リクエストPDUを処理し、応答PDUを返す
+
+        Args:
+            pdu: ファンクションコード + データ
+
+        Returns:
+            bytes: 応答PDU（エラー時は例外応答）
+        """
+        function = pdu[0]
+        try:
+            if function in (FC_READ_COILS, FC_READ_DISCRETE_INPUTS):
+                start, count = struct.unpack_from(">HH", pdu, 1)
+                if not 1 <= count <= MAX_READ_BITS:
+                    return self._exception(function, EXC_ILLEGAL_DATA_VALUE)
+                return bytes((function,)) + self._pack_bits(self.image.bits, start, count)
+
+            if function in (FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS):
+                start, count = struct.unpack_from(">HH", pdu, 1)
+                if not 1 <= count <= MAX_READ_REGISTERS:
+                    return self._exception(function, EXC_ILLEGAL_DATA_VALUE)
+                registers = self.image.holding if function == FC_READ_HOLDING_REGISTERS else self.image.inputs
+                values = [registers.get(start + i, 0) for i in range(count)]
+                return struct.pack(f">BB{count}H", function, count * 2, *values)
+
+            if function == FC_WRITE_SINGLE_COIL:
+                index, value = struct.unpack_from(">HH", pdu, 1)
+                if value not in (0x0000, 0xFF00):
+                    return self._exception(function, EXC_ILLEGAL_DATA_VALUE)
+                if not self._is_writable_coil(index):
+                    return self._exception(function, EXC_ILLEGAL_DATA_ADDRESS)
+                self._pending_writes.append(("coil", index, 1 if value else 0))
+                return pdu[:5]
+
+            if function == FC_WRITE_SINGLE_REGISTER:
+                index, value = struct.unpack_from(">HH", pdu, 1)
+                if self._resolve_address("register", index) is None:
+                    return self._exception(function, EXC_ILLEGAL_DATA_ADDRESS)
+                self._pending_writes.append(("register", index, value))
+                return pdu[:5]
+
+            if function == FC_WRITE_MULTIPLE_COILS:
+                start, count, byte_count = struct.unpack_from(">HHB", pdu, 1)
+                if not 1 <= count <= MAX_WRITE_BITS or byte_count != (count + 7) // 8 or len(pdu) < 6 + byte_count:
+                    return self._exception(function, EXC_ILLEGAL_DATA_VALUE)
+                if not all(self._is_writable_coil(start + i) for i in range(count)):
+                    return self._exception(function, EXC_ILLEGAL_DATA_ADDRESS)
+                data = pdu[6:6 + byte_count]
+                for i in range(count):
+                    self._pending_writes.append(("coil", start + i, (data[i // 8] >> (i % 8)) & 1))
+                return struct.pack(">BHH", function, start, count)
+
+            if function == FC_WRITE_MULTIPLE_REGISTERS:
+                start, count, byte_count = struct.unpack_from(">HHB", pdu, 1)
+                if not 1 <= count <= MAX_WRITE_REGISTERS or byte_count != count * 2 or len(pdu) < 6 + byte_count:
+                    return self._exception(function, EXC_ILLEGAL_DATA_VALUE)
+                if self._resolve_address("register", start) is None:
+                    return self._exception(function, EXC_ILLEGAL_DATA_ADDRESS)
+                values = struct.unpack_from(f">{count}H", pdu, 6)
+                for i, value in enumerate(values):
+                    self._pending_writes.append(("register", start + i, value))
+                return struct.pack(">BHH", function, start, count)
+
+        except struct.error:
+            return self._exception(function, EXC_ILLEGAL_DATA_VALUE)
+
+        return self._exception(function, EXC_ILLEGAL_FUNCTION)
+
+    def _is_writable_coil(self, index: int) -> bool:
+        """書き込み可能なコイル（外部入力X）か判定する"""
+        address = self._resolve_address("coil", index)
+        return address is not None and address[0] in ModbusConfig.WRITABLE_COIL_PREFIXES
+
+    @staticmethod
+    def _pack_bits(bits: Dict[int, bool], start: int, count: int) -> bytes:
+        """ビット列をModbusの応答形式（バイト数 + LSB先頭のビット詰め）に変換する"""
+        packed: List[int] = [0] * ((count + 7) // 8)
+        for i in range(count):
+            if bits.get(start + i):
+                packed[i // 8] |= 1 << (i % 8)
+        return bytes((len(packed),)) + bytes(packed)
+
+    @staticmethod
+    def _exception(function: int, code: int) -> bytes:
+        return bytes((function | 0x80, code))
@@ -0,0 +1,294 @@
+"""
+PyPlc Ver3 Plant Model Module
+作成日: 2025-08-27
+目標: スキャンループ内で呼び出すプラントモデル（設備シミュレーション）のプラグインAPI
+
+プラグインは PlantModel を継承し、step(dt, outputs) -> inputs を実装する
+    outputs: 直前スキャンの出力 {"Y001": True, "M010": False, "D005": 120, ...}
+    inputs : 次のスキャンへ与える入力 {"X010": True, "D020": 1450, ...}
+             X は外部入力接点の状態、D はデータレジスタ現在値（アナログ入力）として反映する
+"""
+
+import abc
+import importlib
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from config import DeviceType
+
+_CONTACT_DEVICE_TYPES = (DeviceType.CONTACT_A, DeviceType.CONTACT_B)
+_COIL_DEVICE_TYPES = (DeviceType.COIL_STD, DeviceType.COIL_REV)
+
+
+class PlantModel(abc.ABC):
+    """
+    プラントモデルの基底クラス
+    コンストラクタ引数（キーワード）で入出力アドレスや物理パラメータを設定する
+    step() を実装していないプラグインは生成時に TypeError となる
+    """
+
+    name = "plant"
+
+    def reset(self) -> None:
+        """内部状態を初期化する（実行開始時に呼び出される）"""
+
+    @abc.abstractmethod
+    def step(self, dt: float, outputs: Dict[str, object]) -> Dict[str, object]:
+        """
+        1スキャン分プラントを進める
+
+        Args:
+            dt: 経過時間（秒）
+            outputs: PLC出力（アドレス → bool / int）
+
+        Returns:
+            Dict[str, object]: PLC入力（アドレス → bool / int）
+        """
+
+
+class ConveyorModel(PlantModel):
+    """
+    コンベア: モーター出力ONでワークを搬送し、入口・出口センサーを返す
+    ワークは一定間隔で入口に投入され、出口を過ぎると取り出される
+    """
+
+    name = "conveyor"
+
+    def __init__(self, motor_output: str = "Y001", entry_sensor: str = "X010", exit_sensor: str = "X011",
+                 length: float = 2.0, speed: float = 0.5, feed_interval: float = 4.0, sensor_width: float = 0.1):
+        self.motor_output = motor_output
+        self.entry_sensor = entry_sensor
+        self.exit_sensor = exit_sensor
+        self.length = length
+        self.speed = speed
+        self.feed_interval = feed_interval
+        self.sensor_width = sensor_width
+        self.reset()
+
+    def reset(self) -> None:
+        self.positions: List[float] = []
+        self.feed_timer = 0.0
+        self.delivered = 0
+
+    def step(self, dt: float, outputs: Dict[str, object]) -> Dict[str, object]:
+        # 入口が空いていればワークを投入
+        self.feed_timer += dt
+        if self.feed_timer >= self.feed_interval and all(p > self.sensor_width for p in self.positions):
+            self.positions.append(0.0)
+            self.feed_timer = 0.0
+
+        if outputs.get(self.motor_output):
+            moved = [p + self.speed * dt for p in self.positions]
+            self.positions = [p for p in moved if p <= self.length]
+            self.delivered += len(moved) - len(self.positions)
+
+        exit_start = self.length - self.sensor_width
+        return {
+            self.entry_sensor: any(p < self.sensor_width for p in self.positions),
+            self.exit_sensor: any(p >= exit_start for p in self.positions),
+        }
+
+
+class TankModel(PlantModel):
+    """
+    タンク: 給水弁・排水弁の出力で液位が変化し、下限・上限スイッチと液位（D）を返す
+    """
+
+    name = "tank"
+
+    def __init__(self, fill_output: str = "Y002", drain_output: str = "Y003",
+                 low_switch: str = "X020", high_switch: str = "X021", level_register: str = "D010",
+                 capacity: float = 100.0, fill_rate: float = 10.0, drain_rate: float = 8.0,
+                 low_level: float = 20.0, high_level: float = 80.0, initial_level: float = 50.0):
+        self.fill_output = fill_output
+        self.drain_output = drain_output
+        self.low_switch = low_switch
+        self.high_switch = high_switch
+        self.level_register = level_register
+        self.capacity = capacity
+        self.fill_rate = fill_rate
+        self.drain_rate = drain_rate
+        self.low_level = low_level
+        self.high_level = high_level
+        self.initial_level = initial_level
+        self.reset()
+
+    def reset(self) -> None:
+        self.level = self.initial_level
+
+    def step(self, dt: float, outputs: Dict[str, object]) -> Dict[str, object]:
+        if outputs.get(self.fill_output):
+            self.level += self.fill_rate * dt
+        if outputs.get(self.drain_output):
+            self.level -= self.drain_rate * dt
+        self.level = max(0.0, min(self.capacity, self.level))
+        return {
+            self.low_switch: self.level <= self.low_level,
+            self.high_switch: self.level >= self.high_level,
+            self.level_register: int(round(self.level)),
+        }
+
+
+class MotorModel(PlantModel):
+    """
+    モーター: 運転出力で加減速し、運転中フィードバック（定格の一定割合以上）と回転数（D）を返す
+    """
+
+    name = "motor"
+
+    def __init__(self, run_output: str = "Y004", running_feedback: str = "X030", speed_register: str = "D020",
+                 rated_rpm: float = 1500.0, accel_time: float = 2.0, decel_time: float = 3.0,
+                 feedback_ratio: float = 0.9):
+        self.run_output = run_output
+        self.running_feedback = running_feedback
+        self.speed_register = speed_register
+        self.rated_rpm = rated_rpm
+        self.accel_time = accel_time
+        self.decel_time = decel_time
+        self.feedback_ratio = feedback_ratio
+        self.reset()
+
+    def reset(self) -> None:
+        self.rpm = 0.0
+
+    def step(self, dt: float, outputs: Dict[str, object]) -> Dict[str, object]:
+        if outputs.get(self.run_output):
+            self.rpm = min(self.rated_rpm, self.rpm + self.rated_rpm * dt / self.accel_time)
+        else:
+            self.rpm = max(0.0, self.rpm - self.rated_rpm * dt / self.decel_time)
+        return {
+            self.running_feedback: self.rpm >= self.rated_rpm * self.feedback_ratio,
+            self.speed_register: int(round(self.rpm)),
+        }
+
+
+# 組み込みプラントモデル（名前 → クラス）
+PLANT_MODELS: Dict[str, Type[PlantModel]] = {
+    ConveyorModel.name: ConveyorModel,
+    TankModel.name: TankModel,
+    MotorModel.name: MotorModel,
+}
+
+
+def create_plant_model(spec: str, params: Optional[dict] = None) -> PlantModel:
+    """
+    プラントモデルを生成する
+
+    Args:
+        spec: 組み込み名（conveyor / tank / motor）または "モジュール名:クラス名"
+        params: コンストラクタ引数
+
+    Raises:
+        ValueError: 不明なモデル指定の場合
+        TypeError: step() を実装していないモデルクラスの場合
+    """
+    if spec in PLANT_MODELS:
+        model_class = PLANT_MODELS[spec]
+    elif ":" in spec:
+        module_name, class_name = spec.split(":", 1)
+        try:
+            model_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            raise ValueError(f"Unknown plant model: {spec} ({e})")
+    else:
+        raise ValueError(f"Unknown plant model: {spec}")
+    return model_class(**(params or {}))
+
+
+class PlantModelHost:
+    """
+    プラントモデル群の呼び出しとI/O受け渡しを行うクラス
+    - 出力（Y/M/D）の収集、入力（X/D）の反映はアドレス対応表で行う（編集世代が変わった時のみ再構築）
+    - モデルごとの実行時間を計測し、スキャン統計として提供する
+    """
+
+    def __init__(self, models: Iterable[PlantModel]):
+        """
+        Args:
+            models: 呼び出し順のプラントモデル
+        """
+        self.models: List[PlantModel] = list(models)
+        # モデルごとの統計: [呼び出し回数, 合計時間, 最大時間]
+        self._timings: List[List[float]] = [[0, 0.0, 0.0] for _ in self.models]
+
+        self._map_generation = -1
+        self._output_devices: List[Tuple[str, object]] = []
+        self._input_devices: Dict[str, List[object]] = {}
+
+    def reset(self) -> None:
+        """全モデルと統計を初期化する"""
+        for model in self.models:
+            model.reset()
+        self._timings = [[0, 0.0, 0.0] for _ in self.models]
+
+    def step(self, grid_system, dt: float) -> None:
+        """
+        全モデルを1スキャン分進め、返された入力をグリッドへ反映する（solve_ladder()の直前に呼び出す）
+
+        Args:
+            grid_system: 対象のGridSystem
+            dt: 経過時間（秒）
+        """
+        self._refresh_maps(grid_system)
+        outputs: Dict[str, object] = {}
+        for address, device in self._output_devices:
+            if device.device_type == DeviceType.DATA_REGISTER:
+                outputs.setdefault(address, device.current_value)
+            else:
+                outputs[address] = outputs.get(address, False) or bool(device.state)
+
+        perf_counter = time.perf_counter
+        for model, timing in zip(self.models, self._timings):
+            start = perf_counter()
+            inputs = model.step(dt, outputs)
+            elapsed = perf_counter() - start
+            timing[0] += 1
+            timing[1] += elapsed
+            if elapsed > timing[2]:
+                timing[2] = elapsed
+            if inputs:
+                self._apply_inputs(inputs)
+
+    def _apply_inputs(self, inputs: Dict[str, object]) -> None:
+        for address, value in inputs.items():
+            for device in self._input_devices.get(address.upper(), ()):
+                if device.device_type == DeviceType.DATA_REGISTER:
+                    device.current_value = int(value)
+                else:
+                    device.state = bool(value)
+
+    def _refresh_maps(self, grid_system) -> None:
+        """出力デバイス（コイル・データレジスタ）と入力デバイス（X接点・データレジスタ）の対応表を作成する"""
+        if self._map_generation == grid_system.edit_generation:
+            return
+        self._output_devices = []
+        self._input_devices = {}
+        for row_devices in grid_system.grid_data:
+            for device in row_devices:
+                if device is None or not device.address:
+                    continue
+                address = device.address.upper()
+                if device.device_type in _COIL_DEVICE_TYPES or device.device_type == DeviceType.DATA_REGISTER:
+                    self._output_devices.append((address, device))
+                if ((device.device_type in _CONTACT_DEVICE_TYPES and address.startswith("X")) or
+                        device.device_type == DeviceType.DATA_REGISTER):
+                    self._input_devices.setdefault(address, []).append(device)
+        self._map_generation = grid_system.edit_generation
+
+    def statistics(self) -> List[dict]:
+        """
+        モデルごとの実行時間統計
+
+        Returns:
+            List[dict]: [{"model": 名前, "calls": 回数, "total_ms": 合計, "avg_ms": 平均, "max_ms": 最大}, ...]
+        """
+        stats = []
+        for model, (calls, total, maximum) in zip(self.models, self._timings):
+            stats.append({
+                "model": getattr(model, "name", type(model).__name__),
+                "calls": int(calls),
+                "total_ms": round(total * 1000, 3),
+                "avg_ms": round(total * 1000 / calls, 4) if calls else 0.0,
+                "max_ms": round(maximum * 1000, 4),
+            })
+        return stats
@@ -0,0 +1,432 @@
+"""
+PyPlc Ver3 PLC Runtime Module
+作成日: 2025-08-24
+目標: 画面表示なしで回路を読み込み・スキャン実行する（CLI一括実行・回帰テスト用）
+"""
+
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import DeviceType, PLCConfig
+from core.grid_system import GridSystem
+from core.circuit_analyzer import CircuitAnalyzer
+from core.circuit_binary_format import CircuitBinaryFormat
+from core.plant_model import PlantModelHost, create_plant_model
+from core.scan_scheduler import PlcTask, ScanScheduler, ScanWatchdog, WatchdogTimeoutError, clamp_scan_time
+from core.watch_manager import WatchManager
+
+# 外部入力として操作できる接点
+INPUT_DEVICE_TYPES = (DeviceType.CONTACT_A, DeviceType.CONTACT_B)
+# 現在値を持つデバイス
+VALUE_DEVICE_TYPES = (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU, DeviceType.DATA_REGISTER)
+
+# 入力スケジュールのサイドカーファイル（例: motor.csv → motor.schedule.json）
+SCHEDULE_SUFFIX = ".schedule.json"
+
+# 既定のスキャン周期（GUIと同じ PLCConfig.DEFAULT_SCAN_TIME_MS を設定範囲に収めた値）
+DEFAULT_SCAN_TIME_MS = clamp_scan_time(PLCConfig.DEFAULT_SCAN_TIME_MS)
+
+
+def scans_for_seconds(seconds: float, scan_time_ms: int = DEFAULT_SCAN_TIME_MS) -> int:
+    """シミュレーション秒数を必要スキャン数に換算する（1スキャン = scan_time_ms）"""
+    return max(0, math.ceil(seconds * 1000 / scan_time_ms))
+
+
+@dataclass
+class InputEvent:
+    """指定スキャンの実行前に適用する入力変更"""
+    scan: int
+    inputs: Dict[str, bool]
+
+
+@dataclass
+class InputSchedule:
+    """
+    スクリプト化された入力スケジュール
+    JSON形式:
+        {
+          "events": [
+            {"scan": 0, "set": {"X001": true}},
+            {"time_ms": 500, "set": {"X001": false}}
+          ],
+          "expect": {"Y001": true, "T001": 1000},
+          "plants": [{"model": "tank", "params": {"fill_output": "Y002"}}],
+          "tasks": [{"name": "FAST", "rows": [0, 3], "period_ms": 11, "priority": 0}]
+        }
+    expect の値は bool ならON/OFF状態、数値なら現在値と比較する
+    plants はスキャンごとに呼び出すプラントモデル（core.plant_model 参照）
+    tasks は行範囲（先頭行・最終行）を別周期で実行する定周期タスク（core.scan_scheduler 参照）
+    """
+    events: List[InputEvent] = field(default_factory=list)
+    expect: Dict[str, object] = field(default_factory=dict)
+    plants: List[dict] = field(default_factory=list)
+    tasks: List[dict] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict, scan_time_ms: int = DEFAULT_SCAN_TIME_MS) -> "InputSchedule":
+        """
+        辞書（JSON読み込み結果）からスケジュールを生成する
+
+        Args:
+            data: スケジュール辞書
+            scan_time_ms: time_ms 指定のイベントをスキャン番号に換算する際のスキャン周期
+        """
+        events = []
+        for entry in data.get("events", []):
+            if "scan" in entry:
+                scan = int(entry["scan"])
+            else:
+                scan = int(entry.get("time_ms", 0)) // scan_time_ms
+            inputs = {str(address).upper(): bool(value) for address, value in entry.get("set", {}).items()}
+            events.append(InputEvent(scan, inputs))
+        events.sort(key=lambda event: event.scan)
+        expect = {str(address).upper(): value for address, value in data.get("expect", {}).items()}
+        return cls(events, expect, list(data.get("plants", [])), list(data.get("tasks", [])))
+
+    @classmethod
+    def load(cls, filename: str, scan_time_ms: int = DEFAULT_SCAN_TIME_MS) -> "InputSchedule":
+        """JSONファイルからスケジュールを読み込む（scan_time_ms は from_dict() 参照）"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f), scan_time_ms)
+
+    @staticmethod
+    def sidecar_filename(circuit_filename: str) -> str:
+        """回路ファイルに対応するサイドカースケジュールのファイル名を返す"""
+        return os.path.splitext(circuit_filename)[0] + SCHEDULE_SUFFIX
+
+
+@dataclass
+class RunResult:
+    """1回路分の実行結果"""
+    filename: str
+    scans: int = 0
+    values: Dict[str, dict] = field(default_factory=dict)
+    trace: List[Tuple[int, str, bool, int]] = field(default_factory=list)
+    failures: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    statistics: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and not self.failures
+
+    def to_dict(self) -> dict:
+        """JSON出力用の辞書に変換する"""
+        return {
+            "filename": self.filename,
+            "scans": self.scans,
+            "passed": self.passed,
+            "error": self.error,
+            "failures": self.failures,
+            "statistics": self.statistics,
+            "values": self.values,
+            "trace": [{"scan": scan, "address": address, "state": state, "value": value}
+                      for scan, address, state, value in self.trace],
+        }
+
+
+class PLCRuntime:
+    """
+    表示を伴わないPLC実行環境
+    - GridSystem + CircuitAnalyzer をpyxel初期化なしで使用する
+    - 1スキャン = CircuitAnalyzer.solve_ladder() 1回（GUIの1フレームと同じ）
+    - 定周期タスク登録時は、1スキャン = メインタスク1回と、その周期内に実行時期が来た定周期タスク
+      （仮想時刻で実行するため、実行順と回数は実時間に依存しない）
+    - Modbusサーバー接続時は、書き込みをスキャン開始時に反映し、スキャン終了時にイメージを公開する
+    - 共有メモリI/Oイメージ接続時は、X入力をスキャン開始時に読み込み、Y/M/Dをスキャン終了時に書き込む
+      （スケジュールによる入力より共有メモリの値が優先される）
+    - プラントモデル登録時は、入力取り込み後・solve_ladder()前にモデルを1ステップ進める
+    - スキャン終了時に watch_manager が購読アドレスの変化分を通知する
+    - スキャンごとに実行時間を計測し、スキャン周期超過（オーバーラン）とWDT異常を検出する
+    """
+
+    def __init__(self, grid_system: Optional[GridSystem] = None, modbus_server=None, io_image=None,
+                 plant_host: Optional[PlantModelHost] = None, scan_time_ms: int = DEFAULT_SCAN_TIME_MS):
+        """
+        Args:
+            grid_system: 実行対象のGridSystem（未指定時は新規作成）
+            modbus_server: デバイスイメージを公開するModbusServer（任意）
+            io_image: プラントモデルと入出力を共有するSharedIOImage（任意）
+            plant_host: プロセス内で実行するプラントモデル群（任意）
+            scan_time_ms: メインスキャン周期（PLCConfig.MIN_SCAN_TIME_MS～MAX_SCAN_TIME_MS に制限）
+        """
+        self.grid_system = grid_system or GridSystem()
+        self.analyzer = CircuitAnalyzer(self.grid_system)
+        self.modbus_server = modbus_server
+        self.io_image = io_image
+        self.plant_host = plant_host
+        self.watch_manager = WatchManager(self.grid_system)
+        self.scan_count = 0
+        # タスク実行・スキャン時間統計・オーバーラン・WDT異常（GUIと同じ周期で計測する）
+        self.scheduler = ScanScheduler(self._run_task, clamp_scan_time(scan_time_ms), row_count=self.grid_system.rows)
+        self.analyzer.scan_time_ms = self.scheduler.scan_time_ms
+        self._virtual_time = 0.0  # スケジューラーに渡す仮想時刻（秒）
+
+    @property
+    def watchdog(self) -> ScanWatchdog:
+        """メインタスクのウォッチドッグ"""
+        return self.scheduler.watchdog
+
+    def add_task(self, name: str, first_row: int, last_row: int, period_ms: float, priority: int = 0) -> PlcTask:
+        """
+        行範囲を定周期タスクに割り当てる（ScanScheduler.add_task() 参照）
+
+        Raises:
+            ValueError: 名前の重複、行範囲が不正・他タスクと重複、周期が短すぎる場合
+        """
+        return self.scheduler.add_task(name, first_row, last_row, period_ms, priority)
+
+    def load(self, filename: str) -> None:
+        """
+        回路ファイル（.csv / .pyplc）を読み込む
+
+        Raises:
+            OSError: ファイルを開けない場合
+            ValueError: 形式が不正な場合
+        """
+        if CircuitBinaryFormat.is_binary_filename(filename):
+            CircuitBinaryFormat.load(self.grid_system, filename)
+        else:
+            with open(filename, 'r', encoding='utf-8', newline='') as csvfile:
+                if not self.grid_system.read_csv(csvfile):
+                    raise ValueError(f"Invalid circuit CSV: {filename}")
+        self.scan_count = 0
+        self.scheduler.reset()
+        self._virtual_time = 0.0
+
+    def set_input(self, address: str, state: bool) -> int:
+        """
+        外部入力（接点）の状態を設定する（GUIのRUNモード右クリック操作に相当）
+
+        Returns:
+            int: 状態を設定した接点数
+        """
+        address = address.upper()
+        updated = 0
+        for row_devices in self.grid_system.grid_data:
+            for device in row_devices:
+                if device and device.device_type in INPUT_DEVICE_TYPES and device.address.upper() == address:
+                    device.state = state
+                    updated += 1
+        return updated
+
+    def scan(self, count: int = 1) -> None:
+        """
+        指定回数スキャンを実行する
+
+        Raises:
+            TimeoutError: LOCKSTEP同期でプラントモデルが応答しない場合
+            WatchdogTimeoutError: スキャン実行時間がウォッチドッグ時間を超えた場合（以降のスキャンも同様）
+        """
+        io_image = self.io_image
+        scheduler = self.scheduler
+        period = scheduler.scan_time_ms / 1000
+        for _ in range(count):
+            if scheduler.tripped:
+                raise WatchdogTimeoutError("PLC stopped by watchdog")
+            # プラントの応答待ちはスキャン時間に含めない
+            if io_image is not None and not io_image.wait_for_plant():
+                raise TimeoutError(f"Plant model did not acknowledge scan {io_image.scan_count}")
+            scheduler.run_until(self._virtual_time)
+            self._virtual_time += period
+
+    def _run_task(self, task: PlcTask) -> None:
+        """タスク1回分の処理（入出力・プラントモデル・ウォッチ通知はメインタスクのスキャン境界で行う）"""
+        if task is not self.scheduler.main_task:
+            self.analyzer.solve_rows(task.rows, task.period_ms)
+            return
+
+        modbus_server = self.modbus_server
+        io_image = self.io_image
+        if io_image is not None:
+            io_image.read_inputs(self.grid_system)
+        if modbus_server is not None:
+            modbus_server.apply_pending_writes(self.grid_system)
+        if self.plant_host is not None:
+            self.plant_host.step(self.grid_system, task.period_ms / 1000)
+        self.analyzer.solve_rows(task.rows, task.period_ms)
+        if modbus_server is not None:
+            modbus_server.publish(self.grid_system)
+        if io_image is not None:
+            io_image.publish_outputs(self.grid_system)
+        self.scan_count += 1
+        self.watch_manager.end_of_scan()
+
+    def statistics(self) -> Dict[str, object]:
+        """
+        スキャン統計（スキャン時間・オーバーラン・WDT異常・プラントモデルごとの実行時間）
+
+        Returns:
+            Dict[str, object]: {"scans", "scan_avg_ms", "scan_max_ms", "overruns", "watchdog_tripped", ...,
+                                "tasks": [...], "plants": [...]}（項目は ScanScheduler.statistics() 参照）
+        """
+        stats = self.scheduler.statistics()
+        stats["scans"] = self.scan_count
+        if self.plant_host is not None:
+            stats["plants"] = self.plant_host.statistics()
+        return stats
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        アドレスごとの現在状態を取得する
+
+        Returns:
+            Dict[str, dict]: {アドレス: {"state": bool, "value": int}}（valueはT/C/Dのみ）
+        """
+        values: Dict[str, dict] = {}
+        for row_devices in self.grid_system.grid_data:
+            for device in row_devices:
+                if device is None or not device.address or device.address == "WIRE":
+                    continue
+                if device.device_type in (DeviceType.L_SIDE, DeviceType.R_SIDE):
+                    continue
+                entry = values.setdefault(device.address.upper(), {"state": False})
+                entry["state"] = entry["state"] or bool(device.state)
+                if device.device_type in VALUE_DEVICE_TYPES and "value" not in entry:
+                    entry["value"] = device.current_value
+        return dict(sorted(values.items()))
+
+    def run(self, scans: int, schedule: Optional[InputSchedule] = None,
+            trace_addresses: Optional[Iterable[str]] = None, realtime: bool = False) -> RunResult:
+        """
+        入力スケジュールに従って指定スキャン数を実行する
+
+        Args:
+            scans: 実行スキャン数
+            schedule: 入力スケジュール（未指定時は入力変更なし）
+            trace_addresses: 変化を記録するアドレス（"*"で全アドレス、未指定時は記録しない）
+            realtime: Trueの場合は1スキャンをスキャン周期の間隔で実行する（外部機器との接続用）
+
+        Returns:
+            RunResult: 最終値・トレース・期待値照合結果
+        """
+        schedule = schedule or InputSchedule()
+        result = RunResult(filename="")
+        if schedule.plants:
+            models = [create_plant_model(entry["model"], entry.get("params")) for entry in schedule.plants]
+            if self.plant_host is not None:
+                models = self.plant_host.models + models
+            self.plant_host = PlantModelHost(models)
+        if self.plant_host is not None:
+            self.plant_host.reset()
+        if schedule.tasks:
+            self.scheduler.clear_tasks()
+            for entry in schedule.tasks:
+                first_row, last_row = entry["rows"]
+                self.add_task(str(entry["name"]), int(first_row), int(last_row),
+                              entry["period_ms"], int(entry.get("priority", 0)))
+        # トレースはウォッチリスト購読で変化分のみ受け取る
+        trace_subscription = None
+        if trace_addresses:
+            trace_addresses = list(trace_addresses)
+            first_scan = self.scan_count
+
+            def record_trace(_scan: int, diff: Dict[str, Optional[Tuple[bool, int]]]) -> None:
+                scan_index = self.scan_count - 1 - first_scan
+                for address, value in diff.items():
+                    state, current = value if value is not None else (False, 0)
+                    result.trace.append((scan_index, address, state, current))
+
+            trace_subscription = self.watch_manager.subscribe(
+                None if "*" in trace_addresses else trace_addresses, record_trace)
+
+        event_index = 0
+        events = schedule.events
+        scan_count_at_start = self.scan_count
+        scan_interval = self.scheduler.scan_time_ms / 1000
+        next_scan_time = time.monotonic()
+        for scan in range(scans):
+            if realtime:
+                delay = next_scan_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_scan_time += scan_interval
+            while event_index < len(events) and events[event_index].scan <= scan:
+                for address, state in events[event_index].inputs.items():
+                    self.set_input(address, state)
+                event_index += 1
+            try:
+                self.scan()
+            except WatchdogTimeoutError as e:
+                result.error = f"{type(e).__name__}: {e}"
+                scans = self.scan_count - scan_count_at_start
+                break
+
+        if trace_subscription is not None:
+            self.watch_manager.unsubscribe(trace_subscription)
+        result.scans = scans
+        result.values = self.snapshot()
+        result.failures = self.check_expectations(schedule.expect, result.values)
+        result.statistics = self.statistics()
+        return result
+
+    @staticmethod
+    def check_expectations(expect: Dict[str, object], values: Dict[str, dict]) -> List[str]:
+        """期待値と最終値を照合し、不一致内容の一覧を返す"""
+        failures = []
+        for address, expected in expect.items():
+            entry = values.get(address)
+            if entry is None:
+                failures.append(f"{address}: device not found")
+            elif isinstance(expected, bool):
+                if entry["state"] != expected:
+                    failures.append(f"{address}: expected state {expected}, got {entry['state']}")
+            elif entry.get("value") != expected:
+                failures.append(f"{address}: expected value {expected}, got {entry.get('value')}")
+        return failures
+
+
+def run_circuit_file(filename: str, scans: int, schedule_filename: Optional[str] = None,
+                     trace_addresses: Optional[List[str]] = None, modbus_port: Optional[int] = None,
+                     shm_name: Optional[str] = None, sync_mode: str = "free",
+                     plant_specs: Optional[List[str]] = None,
+                     scan_time_ms: int = DEFAULT_SCAN_TIME_MS) -> RunResult:
+    """
+    回路ファイル1件を読み込んで実行する（プロセスプールのワーカーから呼び出す）
+    schedule_filename 未指定時はサイドカー（<回路名>.schedule.json）があれば使用する
+    modbus_port 指定時はModbus-TCPでデバイスイメージを公開し、実時間でスキャンする
+    shm_name 指定時は共有メモリI/Oイメージを作成してプラントモデルと連携する
+    （sync_mode: "free" は実時間スキャン、"lockstep" はプラントの応答ごとに1スキャン）
+    plant_specs 指定時は組み込み・外部プラントモデル（既定パラメータ）をプロセス内で実行する
+    scan_time_ms はスキャン周期（オーバーラン判定・タイマー加算・スケジュールの time_ms 換算に使用）
+
+    Returns:
+        RunResult: 実行結果（読み込み・実行エラーは error に格納）
+    """
+    result = RunResult(filename=filename)
+    try:
+        if schedule_filename is None:
+            sidecar = InputSchedule.sidecar_filename(filename)
+            schedule_filename = sidecar if os.path.exists(sidecar) else None
+        scan_time_ms = clamp_scan_time(scan_time_ms)
+        schedule = InputSchedule.load(schedule_filename, scan_time_ms) if schedule_filename else None
+
+        modbus_server = None
+        io_image = None
+        if modbus_port is not None:
+            from core.modbus_server import ModbusServer
+            modbus_server = ModbusServer(port=modbus_port)
+            modbus_server.start()
+        try:
+            if shm_name is not None:
+                from core.shared_io_image import SharedIOImage, SYNC_MODES
+                io_image = SharedIOImage.create(shm_name, SYNC_MODES[sync_mode])
+            plant_host = PlantModelHost([create_plant_model(spec) for spec in plant_specs]) if plant_specs else None
+            runtime = PLCRuntime(modbus_server=modbus_server, io_image=io_image, plant_host=plant_host,
+                                 scan_time_ms=scan_time_ms)
+            runtime.load(filename)
+            realtime = modbus_server is not None or (io_image is not None and sync_mode == "free")
+            result = runtime.run(scans, schedule, trace_addresses, realtime=realtime)
+            result.filename = filename
+        finally:
+            if io_image is not None:
+                io_image.close()
+            if modbus_server is not None:
+                modbus_server.stop()
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
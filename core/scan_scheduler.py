@@ -0,0 +1,329 @@
+"""
+PyPlc Ver3 Scan Scheduler Module
+作成日: 2025-09-01
+目標: 設定したスキャン周期で solve_ladder() を実行し、スキャン時間の計測・オーバーラン検出・
+      ウォッチドッグタイマー（WDT）異常を実機PLCと同様に扱う
+      行範囲（ラング）を別周期・優先度の定周期タスクに割り当て、1つの時計でメインスキャンと共に実行する
+
+- オーバーラン: 1スキャンの実行時間がスキャン周期を超えた（次の周期に食い込んだ）
+- WDT異常: 1スキャンの実行時間が PLCConfig.WATCHDOG_TIME_MS を超えた。
+  異常状態になるとリセットされるまでスキャンを実行しない（実機のWDTエラー停止に相当）
+- 定周期タスク: 割り当てた行のみを自分の周期で解析する（タイマーもタスク周期分ずつ進む）。
+  メインタスクは割り当てのない残りの行を担当し、入出力の反映はメインタスクのスキャン境界で行う
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import PLCConfig, TaskConfig
+
+
+class WatchdogTimeoutError(RuntimeError):
+    """スキャン実行時間がウォッチドッグ時間を超えた"""
+
+
+def _to_us(seconds: float) -> int:
+    """時刻（秒）→ 整数マイクロ秒（周期の積算で誤差を溜めないため内部は整数で扱う）"""
+    return round(seconds * 1_000_000)
+
+
+def clamp_scan_time(scan_time_ms: int) -> int:
+    """スキャン周期を PLCConfig の設定範囲に収める"""
+    return max(PLCConfig.MIN_SCAN_TIME_MS, min(PLCConfig.MAX_SCAN_TIME_MS, int(scan_time_ms)))
+
+
+class ScanWatchdog:
+    """
+    スキャン実行時間の計測とオーバーラン・WDT異常の判定（タスクごとに1つ）
+    """
+
+    def __init__(self, scan_time_ms: float, watchdog_ms: float = PLCConfig.WATCHDOG_TIME_MS):
+        """
+        Args:
+            scan_time_ms: スキャン周期（オーバーラン判定の基準）
+            watchdog_ms: ウォッチドッグ時間（これを超えるスキャンでWDT異常）
+        """
+        self.scan_time_ms = scan_time_ms
+        self.watchdog_ms = watchdog_ms
+        self.reset()
+
+    def reset(self) -> None:
+        """計測値・異常状態をクリアする"""
+        self.scans = 0
+        self.overruns = 0
+        self.tripped = False
+        self.trip_scan_ms = 0.0  # WDT異常となったスキャンの実行時間
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self._total_ms = 0.0
+
+    def record(self, elapsed_seconds: float) -> bool:
+        """
+        1スキャン分の実行時間を記録する
+
+        Args:
+            elapsed_seconds: スキャン実行時間（秒）
+
+        Returns:
+            bool: このスキャンでWDT異常となった場合True
+        """
+        elapsed_ms = elapsed_seconds * 1000
+        self.scans += 1
+        self.last_ms = elapsed_ms
+        self._total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        if elapsed_ms > self.scan_time_ms:
+            self.overruns += 1
+        if elapsed_ms > self.watchdog_ms and not self.tripped:
+            self.tripped = True
+            self.trip_scan_ms = elapsed_ms
+            return True
+        return False
+
+    @property
+    def avg_ms(self) -> float:
+        return self._total_ms / self.scans if self.scans else 0.0
+
+    def statistics(self) -> Dict[str, object]:
+        """
+        スキャン統計
+
+        Returns:
+            Dict[str, object]: {"scans", "scan_time_ms", "scan_avg_ms", "scan_max_ms", "scan_last_ms",
+                                "overruns", "watchdog_ms", "watchdog_tripped"}
+        """
+        return {
+            "scans": self.scans,
+            "scan_time_ms": self.scan_time_ms,
+            "scan_avg_ms": round(self.avg_ms, 4),
+            "scan_max_ms": round(self.max_ms, 4),
+            "scan_last_ms": round(self.last_ms, 4),
+            "overruns": self.overruns,
+            "watchdog_ms": self.watchdog_ms,
+            "watchdog_tripped": self.tripped,
+        }
+
+
+class PlcTask:
+    """
+    定周期タスク（割り当て行・周期・優先度）
+    優先度は小さいほど高く、同じ時刻に実行時期が来たタスクは優先度順に実行する
+    """
+
+    def __init__(self, name: str, rows: Optional[Tuple[int, ...]], period_ms: float, priority: int,
+                 watchdog_ms: float = PLCConfig.WATCHDOG_TIME_MS):
+        """
+        Args:
+            name: タスク名
+            rows: 割り当て行（Noneで全行。タスクが無い場合のメインタスク）
+            period_ms: 実行周期（タイマー加算値を兼ねる）
+            priority: 優先度（0が最高）
+            watchdog_ms: ウォッチドッグ時間
+        """
+        self.name = name
+        self.rows = rows
+        self.priority = priority
+        self.watchdog = ScanWatchdog(period_ms, watchdog_ms)
+        self.skipped_periods = 0  # 処理落ちで実行できなかった周期の数
+        self.next_due_us: Optional[int] = None
+
+    @property
+    def period_ms(self) -> float:
+        return self.watchdog.scan_time_ms
+
+    def statistics(self) -> Dict[str, object]:
+        """タスクの統計（ScanWatchdog.statistics() + "name", "rows": [先頭行, 最終行], "priority", "skipped_periods"）"""
+        stats: Dict[str, object] = {"name": self.name,
+                                    "rows": [self.rows[0], self.rows[-1]] if self.rows else None,
+                                    "priority": self.priority}
+        stats.update(self.watchdog.statistics())
+        stats["skipped_periods"] = self.skipped_periods
+        return stats
+
+
+class ScanScheduler:
+    """
+    固定周期のスキャン実行（メインタスク + 定周期タスク）
+    GUIは毎フレーム tick() を呼び出し、周期が到来した分だけスキャンを実行する
+    （フレームレートとスキャン周期は独立。タイマーはスキャン周期分ずつ進める）
+    実行時期が来たタスクは時刻順・同時刻は優先度順に実行するため、
+    メインより短い周期のタスクはメインスキャン1回の間に複数回実行される
+    """
+
+    MAIN_TASK_NAME = "MAIN"
+
+    def __init__(self, scan_fn: Callable[[PlcTask], None], scan_time_ms: float = PLCConfig.DEFAULT_SCAN_TIME_MS,
+                 watchdog_ms: float = PLCConfig.WATCHDOG_TIME_MS, clock: Callable[[], float] = time.perf_counter,
+                 row_count: Optional[int] = None):
+        """
+        Args:
+            scan_fn: 1タスク1回分の処理 scan_fn(task)（task.rows を task.period_ms で解析する。
+                     メインタスクでは入力反映・出力公開も行う）
+            scan_time_ms: メインタスクのスキャン周期（set_scan_time() は設定範囲に制限する）
+            watchdog_ms: ウォッチドッグ時間（全タスク共通）
+            clock: 時刻取得関数（秒）
+            row_count: グリッドの行数（add_task() で行範囲を検証し、メインタスクの担当行を求める）
+        """
+        self._scan_fn = scan_fn
+        self._clock = clock
+        self._watchdog_ms = watchdog_ms
+        self._row_count = row_count
+        self.main_task = PlcTask(self.MAIN_TASK_NAME, None, scan_time_ms, TaskConfig.MAIN_TASK_PRIORITY, watchdog_ms)
+        self.tasks: List[PlcTask] = [self.main_task]
+
+    @property
+    def watchdog(self) -> ScanWatchdog:
+        """メインタスクのウォッチドッグ"""
+        return self.main_task.watchdog
+
+    @property
+    def scan_time_ms(self) -> float:
+        return self.main_task.period_ms
+
+    @property
+    def tripped(self) -> bool:
+        """いずれかのタスクがWDT異常"""
+        return any(task.watchdog.tripped for task in self.tasks)
+
+    @property
+    def total_overruns(self) -> int:
+        return sum(task.watchdog.overruns for task in self.tasks)
+
+    def set_scan_time(self, scan_time_ms: int) -> int:
+        """
+        メインタスクのスキャン周期を変更する
+
+        Returns:
+            int: 設定範囲に制限した後のスキャン周期
+        """
+        self.main_task.watchdog.scan_time_ms = clamp_scan_time(scan_time_ms)
+        return self.main_task.watchdog.scan_time_ms
+
+    def add_task(self, name: str, first_row: int, last_row: int, period_ms: float, priority: int = 0) -> PlcTask:
+        """
+        行範囲を定周期タスクに割り当てる
+
+        Args:
+            name: タスク名（重複不可）
+            first_row: 先頭行
+            last_row: 最終行（含む）
+            period_ms: 実行周期（TaskConfig.MIN_TASK_PERIOD_MS 以上）
+            priority: 優先度（0が最高。メインタスクは TaskConfig.MAIN_TASK_PRIORITY）
+
+        Returns:
+            PlcTask: 追加したタスク
+
+        Raises:
+            ValueError: 名前の重複、行範囲が不正・他タスクと重複、周期が短すぎる場合
+        """
+        if self._row_count is None:
+            raise ValueError("row_count is required to assign rows to tasks")
+        if any(task.name == name for task in self.tasks):
+            raise ValueError(f"Duplicate task name: {name}")
+        if not 0 <= first_row <= last_row < self._row_count:
+            raise ValueError(f"Invalid row range for task {name}: {first_row}-{last_row}")
+        if period_ms < TaskConfig.MIN_TASK_PERIOD_MS:
+            raise ValueError(f"Task period too short for task {name}: {period_ms} ms")
+        rows = tuple(range(first_row, last_row + 1))
+        for task in self.tasks[1:]:
+            if set(rows) & set(task.rows):
+                raise ValueError(f"Rows of task {name} overlap task {task.name}")
+
+        task = PlcTask(name, rows, period_ms, priority, self._watchdog_ms)
+        self.tasks.append(task)
+        self._update_main_rows()
+        return task
+
+    def clear_tasks(self) -> None:
+        """定周期タスクをすべて削除する（全行がメインタスクに戻る）"""
+        self.tasks = [self.main_task]
+        self._update_main_rows()
+
+    def _update_main_rows(self) -> None:
+        """メインタスクの担当行 = どのタスクにも割り当てられていない行"""
+        if len(self.tasks) == 1:
+            self.main_task.rows = None
+            return
+        assigned = {row for task in self.tasks[1:] for row in task.rows}
+        self.main_task.rows = tuple(row for row in range(self._row_count) if row not in assigned)
+
+    def restart(self) -> None:
+        """周期の基準時刻をクリアする（RUN開始時。次の tick() で直ちに全タスクを1回ずつ実行する）"""
+        for task in self.tasks:
+            task.next_due_us = None
+
+    def reset(self) -> None:
+        """統計・WDT異常をクリアし、周期を再開する"""
+        for task in self.tasks:
+            task.watchdog.reset()
+            task.skipped_periods = 0
+        self.restart()
+
+    def tick(self) -> int:
+        """
+        現在時刻までに実行時期が来たタスクを実行する
+
+        Returns:
+            int: 実行したタスクのスキャン数（全タスク合計）
+
+        Raises:
+            WatchdogTimeoutError: 実行したスキャンがウォッチドッグ時間を超えた場合
+        """
+        return self.run_until(self._clock())
+
+    def run_until(self, now: float) -> int:
+        """
+        指定時刻（秒）までに実行時期が来たタスクを時刻順・優先度順に実行する
+        （ヘッドレス実行では仮想時刻を渡して、実時間に関係なく同じ順序で実行する）
+        遅れはメイン周期の PLCConfig.MAX_CATCHUP_SCANS 回分まで連続実行で取り戻し、それ以上は読み捨てる
+
+        Returns:
+            int: 実行したタスクのスキャン数（全タスク合計）
+
+        Raises:
+            WatchdogTimeoutError: 実行したスキャンがウォッチドッグ時間を超えた場合
+        """
+        if self.tripped:
+            return 0
+        now_us = _to_us(now)
+        window_us = PLCConfig.MAX_CATCHUP_SCANS * round(self.main_task.period_ms * 1000)
+        for task in self.tasks:
+            if task.next_due_us is None:
+                task.next_due_us = now_us
+            lag_us = now_us - task.next_due_us
+            if lag_us >= window_us:
+                period_us = round(task.period_ms * 1000)
+                skipped = (lag_us - window_us) // period_us + 1
+                task.next_due_us += skipped * period_us
+                task.skipped_periods += skipped
+
+        executed = 0
+        while True:
+            task = min((task for task in self.tasks if task.next_due_us <= now_us),
+                       key=lambda task: (task.next_due_us, task.priority), default=None)
+            if task is None:
+                return executed
+            start = self._clock()
+            self._scan_fn(task)
+            task.next_due_us += round(task.period_ms * 1000)
+            executed += 1
+            watchdog = task.watchdog
+            if watchdog.record(self._clock() - start):
+                raise WatchdogTimeoutError(
+                    f"{task.name} scan took {watchdog.trip_scan_ms:.1f} ms (watchdog {watchdog.watchdog_ms} ms)")
+
+    @property
+    def skipped_periods(self) -> int:
+        return sum(task.skipped_periods for task in self.tasks)
+
+    def statistics(self) -> Dict[str, object]:
+        """
+        スキャン統計（メインタスクの ScanWatchdog.statistics() + "skipped_periods"、
+        定周期タスクがある場合は "tasks": [PlcTask.statistics()]）
+        """
+        stats = self.main_task.watchdog.statistics()
+        stats["skipped_periods"] = self.main_task.skipped_periods
+        if len(self.tasks) > 1:
+            stats["tasks"] = [task.statistics() for task in self.tasks[1:]]
+        return stats
@@ -0,0 +1,253 @@
+"""
+PyPlc Ver3 Shared I/O Image Module
+作成日: 2025-08-26
+目標: 入出力イメージ（X/Y/M/D）を共有メモリで公開し、外部プラントモデルと仮想立ち上げを行う
+
+共有メモリ構造（リトルエンディアン）:
+    ヘッダー : magic(4s) version(H) mode(H) x_count(I) y_count(I) m_count(I) d_count(I)
+               output_seq(Q) plant_seq(Q)
+    X領域    : x_count バイト（1デバイス1バイト、プラントが書き込む）
+    Y領域    : y_count バイト（ランタイムが書き込む）
+    M領域    : m_count バイト（ランタイムが書き込む）
+    D領域    : d_count × int32（ランタイムが書き込む）
+
+同期（スキャンカウンタによるハンドシェイク）:
+    output_seq : ランタイムが出力書き込み中は奇数、書き込み完了で偶数（スキャン番号 = output_seq // 2）
+    plant_seq  : プラントが入力を書き終えたスキャン番号
+    LOCKSTEP   : ランタイムは各スキャン前に plant_seq が直前のスキャン番号に追いつくまで待つ
+    FREE_RUN   : 互いに待たず、その時点の値を読み書きする（出力はseqlockで一貫性を確認）
+"""
+
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from config import DeviceType, DeviceAddressRanges, SharedMemoryConfig
+
+HEADER_STRUCT = struct.Struct("<4sHHIIIIQQ")
+OUTPUT_SEQ_OFFSET = 24
+PLANT_SEQ_OFFSET = 32
+SEQ_STRUCT = struct.Struct("<Q")
+FORMAT_MAGIC = b"PPIO"
+FORMAT_VERSION = 1
+INT32_MIN = -0x80000000
+INT32_MAX = 0x7FFFFFFF
+
+SYNC_FREE_RUN = 0
+SYNC_LOCKSTEP = 1
+SYNC_MODES = {"free": SYNC_FREE_RUN, "lockstep": SYNC_LOCKSTEP}
+
+_CONTACT_DEVICE_TYPES = (DeviceType.CONTACT_A, DeviceType.CONTACT_B)
+_COIL_DEVICE_TYPES = (DeviceType.COIL_STD, DeviceType.COIL_REV)
+
+
+class SharedIOImage:
+    """
+    共有メモリ上の入出力イメージ
+    - ランタイム側: create() で作成し、スキャンごとに read_inputs() / publish_outputs() を呼び出す
+    - プラント側  : attach() で接続し、wait_for_scan() → 出力参照 → 入力書き込み → acknowledge()
+    各領域はmemoryviewとして公開するため、コピーなしで参照・更新できる
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Args:
+            shm: 共有メモリブロック
+            owner: Trueの場合は作成者（close時にunlinkする）
+        """
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+
+        magic, version, mode, x_count, y_count, m_count, d_count, _, _ = HEADER_STRUCT.unpack_from(shm.buf, 0)
+        if magic != FORMAT_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Invalid shared I/O image: {shm.name}")
+        self.mode = mode
+
+        offset = HEADER_STRUCT.size
+        buf = shm.buf
+        self.x = buf[offset:offset + x_count]
+        offset += x_count
+        self.y = buf[offset:offset + y_count]
+        offset += y_count
+        self.m = buf[offset:offset + m_count]
+        offset += m_count
+        offset = (offset + 3) & ~3  # int32境界に揃える
+        self.d = buf[offset:offset + d_count * 4].cast("i")
+
+        # グリッドとの対応表（編集世代が変わった時のみ再構築）
+        self._map_generation = -1
+        self._input_map: List[Tuple[object, int]] = []
+        self._output_maps: Dict[str, List[Tuple[object, int]]] = {}
+
+    @staticmethod
+    def _layout_size(x_count: int, y_count: int, m_count: int, d_count: int) -> int:
+        size = HEADER_STRUCT.size + x_count + y_count + m_count
+        return ((size + 3) & ~3) + d_count * 4
+
+    @classmethod
+    def create(cls, name: Optional[str] = None, mode: int = SYNC_FREE_RUN) -> "SharedIOImage":
+        """
+        共有メモリブロックを作成する（ランタイム側）
+
+        Args:
+            name: 共有メモリ名（未指定時は自動生成）
+            mode: SYNC_FREE_RUN / SYNC_LOCKSTEP
+        """
+        counts = (DeviceAddressRanges.X_MAX + 1, DeviceAddressRanges.Y_MAX + 1,
+                  DeviceAddressRanges.M_MAX + 1, DeviceAddressRanges.D_MAX + 1)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls._layout_size(*counts))
+        shm.buf[:len(shm.buf)] = bytes(len(shm.buf))
+        HEADER_STRUCT.pack_into(shm.buf, 0, FORMAT_MAGIC, FORMAT_VERSION, mode, *counts, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedIOImage":
+        """既存の共有メモリブロックに接続する（プラント側）"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            # 接続側のresource_trackerが終了時にブロックを削除しないよう登録を外す（POSIX）
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except (ImportError, AttributeError):
+                pass
+        return cls(shm, owner=False)
+
+    def close(self) -> None:
+        """共有メモリを解放する（作成者の場合は削除も行う）"""
+        self.x.release()
+        self.y.release()
+        self.m.release()
+        self.d.release()
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    # --- ハンドシェイク ---
+
+    @property
+    def output_seq(self) -> int:
+        return SEQ_STRUCT.unpack_from(self._shm.buf, OUTPUT_SEQ_OFFSET)[0]
+
+    @property
+    def scan_count(self) -> int:
+        """出力を書き終えたスキャン数"""
+        return self.output_seq // 2
+
+    @property
+    def plant_seq(self) -> int:
+        return SEQ_STRUCT.unpack_from(self._shm.buf, PLANT_SEQ_OFFSET)[0]
+
+    def _wait(self, condition, timeout: Optional[float]) -> bool:
+        """条件が満たされるまで待機する（短いスリープを挟むポーリング）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        poll = SharedMemoryConfig.POLL_INTERVAL_SECONDS
+        while not condition():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    # --- ランタイム側 ---
+
+    def wait_for_plant(self, timeout: Optional[float] = SharedMemoryConfig.LOCKSTEP_TIMEOUT_SECONDS) -> bool:
+        """
+        LOCKSTEP時、プラントが直前スキャンの出力に対する入力を書き終えるまで待つ
+
+        Returns:
+            bool: 同期できた場合True（FREE_RUN時は常にTrue、タイムアウト時False）
+        """
+        if self.mode != SYNC_LOCKSTEP:
+            return True
+        scan = self.scan_count
+        return self._wait(lambda: self.plant_seq >= scan, timeout)
+
+    def read_inputs(self, grid_system) -> None:
+        """X領域の値を外部入力接点へ反映する（solve_ladder()の直前に呼び出す）"""
+        self._refresh_maps(grid_system)
+        x = self.x
+        for device, index in self._input_map:
+            device.state = bool(x[index])
+
+    def publish_outputs(self, grid_system) -> None:
+        """Y/M/Dをイメージへ書き込み、スキャンカウンタを進める（solve_ladder()の直後に呼び出す）"""
+        self._refresh_maps(grid_system)
+        buf = self._shm.buf
+        seq = self.output_seq
+        SEQ_STRUCT.pack_into(buf, OUTPUT_SEQ_OFFSET, seq + 1)  # 書き込み中（奇数）
+
+        y = self.y
+        for device, index in self._output_maps["Y"]:
+            y[index] = 1 if device.state else 0
+        m = self.m
+        for device, index in self._output_maps["M"]:
+            m[index] = 1 if device.state else 0
+        d = self.d
+        for device, index in self._output_maps["D"]:
+            d[index] = max(INT32_MIN, min(INT32_MAX, int(device.current_value or 0)))
+
+        SEQ_STRUCT.pack_into(buf, OUTPUT_SEQ_OFFSET, seq + 2)  # 書き込み完了（偶数）
+
+    def _refresh_maps(self, grid_system) -> None:
+        """グリッドのデバイスと共有メモリ上のインデックスの対応表を作成する"""
+        if self._map_generation == grid_system.edit_generation:
+            return
+        limits = {"X": len(self.x), "Y": len(self.y), "M": len(self.m), "D": len(self.d)}
+        self._input_map = []
+        self._output_maps = {"Y": [], "M": [], "D": []}
+        for row_devices in grid_system.grid_data:
+            for device in row_devices:
+                if device is None or len(device.address) < 2:
+                    continue
+                prefix, number = device.address[0].upper(), device.address[1:]
+                if prefix not in limits or not number.isdigit() or int(number) >= limits[prefix]:
+                    continue
+                index = int(number)
+                if prefix == "X" and device.device_type in _CONTACT_DEVICE_TYPES:
+                    self._input_map.append((device, index))
+                elif prefix in ("Y", "M") and device.device_type in _COIL_DEVICE_TYPES:
+                    self._output_maps[prefix].append((device, index))
+                elif prefix == "D" and device.device_type == DeviceType.DATA_REGISTER:
+                    self._output_maps["D"].append((device, index))
+        self._map_generation = grid_system.edit_generation
+
+    # --- プラント側 ---
+
+    def wait_for_scan(self, last_scan: int, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        last_scan より新しいスキャンの出力が公開されるまで待つ
+
+        Returns:
+            Optional[int]: 公開済みスキャン番号（タイムアウト時None）
+        """
+        if not self._wait(lambda: self.output_seq % 2 == 0 and self.scan_count > last_scan, timeout):
+            return None
+        return self.scan_count
+
+    def read_outputs(self) -> Tuple[int, bytes, bytes, List[int]]:
+        """
+        Y/M/Dの一貫したコピーを取得する（書き込み中・途中更新の場合は再取得）
+
+        Returns:
+            Tuple[int, bytes, bytes, List[int]]: (スキャン番号, Y, M, D)
+        """
+        while True:
+            seq = self.output_seq
+            if seq % 2:
+                time.sleep(SharedMemoryConfig.POLL_INTERVAL_SECONDS)
+                continue
+            y, m, d = bytes(self.y), bytes(self.m), self.d.tolist()
+            if self.output_seq == seq:
+                return seq // 2, y, m, d
+
+    def set_input(self, number: int, state: bool) -> None:
+        """X領域に入力値を書き込む"""
+        self.x[number] = 1 if state else 0
+
+    def acknowledge(self, scan: int) -> None:
+        """指定スキャンに対する入力の書き込み完了を通知する（LOCKSTEP時にランタイムが再開する）"""
+        SEQ_STRUCT.pack_into(self._shm.buf, PLANT_SEQ_OFFSET, scan)
@@ -0,0 +1,208 @@
+"""
+PyPlc Ver3 Sprite Atlas Module
+作成日: 2025-09-01
+目標: イメージバンクを8x8セル単位で自動走査し、空でないセルと重複タイルを検出して
+      索引付きアトラス表（sprites.atlas.json）を作成する
+
+走査はピクセル単位のPythonループを使わず、バイト列の比較で行う
+- まずセル1段分（8行）の帯全体を空の帯と比較し、空なら段ごと読み飛ばす
+- 帯の各行をセル幅のスライスに分け、セルごとに8行を連結したバイト列を空タイルと比較する
+- 空でないタイルはピクセルデータのハッシュで重複を判定する
+
+アトラス表の形式
+    tiles: 重複を除いたタイルの (u, v) 座標（最初に出現したセル、走査順）
+    cells: セル番号（行優先）→ タイル番号の配列（空セルは -1）
+    duplicates: 同じ画像を持つセル座標のグループ
+    bank_digest: 走査したイメージバンク全体のハッシュ（実行時にバンクと一致するか検証する）
+"""
+
+import hashlib
+import json
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from core.atomic_file import atomic_write
+
+ATLAS_VERSION = 1
+ATLAS_SUFFIX = ".atlas.json"
+EMPTY_TILE = -1
+
+
+def bank_digest(data: bytes) -> str:
+    """イメージバンク全体のハッシュ（アトラス表とバンクの対応確認用）"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def read_image_bank(image) -> bytes:
+    """
+    pyxelのImageからピクセルデータ（1ピクセル1バイト、行優先）を一括で取り出す
+
+    Args:
+        image: pyxel.images[n]
+    """
+    return bytes(image.data_ptr())
+
+
+class SpriteAtlas:
+    """
+    イメージバンクのアトラス表
+    cells は array('h') のため、tile_index_at() はセル番号の計算と配列参照のみで済む
+    """
+
+    def __init__(self, width: int, height: int, sprite_size: int,
+                 tiles: List[Tuple[int, int]], cells: array,
+                 duplicates: List[List[Tuple[int, int]]], digest: str = ""):
+        self.width = width
+        self.height = height
+        self.sprite_size = sprite_size
+        self.columns = width // sprite_size
+        self.tiles = tiles
+        self.cells = cells
+        self.duplicates = duplicates
+        self.bank_digest = digest
+
+    @property
+    def non_empty_count(self) -> int:
+        """空でないセルの数（重複を含む）"""
+        return sum(1 for tile in self.cells if tile != EMPTY_TILE)
+
+    def non_empty_cells(self):
+        """空でないセルの (x, y) 座標を走査順に返す"""
+        for cell, tile in enumerate(self.cells):
+            if tile != EMPTY_TILE:
+                yield (cell % self.columns) * self.sprite_size, (cell // self.columns) * self.sprite_size
+
+    def tile_index_at(self, x: int, y: int) -> int:
+        """
+        画素座標 (x, y) を含むセルのタイル番号を返す
+
+        Returns:
+            int: タイル番号（空セル・範囲外は EMPTY_TILE）
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return EMPTY_TILE
+        return self.cells[(y // self.sprite_size) * self.columns + x // self.sprite_size]
+
+    def tile_coords(self, tile_index: int) -> Optional[Tuple[int, int]]:
+        """タイル番号 → 代表セルの (u, v) 座標"""
+        if 0 <= tile_index < len(self.tiles):
+            return self.tiles[tile_index]
+        return None
+
+    def to_dict(self, resource_file: str = "", image_bank: int = 0) -> dict:
+        return {
+            "version": ATLAS_VERSION,
+            "resource_file": resource_file,
+            "image_bank": image_bank,
+            "width": self.width,
+            "height": self.height,
+            "sprite_size": self.sprite_size,
+            "bank_digest": self.bank_digest,
+            "tiles": [list(coords) for coords in self.tiles],
+            "cells": list(self.cells),
+            "duplicates": [[list(coords) for coords in group] for group in self.duplicates],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpriteAtlas":
+        """
+        to_dict() の形式から復元する
+
+        Raises:
+            ValueError: バージョン不一致・表の大きさが不正な場合
+        """
+        if data.get("version") != ATLAS_VERSION:
+            raise ValueError("Unsupported atlas version")
+        width, height, sprite_size = data["width"], data["height"], data["sprite_size"]
+        cells = array('h', data["cells"])
+        if len(cells) != (width // sprite_size) * (height // sprite_size):
+            raise ValueError("Atlas cell table size mismatch")
+        tiles = [tuple(coords) for coords in data["tiles"]]
+        duplicates = [[tuple(coords) for coords in group] for group in data.get("duplicates", [])]
+        return cls(width, height, sprite_size, tiles, cells, duplicates, data.get("bank_digest", ""))
+
+
+def scan_image_bank(data: bytes, width: int, height: int,
+                    sprite_size: int = 8, empty_color: int = 0) -> SpriteAtlas:
+    """
+    イメージバンクのピクセルデータからアトラス表を作成する
+
+    Args:
+        data: ピクセルデータ（1ピクセル1バイト、行優先、width*height バイト）
+        width: バンクの幅
+        height: バンクの高さ
+        sprite_size: セルの大きさ
+        empty_color: 空とみなす色（描画時の透過色。PyPlcでは COLOR_BLACK=0）
+
+    Returns:
+        SpriteAtlas: 作成したアトラス表
+    """
+    if len(data) < width * height:
+        raise ValueError("Image bank data is smaller than width*height")
+
+    columns = width // sprite_size
+    rows = height // sprite_size
+    band_size = width * sprite_size
+    empty_band = bytes([empty_color]) * band_size
+    empty_row = bytes([empty_color]) * width
+    empty_tile = bytes([empty_color]) * (sprite_size * sprite_size)
+
+    cells = array('h', [EMPTY_TILE]) * (columns * rows)
+    tiles: List[Tuple[int, int]] = []
+    tile_by_hash: Dict[bytes, int] = {}
+    cells_by_tile: List[List[Tuple[int, int]]] = []
+
+    for cell_y in range(rows):
+        band_start = cell_y * band_size
+        band = data[band_start:band_start + band_size]
+        if band == empty_band:
+            continue  # 1段分すべて空
+
+        # 帯の各行をセル幅に分割（空の行は分割せず共有）
+        row_chunks = []
+        for line in range(sprite_size):
+            row = band[line * width:(line + 1) * width]
+            if row == empty_row:
+                row_chunks.append(None)
+            else:
+                row_chunks.append([row[i:i + sprite_size] for i in range(0, columns * sprite_size, sprite_size)])
+        empty_chunk = bytes([empty_color]) * sprite_size
+
+        for cell_x in range(columns):
+            tile = b"".join(empty_chunk if chunks is None else chunks[cell_x] for chunks in row_chunks)
+            if tile == empty_tile:
+                continue
+            coords = (cell_x * sprite_size, cell_y * sprite_size)
+            digest = hashlib.blake2b(tile, digest_size=8).digest()
+            tile_index = tile_by_hash.get(digest)
+            if tile_index is None:
+                tile_index = len(tiles)
+                tile_by_hash[digest] = tile_index
+                tiles.append(coords)
+                cells_by_tile.append([])
+            cells_by_tile[tile_index].append(coords)
+            cells[cell_y * columns + cell_x] = tile_index
+
+    duplicates = [group for group in cells_by_tile if len(group) > 1]
+    return SpriteAtlas(width, height, sprite_size, tiles, cells, duplicates, bank_digest(bytes(data[:width * height])))
+
+
+def atlas_path_for(sprite_json_path: str) -> str:
+    """sprites.json → sprites.atlas.json"""
+    base = sprite_json_path[:-5] if sprite_json_path.endswith(".json") else sprite_json_path
+    return base + ATLAS_SUFFIX
+
+
+def save_atlas(path: str, atlas: SpriteAtlas, resource_file: str = "", image_bank: int = 0) -> None:
+    """アトラス表をJSONで書き出す（cellsは1行に収めて小さく保つ）"""
+    data = atlas.to_dict(resource_file, image_bank)
+    atomic_write(path, lambda f: json.dump(data, f, separators=(",", ":")))
+
+
+def load_atlas(path: str) -> Optional[SpriteAtlas]:
+    """アトラス表を読み込む（存在しない・壊れている場合None）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return SpriteAtlas.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
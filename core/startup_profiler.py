@@ -0,0 +1,178 @@
+"""
+PyPlc Ver3 Startup Profiler Module
+作成日: 2025-08-31
+目標: 起動時間の内訳（モジュールのimport時間・初期化フェーズ時間）をサブシステム単位で集計して報告する
+
+使い方: python main.py --startup-profile
+    最初のフレーム開始時に、以下を標準出力へ報告する
+    - サブシステム別のimport時間（自己時間の合計、-X importtime の self 列に相当）と上位モジュール
+    - 初期化フェーズ別の時間（pyxel.init、グリッド生成など）
+    - 起動から最初のフレームまでの時間と目標値（StartupProfileConfig.TARGET_MS）との比較
+
+このモジュールは計測対象を歪めないよう標準ライブラリのみに依存する
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# サブシステム名の対応（モジュール名の先頭一致、上から順に判定）
+SUBSYSTEM_PREFIXES = (
+    ("pyDialogManager", "dialogs"),
+    ("core.", None),  # core配下はモジュール名をそのままサブシステム名にする
+    ("pyxel", "pyxel"),
+    ("config", "config"),
+)
+
+
+def subsystem_of(module_name: str) -> str:
+    """モジュール名からサブシステム名を求める（標準ライブラリ・外部パッケージは "stdlib/外部"）"""
+    for prefix, subsystem in SUBSYSTEM_PREFIXES:
+        if module_name == prefix or module_name.startswith(prefix):
+            return subsystem or module_name.split(".")[1]
+    top_level = module_name.split(".")[0]
+    if top_level in getattr(sys, "stdlib_module_names", ()):
+        return "stdlib"
+    return top_level
+
+
+class _TimingLoader:
+    """ローダーの exec_module() を計測するラッパー"""
+
+    def __init__(self, profiler: "StartupProfiler", loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        create_module = getattr(self._loader, "create_module", None)
+        return create_module(spec) if create_module else None
+
+    def exec_module(self, module):
+        self._profiler._begin_import()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._end_import(module.__name__)
+
+
+class _TimingFinder:
+    """sys.meta_path の先頭に挿入し、後続のファインダーが返すローダーを計測用に包む"""
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(self._profiler, spec.loader)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """
+    起動時間プロファイラー
+    enable() するまでは何も計測せず、phase() も素通りする
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.target_ms: Optional[float] = None
+        self._start = 0.0
+        self._finder: Optional[_TimingFinder] = None
+        # import計測: ネストしたimportの時間を差し引いて自己時間を求めるためのスタック
+        self._import_stack: List[List[float]] = []  # [開始時刻, 子の合計時間]
+        self._import_self_ms: Dict[str, float] = {}
+        self._phases: List[Tuple[str, float]] = []
+        self._reported = False
+
+    def enable(self) -> None:
+        """計測を開始する（計測したいimportより前に呼び出す）"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._start = time.perf_counter()
+        self._finder = _TimingFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def _begin_import(self) -> None:
+        self._import_stack.append([time.perf_counter(), 0.0])
+
+    def _end_import(self, module_name: str) -> None:
+        start, children = self._import_stack.pop()
+        elapsed = time.perf_counter() - start
+        self._import_self_ms[module_name] = (elapsed - children) * 1000
+        if self._import_stack:
+            self._import_stack[-1][1] += elapsed
+
+    @contextmanager
+    def phase(self, name: str):
+        """初期化フェーズの時間を計測する（無効時は何もしない）"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases.append((name, (time.perf_counter() - start) * 1000))
+
+    def first_frame(self, target_ms: Optional[float] = None) -> None:
+        """
+        最初のフレーム開始時に呼び出し、計測を終了して報告する
+
+        Args:
+            target_ms: 起動時間の目標値（ミリ秒、報告に合否を表示）
+        """
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        self.target_ms = target_ms
+        total_ms = (time.perf_counter() - self._start) * 1000
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        print(self.format_report(total_ms))
+
+    def format_report(self, total_ms: float, top_modules: int = 3) -> str:
+        """
+        報告文字列を作成する
+
+        Args:
+            total_ms: 起動から最初のフレームまでの時間（ミリ秒）
+            top_modules: サブシステムごとに表示する上位モジュール数
+        """
+        by_subsystem: Dict[str, List[Tuple[float, str]]] = {}
+        for module_name, self_ms in self._import_self_ms.items():
+            by_subsystem.setdefault(subsystem_of(module_name), []).append((self_ms, module_name))
+
+        lines = ["[Startup Profile] import time by subsystem (self time, ms)"]
+        import_total = 0.0
+        for subsystem, modules in sorted(by_subsystem.items(), key=lambda kv: -sum(ms for ms, _ in kv[1])):
+            subtotal = sum(ms for ms, _ in modules)
+            import_total += subtotal
+            top = ", ".join(f"{name} {ms:.1f}" for ms, name in sorted(modules, reverse=True)[:top_modules])
+            lines.append(f"  {subsystem:<20} {subtotal:8.1f}  ({len(modules)} modules: {top})")
+        lines.append(f"  {'total':<20} {import_total:8.1f}")
+
+        lines.append("[Startup Profile] initialization phases (ms)")
+        for name, elapsed_ms in self._phases:
+            lines.append(f"  {name:<20} {elapsed_ms:8.1f}")
+
+        summary = f"[Startup Profile] time to first frame: {total_ms:.1f} ms"
+        if self.target_ms is not None:
+            verdict = "OK" if total_ms <= self.target_ms else "OVER TARGET"
+            summary += f" (target {self.target_ms:.0f} ms: {verdict})"
+        lines.append(summary)
+        return "\n".join(lines)
+
+
+# --- グローバルインスタンス ---
+startup_profiler = StartupProfiler()
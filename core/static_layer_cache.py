@@ -0,0 +1,216 @@
+"""
+PyPlc Ver3 Static Layer Cache Module
+作成日: 2025-08-20
+目標: グリッド線・バスバー・デバイススプライトの静的レイヤーを空きイメージバンクにキャッシュし、
+      毎フレームの描画呼び出し数を削減する
+"""
+
+import pyxel
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+from config import GridConfig, GridConstraints, DeviceType
+from core.SpriteManager import sprite_manager
+
+if TYPE_CHECKING:
+    from core.grid_system import GridSystem
+
+
+class StaticLayerCache:
+    """
+    グリッド描画の静的レイヤーをpyxelの空きイメージバンクに保持するクラス。
+    - グリッド編集（edit_generation変化）時はレイヤー全体を再構築する。
+    - デバイスの表示状態が変化したセルのみ、バンク上で部分再描画する。
+    - 毎フレームの画面描画はタイルごとのblt 1回で完了する。
+    """
+
+    def __init__(self, grid: "GridSystem"):
+        """
+        StaticLayerCacheの初期化
+
+        Args:
+            grid: 描画対象のGridSystem
+        """
+        self.grid = grid
+        self.cell_size: int = grid.cell_size
+        half_cell = self.cell_size // 2
+
+        # キャッシュ領域（画面座標）: 各セルは交点を中心とした cell_size 四方
+        self.area_x: int = grid.origin_x - half_cell
+        self.area_y: int = grid.origin_y - half_cell
+        self.area_height: int = grid.rows * self.cell_size
+
+        # 1バンク(256px)に収まる列数ごとにタイル分割（セルがタイル境界を跨がないようにする）
+        cols_per_tile = GridConfig.STATIC_LAYER_BANK_SIZE // self.cell_size
+        self._tiles: List[Tuple[int, int, int]] = []  # (bank, col_start, col_end)
+        col = 0
+        for bank in GridConfig.STATIC_LAYER_BANKS:
+            if col >= grid.cols:
+                break
+            col_end = min(col + cols_per_tile, grid.cols)
+            self._tiles.append((bank, col, col_end))
+            col = col_end
+        # バンク不足時はキャッシュを使用せず直接描画する
+        self.enabled: bool = col >= grid.cols and self.area_height <= GridConfig.STATIC_LAYER_BANK_SIZE
+
+        self._built_generation: int = -1
+        self._baked_states: Dict[Tuple[int, int], bool] = {}  # (row, col) -> 焼き込み済み表示状態
+        self._device_count: int = 0
+        self._drawn_count: int = 0
+
+    def invalidate(self) -> None:
+        """次回描画時にレイヤー全体を再構築させる"""
+        self._built_generation = -1
+
+    def draw(self) -> None:
+        """
+        静的レイヤーを画面へ描画する
+        必要に応じて再構築・セル単位の部分更新を行ってからタイルを転送する
+        """
+        if not self.enabled:
+            self._draw_direct()
+            return
+
+        if self._built_generation != self.grid.edit_generation:
+            self._rebuild()
+        else:
+            self._refresh_dirty_cells()
+
+        # 背景はcls済みのため、黒を透過色として転送（パレット等の既存描画を消さない）
+        for bank, col_start, col_end in self._tiles:
+            tile_x = self.area_x + col_start * self.cell_size
+            width = (col_end - col_start) * self.cell_size
+            pyxel.blt(tile_x, self.area_y, bank, 0, 0, width, self.area_height, pyxel.COLOR_BLACK)
+
+        # 描画情報（開発用）
+        if self._device_count > 2:  # バスバー以外のデバイスがある場合のみ表示
+            pyxel.text(10, 360, f"Devices: {self._device_count}, Drawn: {self._drawn_count}", pyxel.COLOR_WHITE)
+
+    def _rebuild(self) -> None:
+        """全タイルをクリアし、グリッド線・バスバー・全デバイスを焼き込む"""
+        self._baked_states.clear()
+        self._device_count = 0
+        self._drawn_count = 0
+
+        for bank, col_start, col_end in self._tiles:
+            image = pyxel.images[bank]
+            image.cls(pyxel.COLOR_BLACK)
+            offset_x = self.area_x + col_start * self.cell_size
+            self._draw_grid_lines(image, offset_x, self.area_y, col_start, col_end)
+            for r in range(self.grid.rows):
+                for c in range(col_start, col_end):
+                    device = self.grid.grid_data[r][c]
+                    if device is None:
+                        continue
+                    self._device_count += 1
+                    if device.device_type in (DeviceType.L_SIDE, DeviceType.R_SIDE):
+                        self._draw_bus_bar(image, offset_x, self.area_y, device)
+                        continue
+                    display_state = self.grid._calculate_display_state(device)
+                    self._draw_sprite(image, offset_x, self.area_y, device, display_state)
+                    self._baked_states[(r, c)] = display_state
+                    self._drawn_count += 1
+
+        self._built_generation = self.grid.edit_generation
+
+    def _refresh_dirty_cells(self) -> None:
+        """焼き込み時から表示状態が変化したセルのみをバンク上で再描画する"""
+        grid_data = self.grid.grid_data
+        for (r, c), baked_state in self._baked_states.items():
+            device = grid_data[r][c]
+            display_state = self.grid._calculate_display_state(device)
+            if display_state == baked_state:
+                continue
+            bank, col_start = self._tile_for_col(c)
+            image = pyxel.images[bank]
+            offset_x = self.area_x + col_start * self.cell_size
+            self._redraw_cell(image, offset_x, self.area_y, r, c)
+            self._draw_sprite(image, offset_x, self.area_y, device, display_state)
+            self._baked_states[(r, c)] = display_state
+
+    def _tile_for_col(self, col: int) -> Tuple[int, int]:
+        """列番号から所属タイルの(bank, col_start)を返す"""
+        for bank, col_start, col_end in self._tiles:
+            if col_start <= col < col_end:
+                return bank, col_start
+        return self._tiles[-1][0], self._tiles[-1][1]
+
+    def _draw_grid_lines(self, image, offset_x: int, offset_y: int, col_start: int, col_end: int) -> None:
+        """タイル内のグリッド線を描画する（GridSystemの線配置と同一）"""
+        grid = self.grid
+        left_col = GridConstraints.get_left_bus_col()
+        right_col = GridConstraints.get_right_bus_col()
+
+        # 水平線（タイル範囲でクリップ）
+        line_col_start = max(left_col, col_start)
+        line_col_end = min(right_col, col_end - 1)
+        if line_col_start <= line_col_end:
+            x1 = grid.origin_x + line_col_start * self.cell_size - offset_x
+            x2 = grid.origin_x + line_col_end * self.cell_size - offset_x
+            if line_col_end < right_col:
+                # 次タイルへ続く線はタイル右端まで延長
+                x2 = (col_end - col_start) * self.cell_size - 1
+            if line_col_start > left_col:
+                x1 = 0
+            for r in range(grid.rows):
+                y = grid.origin_y + r * self.cell_size - offset_y
+                image.line(x1, y, x2, y, pyxel.COLOR_NAVY)
+
+        # 垂直線
+        y1 = grid.origin_y - offset_y
+        y2 = grid.origin_y + (grid.rows - 1) * self.cell_size - offset_y
+        for c in range(max(left_col + 1, col_start), min(right_col, col_end)):
+            x = grid.origin_x + c * self.cell_size - offset_x
+            image.line(x, y1, x, y2, pyxel.COLOR_NAVY)
+
+    def _redraw_cell(self, image, offset_x: int, offset_y: int, row: int, col: int) -> None:
+        """スプライト領域を消去し、その範囲のグリッド線を描き直す"""
+        grid = self.grid
+        sprite_size = sprite_manager.sprite_size
+        half = sprite_size // 2
+        cx = grid.origin_x + col * self.cell_size - offset_x
+        cy = grid.origin_y + row * self.cell_size - offset_y
+
+        image.rect(cx - half, cy - half, sprite_size, sprite_size, pyxel.COLOR_BLACK)
+        image.line(cx - half, cy, cx + half - 1, cy, pyxel.COLOR_NAVY)
+        if GridConstraints.get_left_bus_col() < col < GridConstraints.get_right_bus_col():
+            y1 = cy - half if row > 0 else cy
+            y2 = cy + half - 1 if row < grid.rows - 1 else cy
+            image.line(cx, y1, cx, y2, pyxel.COLOR_NAVY)
+
+    def _draw_bus_bar(self, image, offset_x: int, offset_y: int, device) -> None:
+        """バスバー1行分（セル高さ）を描画する"""
+        grid = self.grid
+        row, col = device.position
+        bar_x = grid.origin_x + col * self.cell_size - offset_x
+        bar_y = grid.origin_y + row * self.cell_size - self.cell_size // 2 - offset_y
+        color = pyxel.COLOR_YELLOW if device.device_type == DeviceType.L_SIDE else pyxel.COLOR_LIGHT_BLUE
+        image.rect(bar_x - 1, bar_y, 3, self.cell_size, color)
+
+    def _draw_sprite(self, image, offset_x: int, offset_y: int, device, display_state: bool) -> None:
+        """デバイススプライトをタイル上に描画する"""
+        grid = self.grid
+        sprite_size = sprite_manager.sprite_size
+        row, col = device.position
+        draw_x = grid.origin_x + col * self.cell_size - sprite_size // 2 - offset_x
+        draw_y = grid.origin_y + row * self.cell_size - sprite_size // 2 - offset_y
+
+        coords = sprite_manager.get_sprite_coords(device.device_type, display_state)
+        if coords:
+            image.blt(draw_x, draw_y, 0, coords[0], coords[1], sprite_size, sprite_size, pyxel.COLOR_BLACK)
+        else:
+            # スプライトが見つからない場合のフォールバック
+            image.rect(draw_x, draw_y, sprite_size, sprite_size, pyxel.COLOR_PINK)
+
+    def _draw_direct(self) -> None:
+        """キャッシュが使えない構成向けの直接描画（画面へ毎フレーム描画）"""
+        screen = pyxel.screen
+        self._draw_grid_lines(screen, 0, 0, 0, self.grid.cols)
+        for r in range(self.grid.rows):
+            for c in range(self.grid.cols):
+                device = self.grid.grid_data[r][c]
+                if device is None:
+                    continue
+                if device.device_type in (DeviceType.L_SIDE, DeviceType.R_SIDE):
+                    self._draw_bus_bar(screen, 0, 0, device)
+                else:
+                    self._draw_sprite(screen, 0, 0, device, self.grid._calculate_display_state(device))
@@ -0,0 +1,193 @@
+"""
+PyPlc Ver3 Watch Manager Module
+作成日: 2025-08-28
+目標: アドレス単位の購読（ウォッチリスト）で、スキャンごとの変化分のみを通知する
+
+値の形式: (state, value)
+    state : そのアドレスを持つデバイスのいずれかがONならTrue
+    value : タイマー・カウンター・データレジスタの現在値（該当デバイスがない場合は0）
+    デバイスが削除されたアドレスは None として通知する
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import DeviceType
+
+WatchValue = Optional[Tuple[bool, int]]
+WatchDiff = Dict[str, WatchValue]
+
+_VALUE_DEVICE_TYPES = (DeviceType.TIMER_TON, DeviceType.COUNTER_CTU, DeviceType.DATA_REGISTER)
+_IGNORED_DEVICE_TYPES = (DeviceType.L_SIDE, DeviceType.R_SIDE)
+
+
+class WatchSubscription:
+    """
+    ウォッチリストの購読
+    - callback指定時は end_of_scan() 内で差分を渡して呼び出す
+    - callback未指定時は差分を蓄積し、take() で取り出す（ポーリング型の利用者向け）
+    """
+
+    def __init__(self, addresses: Optional[Iterable[str]], callback: Optional[Callable[[int, WatchDiff], None]]):
+        """
+        Args:
+            addresses: 購読するアドレス（Noneの場合は全アドレス）
+            callback: callback(scan, diff)
+        """
+        self.addresses: Optional[Set[str]] = None if addresses is None else {a.upper() for a in addresses}
+        self.callback = callback
+        self.pending: WatchDiff = {}
+        self.needs_initial = True  # 購読開始直後は現在値を全て通知する
+
+    def take(self) -> WatchDiff:
+        """蓄積された差分を取り出してクリアする"""
+        pending, self.pending = self.pending, {}
+        return pending
+
+
+class WatchManager:
+    """
+    アドレス購読の管理と、スキャン終了時の差分計算を行うクラス
+    差分は全購読者の対象アドレスの和集合について1スキャン1回だけ計算し、各購読者へ振り分ける
+    """
+
+    def __init__(self, grid_system):
+        """
+        Args:
+            grid_system: 監視対象のGridSystem
+        """
+        self.grid_system = grid_system
+        self.scan_count = 0
+        self._subscriptions: List[WatchSubscription] = []
+        self._last_values: Dict[str, WatchValue] = {}
+
+        # アドレス → デバイス一覧（編集世代が変わった時のみ再構築）
+        self._index_generation = -1
+        self._devices_by_address: Dict[str, list] = {}
+        # スキャンごとに値を読むアドレス（購読・回路の変更時のみ再計算）
+        self._scan_addresses: List[str] = []
+        self._watched_dirty = True
+
+    def subscribe(self, addresses: Optional[Iterable[str]] = None,
+                  callback: Optional[Callable[[int, WatchDiff], None]] = None) -> WatchSubscription:
+        """
+        アドレスの購読を開始する
+
+        Args:
+            addresses: 購読するアドレス（Noneの場合は全アドレス）
+            callback: スキャンごとに callback(scan, diff) を呼び出す（差分がある場合のみ）
+
+        Returns:
+            WatchSubscription: 購読ハンドル（unsubscribe() / take() に使用）
+        """
+        subscription = WatchSubscription(addresses, callback)
+        self._subscriptions.append(subscription)
+        self._watched_dirty = True
+        return subscription
+
+    def unsubscribe(self, subscription: WatchSubscription) -> None:
+        """購読を終了する"""
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+            self._watched_dirty = True
+
+    def get_value(self, address: str) -> WatchValue:
+        """直近スキャン終了時点の値を返す（購読対象外のアドレスは現在のグリッドから求める）"""
+        address = address.upper()
+        if address in self._last_values:
+            return self._last_values[address]
+        self._refresh_index()
+        return self._read_value(address)
+
+    def end_of_scan(self) -> WatchDiff:
+        """
+        スキャン終了時に呼び出し、購読アドレスの変化分を計算して各購読者へ通知する
+
+        Returns:
+            WatchDiff: このスキャンで変化したアドレスと値（全購読対象の和集合）
+        """
+        self.scan_count += 1
+        if not self._subscriptions:
+            return {}
+
+        index_changed = self._refresh_index()
+        if self._watched_dirty or index_changed:
+            self._refresh_watched()
+
+        last_values = self._last_values
+        diff: WatchDiff = {}
+        for address in self._scan_addresses:
+            value = self._read_value(address)
+            if address not in last_values or last_values[address] != value:
+                if value is None and address not in last_values:
+                    continue
+                last_values[address] = value
+                diff[address] = value
+
+        for subscription in self._subscriptions:
+            if subscription.needs_initial:
+                subscription.needs_initial = False
+                delta = self._initial_values(subscription)
+            elif subscription.addresses is None:
+                delta = diff
+            else:
+                delta = {address: value for address, value in diff.items() if address in subscription.addresses}
+            if not delta:
+                continue
+            if subscription.callback is not None:
+                subscription.callback(self.scan_count, delta)
+            else:
+                subscription.pending.update(delta)
+        return diff
+
+    def _initial_values(self, subscription: WatchSubscription) -> WatchDiff:
+        """購読開始時に通知する現在値"""
+        if subscription.addresses is None:
+            return {address: value for address, value in self._last_values.items() if value is not None}
+        return {address: self._last_values[address] for address in sorted(subscription.addresses)
+                if self._last_values.get(address) is not None}
+
+    def _read_value(self, address: str) -> WatchValue:
+        devices = self._devices_by_address.get(address)
+        if not devices:
+            return None
+        state = False
+        value = None
+        for device in devices:
+            if device.state:
+                state = True
+            if value is None and device.device_type in _VALUE_DEVICE_TYPES:
+                value = device.current_value
+        return (state, value if value is not None else 0)
+
+    def _refresh_index(self) -> bool:
+        """アドレス索引を再構築する（編集世代が変わった場合のみ）。再構築した場合True"""
+        grid_system = self.grid_system
+        if self._index_generation == grid_system.edit_generation:
+            return False
+        index: Dict[str, list] = {}
+        for row_devices in grid_system.grid_data:
+            for device in row_devices:
+                if (device is None or device.device_type in _IGNORED_DEVICE_TYPES or
+                        not device.address or device.address == "WIRE"):
+                    continue
+                index.setdefault(device.address.upper(), []).append(device)
+        self._devices_by_address = index
+        self._index_generation = grid_system.edit_generation
+        return True
+
+    def _refresh_watched(self) -> None:
+        """全購読者の対象アドレスの和集合から、スキャンごとに値を読むアドレス一覧を作成する"""
+        watch_all = any(subscription.addresses is None for subscription in self._subscriptions)
+        if watch_all:
+            # 前回値のみ残っているアドレスは削除済みとしてNoneを通知するため対象に含める
+            self._last_values = {a: v for a, v in self._last_values.items()
+                                 if v is not None or a in self._devices_by_address}
+            watched = set(self._devices_by_address) | set(self._last_values)
+        else:
+            watched = set()
+            for subscription in self._subscriptions:
+                watched |= subscription.addresses
+            # 購読対象外になったアドレスの前回値は破棄
+            self._last_values = {a: v for a, v in self._last_values.items() if a in watched}
+        self._scan_addresses = sorted(watched)
+        self._watched_dirty = False
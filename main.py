@@ -13,6 +13,11 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# 起動時間計測（python main.py --startup-profile）: 以降のimportを計測するため最初に有効化する
+from core.startup_profiler import startup_profiler
+if "--startup-profile" in sys.argv:
+    startup_profiler.enable()
+
 
 #Todo
 
@@ -84,21 +89,19 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import os
 import pyxel
-from config import DisplayConfig, SystemInfo, UIConfig, UIBehaviorConfig, DeviceType, SimulatorMode, PLCRunState, TimerConfig, CounterConfig
+from config import DisplayConfig, SystemInfo, UIConfig, UIBehaviorConfig, DeviceType, SimulatorMode, PLCRunState, PLCConfig, TimerConfig, CounterConfig, ModbusConfig, StartupProfileConfig, TaskConfig
 from core.grid_system import GridSystem
 from core.input_handler import InputHandler, MouseState
 from core.circuit_analyzer import CircuitAnalyzer
 from core.device_palette import DevicePalette
 from core.circuit_csv_manager import CircuitCsvManager  # CSV管理システムをインポート
-# pyDialogManager - 新しい移行先システム
+from core.circuit_binary_format import CircuitBinaryFormat, BINARY_EXTENSION  # バイナリ回路形式
+from core.autosave_service import AutosaveService  # 自動保存
+from core.watch_manager import WatchManager  # アドレス購読（スキャンごとの変化分通知）
+from core.scan_scheduler import ScanScheduler, WatchdogTimeoutError  # 周期スキャン・WDT
+# pyDialogManager - 新しい移行先システム（各ダイアログコントローラーは初回使用時にimportする）
 from pyDialogManager.dialog_manager import DialogManager as PyDialogManager
 from pyDialogManager.dialog_system import DialogSystem
-from pyDialogManager.file_open_dialog import FileOpenDialogController
-from pyDialogManager.file_save_dialog import FileSaveDialogController
-from pyDialogManager.device_id_dialog_controller import DeviceIdDialogController
-from pyDialogManager.timer_counter_dialog_controller import TimerCounterDialogController
-from pyDialogManager.data_register_dialog import DataRegisterDialogController
-from pyDialogManager.compare_dialog_controller import CompareDialogController
 from core.SpriteManager import sprite_manager # SpriteManagerをインポート
 
 
@@ -107,51 +110,81 @@ class PyPlcVer3:
     
     def __init__(self):
         """アプリケーション初期化"""
-        pyxel.init(
-            DisplayConfig.WINDOW_WIDTH,
-            DisplayConfig.WINDOW_HEIGHT,
-            title=f"PyPlc Ver{SystemInfo.VERSION} - Circuit Solver",
-            fps=DisplayConfig.TARGET_FPS,
-            quit_key=pyxel.KEY_F12  # F12キーのみで終了、ESCキー無効化
-        )
-        pyxel.mouse(True)
+        with startup_profiler.phase("pyxel.init"):
+            pyxel.init(
+                DisplayConfig.WINDOW_WIDTH,
+                DisplayConfig.WINDOW_HEIGHT,
+                title=f"PyPlc Ver{SystemInfo.VERSION} - Circuit Solver",
+                fps=DisplayConfig.TARGET_FPS,
+                quit_key=pyxel.KEY_F12  # F12キーのみで終了、ESCキー無効化
+            )
+            pyxel.mouse(True)
         
         # SpriteManagerからリソースファイルをロード
-        if sprite_manager.resource_file:
-            pyxel.load(sprite_manager.resource_file)
+        with startup_profiler.phase("pyxel.load"):
+            if sprite_manager.resource_file:
+                pyxel.load(sprite_manager.resource_file)
+                sprite_manager.attach_atlas(pyxel.images[0])
         
         # --- モード管理システム (Ver1設計継承) ---
         self.current_mode = SimulatorMode.EDIT  # 起動時はEDITモード
         self.plc_run_state = PLCRunState.STOPPED  # 初期状態は停止中
         
         # --- モジュールのインスタンス化 ---
-        self.grid_system = GridSystem()
-        self.input_handler = InputHandler(self.grid_system)
-        self.circuit_analyzer = CircuitAnalyzer(self.grid_system)
-        self.device_palette = DevicePalette()  # デバイスパレット追加
-        self.csv_manager = CircuitCsvManager(self.grid_system)  # CSV管理システム追加
+        with startup_profiler.phase("core"):
+            self.grid_system = GridSystem()
+            self.input_handler = InputHandler(self.grid_system)
+            self.circuit_analyzer = CircuitAnalyzer(self.grid_system)
+            self.device_palette = DevicePalette()  # デバイスパレット追加
+            self.csv_manager = CircuitCsvManager(self.grid_system)  # CSV管理システム追加
+            self.autosave_service = AutosaveService(self.grid_system)  # バックグラウンド自動保存
+            self.watch_manager = WatchManager(self.grid_system)  # UIパネル・トレース等の値購読
+            # スキャンは PLCConfig.DEFAULT_SCAN_TIME_MS 周期で実行（タイマーはスキャン周期分ずつ進む）
+            # TaskConfig.TASKS の行範囲は別周期の定周期タスクとして同じ時計で実行する
+            self.scan_scheduler = ScanScheduler(self._run_scan, row_count=self.grid_system.rows)
+            self.circuit_analyzer.scan_time_ms = self.scan_scheduler.scan_time_ms
+            for task in TaskConfig.TASKS:
+                try:
+                    first_row, last_row = task["rows"]
+                    self.scan_scheduler.add_task(task["name"], first_row, last_row,
+                                                 task["period_ms"], task.get("priority", 0))
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"[PyPlc] Task ignored: {task} ({e})")
+        self.modbus_server = None  # Modbus-TCPサーバー（ModbusConfig.ENABLED時のみ起動）
+        if ModbusConfig.ENABLED:
+            # asyncioを含むためサーバー有効時のみimportする
+            from core.modbus_server import ModbusServer
+            try:
+                self.modbus_server = ModbusServer()
+                self.modbus_server.start()
+                print(f"[PyPlc] Modbus-TCP server listening on {ModbusConfig.HOST}:{self.modbus_server.port}")
+            except OSError as e:
+                print(f"[PyPlc] Modbus-TCP server disabled: {e}")
+                self.modbus_server = None
         
         # --- pyDialogManager 移行システム ---
-        print("[PyPlc] Initializing pyDialogManager...")
+        # dialogs.json は最初のダイアログ表示時に読み込む
         self.py_dialog_manager = PyDialogManager("pyDialogManager/dialogs.json")
-        self.file_open_controller = FileOpenDialogController(self.py_dialog_manager)
-        self.file_save_controller = FileSaveDialogController(self.py_dialog_manager)
-        self.device_id_controller = DeviceIdDialogController(self.py_dialog_manager)
-        self.timer_counter_controller = TimerCounterDialogController(self.py_dialog_manager)
-        self.data_register_controller = DataRegisterDialogController(self.py_dialog_manager)
-        self.compare_controller = CompareDialogController(self.py_dialog_manager)
-        
         
         # --- DialogSystem 一元管理システム ---
-        #print("[PyPlc] Initializing DialogSystem...")
-        self.dialog_system = DialogSystem()
-        self.dialog_system.register_controller(self.file_open_controller)
-        self.dialog_system.register_controller(self.file_save_controller)
-        self.dialog_system.register_controller(self.device_id_controller)
-        self.dialog_system.register_controller(self.timer_counter_controller)
-        self.dialog_system.register_controller(self.data_register_controller)
-        self.dialog_system.register_controller(self.compare_controller)
-        #print("[PyPlc] pyDialogManager and DialogSystem initialized successfully")
+        # 表示中のダイアログのコントローラーのみ更新し、結果はコールバックで受け取る
+        # コントローラーは get_controller() で初めて使う時にimport・生成する
+        self.dialog_system = DialogSystem(self.py_dialog_manager)
+        self.dialog_system.register_lazy_controller(
+            "file_open", "pyDialogManager.file_open_dialog:FileOpenDialogController", self._on_file_open_result)
+        self.dialog_system.register_lazy_controller(
+            "file_save", "pyDialogManager.file_save_dialog:FileSaveDialogController", self._on_file_save_result)
+        self.dialog_system.register_lazy_controller(
+            "device_id", "pyDialogManager.device_id_dialog_controller:DeviceIdDialogController",
+            self._on_device_id_result)
+        self.dialog_system.register_lazy_controller(
+            "timer_counter", "pyDialogManager.timer_counter_dialog_controller:TimerCounterDialogController",
+            self._on_timer_counter_result)
+        self.dialog_system.register_lazy_controller(
+            "data_register", "pyDialogManager.data_register_dialog:DataRegisterDialogController",
+            self._on_data_register_result)
+        self.dialog_system.register_lazy_controller(
+            "compare", "pyDialogManager.compare_dialog_controller:CompareDialogController", self._on_compare_result)
 
         # --- ダイアログ編集中の状態管理 ---
         self.editing_device_pos = None
@@ -173,35 +206,46 @@ class PyPlcVer3:
         # --- ファイル名管理システム ---
         self.current_filename = "untitled.csv"  # 現在のファイル名（デフォルト）
 
+        # --- 描画スキップ制御（シーン世代管理） ---
+        self.scene_generation = 0  # 表示内容が変化するたびに加算
+        self._drawn_scene_generation = -1  # 最後に描画したシーン世代
+        self._last_mouse_signature = None  # 前フレームのマウス位置・スナップ状態
+        self._last_edit_generation = -1  # 前フレームのグリッド編集世代
+
         pyxel.run(self.update, self.draw)
     
     def update(self) -> None:
         """フレーム更新処理"""
+        # 起動時間計測の報告（--startup-profile指定時、最初のフレームのみ）
+        startup_profiler.first_frame(StartupProfileConfig.TARGET_MS)
+
         # --- pyDialogManager 移行 ---
         self.py_dialog_manager.update()
-        self.dialog_system.update()  # DialogSystemによる一括更新
+        # 表示中のダイアログのコントローラーのみ1回更新（結果は登録したコールバックへ通知される）
+        self.dialog_system.update()
 
-        # --- pyDialogManager 結果処理 ---
-        self._handle_dialog_results()
+        # 自動保存（編集が落ち着いたらバックグラウンドで保存、I/Oは待たない）
+        self.autosave_service.update()
 
         # ダイアログ表示状態に応じてデバイスパレットのモードを設定（状態変化時のみ）
         dialog_active = self.py_dialog_manager.active_dialog is not None
         if dialog_active != self.previous_dialog_active:
             self.device_palette.set_dialog_mode(dialog_active)
             self.previous_dialog_active = dialog_active
+            self.scene_generation += 1
 
         # ダイアログ表示中は面ウィンドウの処理をスキップするが、ダイアログ処理は継続
         if self.dialog_system.has_active_dialogs:
-            # DialogSystemによる全コントローラーの一括更新処理
-            self.dialog_system.update()
-            
-            # ダイアログからの結果処理
-            self._handle_dialog_results()
+            # ドラッグ中にダイアログが開いた場合、ボタンを離すイベントを受け取れないためここで確定する
+            self._end_link_drag()
+            # ダイアログ表示中は入力・カーソル点滅があるため毎フレーム再描画
+            self.scene_generation += 1
             return
         
         # 1. 入力処理
         self.mouse_state = self.input_handler.update_mouse_state()
         if self.input_handler.check_quit_command():
+            self._shutdown()
             pyxel.quit()
         
         # Edit/Runモード切り替え (Ver1実装継承)
@@ -218,23 +262,28 @@ class PyPlcVer3:
             #hoge
             if self.current_mode == SimulatorMode.EDIT:
                 self._reset_circuit_for_save()
-                # 拡張子を除いたファイル名をデフォルトとして渡す
+                # 拡張子を除いたファイル名をデフォルトとして渡す（形式は現在のファイルに合わせる: .csv / .pyplc）
                 filename_without_ext = os.path.splitext(self.current_filename)[0]
-                self.file_save_controller.show_save_dialog(filename_without_ext, ".csv")
+                default_ext = BINARY_EXTENSION if CircuitBinaryFormat.is_binary_filename(self.current_filename) else ".csv"
+                self.dialog_system.get_controller("file_save").show_save_dialog(filename_without_ext, default_ext)
             else:
                 self._show_status_message("Save: EDIT mode only. Press TAB to switch.", 4.0)
             
         # Ctrl+O: ファイル読み込みダイアログ表示（EDITモードのみ）
         if pyxel.btn(pyxel.KEY_CTRL) and pyxel.btnp(pyxel.KEY_O):
             if self.current_mode == SimulatorMode.EDIT:
-                self.file_open_controller.show_file_open_dialog()
+                self.dialog_system.get_controller("file_open").show_file_open_dialog()
             else:
                 self._show_status_message("Load: EDIT mode only. Press TAB to switch.", 4.0)
+
+        # Ctrl+Z / Ctrl+Y (Ctrl+Shift+Z): 元に戻す・やり直し（EDITモードのみ）
+        self._handle_undo_redo()
         
         
         # デバイスパレット入力処理（EDITモードでのみ有効）
         if self.current_mode == SimulatorMode.EDIT:
-            self.device_palette.update_input()
+            if self.device_palette.update_input():
+                self.scene_generation += 1
         
         # デバイス配置・接点操作処理（モード別分離）
         self._handle_device_placement()
@@ -244,17 +293,65 @@ class PyPlcVer3:
         # 2. 論理演算 (通電解析) - PLC実行状態による制御
         if (self.current_mode == SimulatorMode.RUN and 
             self.plc_run_state == PLCRunState.RUNNING):
-            # RUNモードかつPLC実行中の場合のみ回路解析実行
-            self.circuit_analyzer.solve_ladder()
+            # RUNモードかつPLC実行中の場合のみ、スキャン周期が到来した分だけ回路解析実行
+            try:
+                if self.scan_scheduler.tick() > 0:
+                    self.scene_generation += 1  # デバイス状態・スキャン統計が更新された
+            except WatchdogTimeoutError as e:
+                # WDT異常: 実機と同様にスキャンを停止し、F5/F6でリセットするまで再開しない
+                self.plc_run_state = PLCRunState.ERROR
+                self._show_status_message(f"WDT error: {e}", 5.0, "error")
         # EDITモードまたはPLC停止中は回路解析を停止
         
         # 3. ステータスメッセージ更新
         self._update_status_message()
 
-    def _handle_dialog_results(self):
-        """全てのpyDialogManagerコントローラーからの結果を処理する"""        
-        # ファイル保存の結果を処理
-        save_path = self.file_save_controller.get_result()
+        # 4. マウス移動・グリッド編集の検出（その他の変化は発生箇所でシーン世代を進める）
+        self._update_scene_generation()
+
+    def _shutdown(self) -> None:
+        """終了処理: 未保存の編集を自動保存して書き込み完了を待ち、Modbusサーバーを停止する"""
+        self._end_link_drag()
+        self.autosave_service.flush()
+        self.autosave_service.stop()
+        if self.modbus_server:
+            self.modbus_server.stop()
+            self.modbus_server = None
+
+    def _run_scan(self, task) -> None:
+        """タスク1回分の処理（ScanSchedulerから各タスクの周期ごとに呼び出される）"""
+        if task is not self.scan_scheduler.main_task:
+            # 定周期タスク: 割り当て行のみをタスク周期で解析
+            self.circuit_analyzer.solve_rows(task.rows, task.period_ms)
+            return
+        # Modbusクライアントの書き込み反映・イメージ公開はメインスキャンの境界で行う
+        if self.modbus_server:
+            self.modbus_server.apply_pending_writes(self.grid_system)
+        self.circuit_analyzer.solve_rows(task.rows, task.period_ms)
+        if self.modbus_server:
+            self.modbus_server.publish(self.grid_system)
+        # 購読者へ変化分を通知（差分計算は購読者数に関係なく1スキャン1回）
+        self.watch_manager.end_of_scan()
+
+    def _update_scene_generation(self) -> None:
+        """
+        マウス移動（スナップ切り替えを含む）とグリッド編集世代の変化でシーン世代を進める
+        モード切り替え・PLC制御・パレット選択・メッセージ・スキャン実行・接点操作は
+        それぞれの処理でシーン世代を進める（グリッド全体の走査は行わない）
+        """
+        mouse_signature = (pyxel.mouse_x, pyxel.mouse_y, self.mouse_state.snap_mode)
+        if mouse_signature != self._last_mouse_signature:
+            self._last_mouse_signature = mouse_signature
+            self.scene_generation += 1
+        edit_generation = self.grid_system.edit_generation
+        if edit_generation != self._last_edit_generation:
+            self._last_edit_generation = edit_generation
+            self.scene_generation += 1
+
+    # --- pyDialogManager 結果処理（DialogSystemから結果確定時に呼び出される） ---
+
+    def _on_file_save_result(self, save_path):
+        """ファイル保存ダイアログの結果を処理する"""
         if save_path:
             # self.dialog_just_closed = True  # ダイアログ終了フラグ設定（現在未使用）
             # 目的: ダイアログOK決定時の入力イベント（クリック・Enter等）が次フレームで意図しない動作を引き起こすのを防止
@@ -262,6 +359,7 @@ class PyPlcVer3:
                 if self.csv_manager.save_circuit_to_csv(save_path):
                     # ファイル保存成功時にファイル名を更新
                     self.current_filename = os.path.basename(save_path)
+                    self.autosave_service.mark_saved()
                     self._show_status_message(f"Saved to {os.path.basename(save_path)}", 3.0, "success")
                 else:
                     self._show_status_message("Failed to save file", 3.0, "error")
@@ -274,8 +372,8 @@ class PyPlcVer3:
             except Exception as e:
                 self._show_status_message(f"Save error: {str(e)}", 3.0, "error")
 
-        # ファイル読み込みの結果を処理
-        load_path = self.file_open_controller.get_result()
+    def _on_file_open_result(self, load_path):
+        """ファイルオープンダイアログの結果を処理する"""
         if load_path:
             # self.dialog_just_closed = True  # ダイアログ終了フラグ設定（現在未使用）
             # 目的: ダイアログOK決定時の入力イベント（クリック・Enter等）が次フレームで意図しない動作を引き起こすのを防止
@@ -284,6 +382,7 @@ class PyPlcVer3:
                 if self.csv_manager.load_circuit_from_csv(load_path):
                     # ファイル読み込み成功時にファイル名を記録
                     self.current_filename = os.path.basename(load_path)
+                    self.autosave_service.mark_saved()
                     self._show_status_message(f"Loaded {os.path.basename(load_path)}", 3.0, "success")
                     self.circuit_analyzer.solve_ladder()
                 else:
@@ -297,22 +396,22 @@ class PyPlcVer3:
             except Exception as e:
                 self._show_status_message(f"Load error: {str(e)}", 3.0, "error")
 
-        # デバイスID編集の結果を処理
-        id_result = self.device_id_controller.get_result()
+    def _on_device_id_result(self, id_result):
+        """デバイスID編集ダイアログの結果を処理する"""
         if id_result and self.editing_device_pos:
             success, new_id = id_result
             if success:
                 device = self.grid_system.get_device(*self.editing_device_pos)
                 if device:
-                    device.address = new_id
+                    self.grid_system.update_device_address(*self.editing_device_pos, new_id)
                     self.circuit_analyzer.solve_ladder()
                     self._show_status_message(f"Device ID set to {new_id}", 2.0, "success")
             else:
                 self._show_status_message("Device edit canceled", 2.0, "info")
             self.editing_device_pos = None # 処理後にリセット
 
-        # タイマー・カウンター設定編集の結果を処理
-        timer_counter_result = self.timer_counter_controller.get_result()
+    def _on_timer_counter_result(self, timer_counter_result):
+        """タイマー・カウンター設定ダイアログの結果を処理する"""
         if timer_counter_result and self.editing_device_pos:
             success = timer_counter_result[0]
             if success and len(timer_counter_result) >= 3:
@@ -320,16 +419,17 @@ class PyPlcVer3:
                 new_preset_value = timer_counter_result[2]
                 device = self.grid_system.get_device(*self.editing_device_pos)
                 if device:
-                    device.address = new_device_id
-                    device.preset_value = new_preset_value
+                    self.grid_system.update_device_parameters(
+                        *self.editing_device_pos, address=new_device_id, preset_value=new_preset_value
+                    )
                     self.circuit_analyzer.solve_ladder()
                     self._show_status_message(f"Timer/Counter updated: {new_device_id}, Preset: {new_preset_value}", 3.0, "success")
             else:
                 self._show_status_message("Timer/Counter edit canceled", 2.0, "info")
             self.editing_device_pos = None # 処理後にリセット
 
-        # 比較デバイス編集の結果を処理
-        compare_result = self.compare_controller.get_result()
+    def _on_compare_result(self, compare_result):
+        """比較デバイス編集ダイアログの結果を処理する"""
         if compare_result and self.editing_device_pos:
             left = compare_result.get('compare_left', '')
             operator = compare_result.get('compare_operator', '=')
@@ -337,32 +437,34 @@ class PyPlcVer3:
             device = self.grid_system.get_device(*self.editing_device_pos)
             if device:
                 # 比較デバイスに設定を保存
-                device.compare_left = left
-                device.compare_operator = operator
-                device.compare_right = right
+                self.grid_system.update_device_parameters(
+                    *self.editing_device_pos,
+                    compare_left=left, compare_operator=operator, compare_right=right
+                )
                 self.circuit_analyzer.solve_ladder()
                 self._show_status_message(f"Compare device set: {left} {operator} {right}", 2.0, "success")
                 # 比較デバイス設定を更新
             self.editing_device_pos = None # 処理後にリセット
             
-        # データレジスタ編集の結果を処理
-        data_register_result = self.data_register_controller.get_result()
+    def _on_data_register_result(self, data_register_result):
+        """データレジスタ編集ダイアログの結果を処理する"""
         if data_register_result and self.editing_device_pos:
             device_id = data_register_result.get('device_id', '')
             operation = data_register_result.get('operation', 'MOV')
             operand = data_register_result.get('operand', '')
             device = self.grid_system.get_device(*self.editing_device_pos)
             if device:
-                # デバイスにデバイスID、操作、オペランド値を保存
-                device.address = device_id
-                device.operation = operation
+                # デバイスにデバイスID、操作、オペランド値を保存（1回のUndo操作として記録）
                 # オペランド値をpreset_valueに保存（CSV保存用）
                 try:
-                    device.preset_value = int(operand) if operand.isdigit() else float(operand)
+                    preset_value = int(operand) if operand.isdigit() else float(operand)
                 except (ValueError, AttributeError):
-                    device.preset_value = 0  # 変換できない場合はデフォルト値
+                    preset_value = 0  # 変換できない場合はデフォルト値
                 # 旧operand属性も保持（互換性用）
-                device.operand = operand
+                self.grid_system.update_device_parameters(
+                    *self.editing_device_pos,
+                    address=device_id, operation=operation, preset_value=preset_value, operand=operand
+                )
                 self.circuit_analyzer.solve_ladder()
                 self._show_status_message(f"Data register updated: {device_id} {operation} {operand}", 3.0, "success")
             self.editing_device_pos = None # 処理後にリセット
@@ -405,7 +507,7 @@ class PyPlcVer3:
         # デバイス種別による直接振り分け（わかりやすい）
         if device_type_str in ['TIMER_TON', 'COUNTER_CTU']:
             # タイマー・カウンタープリセット値編集ダイアログ
-            self.timer_counter_controller.show_dialog(
+            self.dialog_system.get_controller("timer_counter").show_dialog(
                 device.device_type, 
                 device.preset_value, 
                 device.address
@@ -413,7 +515,7 @@ class PyPlcVer3:
             
         elif device_type_str in ['CONTACT_A', 'CONTACT_B', 'COIL_STD', 'COIL_REV', 'RST', 'ZRST']:
             # デバイスID編集ダイアログ
-            self.device_id_controller.show_dialog(
+            self.dialog_system.get_controller("device_id").show_dialog(
                 device.device_type, 
                 device.address
             )
@@ -425,7 +527,7 @@ class PyPlcVer3:
             current_preset_value = getattr(device, 'preset_value', 0)
             current_operand = str(current_preset_value) if current_preset_value != 0 else ''
             
-            self.data_register_controller.show_data_register_dialog(
+            self.dialog_system.get_controller("data_register").show_data_register_dialog(
                 current_device_id, 
                 current_operation, 
                 current_operand
@@ -437,7 +539,7 @@ class PyPlcVer3:
             current_operator = getattr(device, 'compare_operator', '=')
             current_right = getattr(device, 'compare_right', '')
             
-            self.compare_controller.show_compare_dialog(
+            self.dialog_system.get_controller("compare").show_compare_dialog(
                 current_left, 
                 current_operator, 
                 current_right
@@ -478,25 +580,30 @@ class PyPlcVer3:
         # --- ドラッグ開始処理 (Phase D) ---
         if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
             if selected_device_type == DeviceType.LINK_HORZ:
+                # 前回のドラッグが確定していない場合（ボタンを離すイベントの取りこぼし）は先に確定する
+                self._end_link_drag()
                 self.is_dragging_link = True
                 self.drag_start_pos = (row, col)
                 self.last_drag_pos = (row, col)
+                # ドラッグ終了（ボタンを離す）までの配置を1回のUndo操作にまとめる
+                self.grid_system.journal.begin_group()
                 self.grid_system.place_device(row, col, selected_device_type, "")
                 return
 
-            # --- 通常の単一配置処理 ---
+            # --- 通常の単一配置処理（置き換えは削除+配置を1回のUndo操作にまとめる） ---
             device = self.grid_system.get_device(row, col)
             
-            if device:
-                if selected_device_type == DeviceType.DEL:
-                    self.grid_system.remove_device(row, col)
+            with self.grid_system.journal.group():
+                if device:
+                    if selected_device_type == DeviceType.DEL:
+                        self.grid_system.remove_device(row, col)
+                    else:
+                        self.grid_system.remove_device(row, col)
+                        if selected_device_type != DeviceType.EMPTY:
+                            self._place_single_device(row, col, selected_device_type)
                 else:
-                    self.grid_system.remove_device(row, col)
-                    if selected_device_type != DeviceType.EMPTY:
+                    if selected_device_type not in [DeviceType.DEL, DeviceType.EMPTY]:
                         self._place_single_device(row, col, selected_device_type)
-            else:
-                if selected_device_type not in [DeviceType.DEL, DeviceType.EMPTY]:
-                    self._place_single_device(row, col, selected_device_type)
 
     def _place_single_device(self, row: int, col: int, device_type: DeviceType) -> None:
         """単一のデバイスを配置するヘルパーメソッド"""
@@ -550,11 +657,49 @@ class PyPlcVer3:
         
         # マウスボタンを離した時にドラッグ終了
         if pyxel.btnr(pyxel.MOUSE_BUTTON_LEFT):
-            self.is_dragging_link = False
-            self.drag_start_pos = None
-            self.last_drag_pos = None
-            # 回路全体を再解析
-            self.circuit_analyzer.solve_ladder()
+            self._end_link_drag()
+
+    def _end_link_drag(self) -> None:
+        """
+        LINK_HORZのドラッグ配置を終了し、ドラッグ中の配置を1回のUndo操作として確定する
+        ドラッグ中でなければ何もしない（ダイアログ表示・モード切り替え時にも呼び出す）
+        """
+        if not self.is_dragging_link:
+            return
+        self.is_dragging_link = False
+        self.drag_start_pos = None
+        self.last_drag_pos = None
+        self.grid_system.journal.end_group()
+        # 回路全体を再解析
+        self.circuit_analyzer.solve_ladder()
+
+    def _handle_undo_redo(self) -> None:
+        """
+        Ctrl+Z: 元に戻す / Ctrl+Y・Ctrl+Shift+Z: やり直し（EDITモードのみ）
+        """
+        if not pyxel.btn(pyxel.KEY_CTRL):
+            return
+        redo_pressed = pyxel.btnp(pyxel.KEY_Y) or (pyxel.btn(pyxel.KEY_SHIFT) and pyxel.btnp(pyxel.KEY_Z))
+        undo_pressed = not redo_pressed and pyxel.btnp(pyxel.KEY_Z)
+        if not (undo_pressed or redo_pressed):
+            return
+        if self.current_mode != SimulatorMode.EDIT:
+            self._show_status_message("Undo/Redo: EDIT mode only. Press TAB to switch.", 3.0)
+            return
+        if self.is_dragging_link:
+            return  # ドラッグ配置中は操作確定まで受け付けない
+
+        if redo_pressed:
+            if self.grid_system.redo():
+                self._show_status_message("Redo", 1.5, "info")
+            else:
+                self._show_status_message("Nothing to redo", 1.5, "info")
+        else:
+            if self.grid_system.undo():
+                self._show_status_message("Undo", 1.5, "info")
+            else:
+                self._show_status_message("Nothing to undo", 1.5, "info")
+        self.circuit_analyzer.solve_ladder()
 
     def _handle_device_operation(self) -> None:
         """
@@ -580,6 +725,7 @@ class PyPlcVer3:
             device = self.grid_system.get_device(row, col)
             if device and self._is_operable_device(device):
                 device.state = not device.state
+                self.scene_generation += 1
 
     def _is_operable_device(self, device) -> bool:
         """
@@ -605,6 +751,7 @@ class PyPlcVer3:
         self.status_message = message
         self.status_message_timer = int(duration_seconds * DisplayConfig.TARGET_FPS)  # フレーム数に変換
         self.status_message_type = message_type
+        self.scene_generation += 1
     
     def _update_status_message(self) -> None:
         """
@@ -615,11 +762,12 @@ class PyPlcVer3:
             if self.status_message_timer <= 0:
                 self.status_message = ""
                 self.status_message_type = "info"
+                self.scene_generation += 1
 
     def _generate_default_address(self, device_type: DeviceType, row: int, col: int) -> str:
         """
         デバイスタイプに基づくユニークなデフォルトアドレス生成（PLC標準準拠）
-        既存のアドレスと重複しないように、空きアドレスを自動検索する
+        既存のアドレスと重複しないように、空きアドレスを自動割り当てする
         
         Args:
             device_type: デバイスタイプ
@@ -645,25 +793,17 @@ class PyPlcVer3:
         else:
             return ""
         
-        # 既存のアドレス一覧を取得
-        existing_addresses = set()
-        for r in range(self.grid_system.rows):
-            for c in range(self.grid_system.cols):
-                device = self.grid_system.get_device(r, c)
-                if device and device.address:
-                    existing_addresses.add(device.address.upper())
-        
-        # プレフィックス + 番号で空きアドレスを検索（001から開始）
-        for i in range(1, 1000):  # X001-X999まで検索
-            candidate = f"{prefix}{i:03d}"
-            if candidate not in existing_addresses:
-                return candidate
-        
-        # 見つからなければフォールバック（まず発生しない）
-        return f"{prefix}999"
+        # GridSystemが差分管理している空きアドレスから最小番号を取得（001から開始、グリッド走査なし）
+        return self.grid_system.address_allocator.next_free_address(prefix)
 
     def draw(self) -> None:
         """描画処理"""
+        # 表示内容に変化がなければ前フレームの画面をそのまま使用（再描画しない）
+        if (UIBehaviorConfig.SKIP_UNCHANGED_FRAMES and
+                self._drawn_scene_generation == self.scene_generation):
+            return
+        self._drawn_scene_generation = self.scene_generation
+
         # 3. 描画処理
         pyxel.cls(pyxel.COLOR_BLACK)
         
@@ -866,6 +1006,8 @@ class PyPlcVer3:
         """
         # TABキーでEDIT/RUN切り替え
         if pyxel.btnp(pyxel.KEY_TAB):
+            self._end_link_drag()  # ドラッグ配置中のモード切り替えでもUndoグループを確定する
+            self.scene_generation += 1
             if self.current_mode == SimulatorMode.EDIT:
                 self.current_mode = SimulatorMode.RUN
                 self.plc_run_state = PLCRunState.STOPPED  # RUNモードに入る時は停止状態から開始
@@ -899,15 +1041,27 @@ class PyPlcVer3:
             pyxel.text(plc_x, status_bar_y + 10, plc_text, plc_color)
             
             # F5キーヒント表示（PLC状態の隣）
-            hint_text = " F5:Start " if self.plc_run_state == PLCRunState.STOPPED else " F5:Stop"
+            if self.plc_run_state == PLCRunState.STOPPED:
+                hint_text = " F5:Start "
+            elif self.plc_run_state == PLCRunState.ERROR:
+                hint_text = " F5:Clear"
+            else:
+                hint_text = " F5:Stop"
             #pyxel.text(plc_x + len(plc_text) * 4, status_bar_y + 2, hint_text, pyxel.COLOR_CYAN)
             pyxel.text(plc_x + len(plc_text) * 4, status_bar_y + 10, hint_text, pyxel.COLOR_CYAN)
+
+            # スキャン周期・最大スキャン時間・オーバーラン回数（右端）
+            scan_text = self._get_scan_status_text()
+            scheduler = self.scan_scheduler
+            scan_color = pyxel.COLOR_RED if scheduler.tripped or scheduler.total_overruns else pyxel.COLOR_GRAY
+            scan_x = DisplayConfig.WINDOW_WIDTH - len(scan_text) * 4 - 10
+            pyxel.text(scan_x, status_bar_y + 10, scan_text, scan_color)
         
         # TABキーヒント表示（左端） - モード別表示
         if self.current_mode == SimulatorMode.EDIT:
             tab_hint = "TAB:Mode F6:Reset Ctrl+S:Save Ctrl+O:Load"
         else:
-            tab_hint = "TAB:Mode F6:Reset F5:PLC [Save/Load: EDIT mode only]"
+            tab_hint = "TAB:Mode F6:Reset F5:PLC F7/F8:Scan [Save/Load: EDIT mode only]"
         pyxel.text(10, status_bar_y + 2, tab_hint, pyxel.COLOR_WHITE)
         
         # 現在編集中のファイル名表示（下部ステータスバー）
@@ -949,18 +1103,49 @@ class PyPlcVer3:
             pyxel.rectb(message_x - 4, message_y - 2, len(self.status_message) * 4 + 8, 10, border_color)
             pyxel.text(message_x, message_y, self.status_message, text_color)
 
+    def _get_scan_status_text(self) -> str:
+        """
+        スキャン状態の表示文字列（メインスキャン周期・最大スキャン時間・全タスクのオーバーラン回数・WDT異常）
+        定周期タスクがある場合はタスク数を付ける
+        """
+        scheduler = self.scan_scheduler
+        watchdog = scheduler.watchdog
+        text = f"Scan:{watchdog.scan_time_ms}ms Max:{watchdog.max_ms:.1f}ms OVR:{scheduler.total_overruns}"
+        if len(scheduler.tasks) > 1:
+            text += f" Tasks:{len(scheduler.tasks) - 1}"
+        if scheduler.tripped:
+            text += " WDT"
+        return text
+
     def _handle_plc_control(self) -> None:
         """
         F5キーでのPLC実行制御処理 (Ver1設計継承)
-        RUNモード時のみF5キーでSTOPPED ⇔ RUNNING切り替え
+        RUNモード時のみF5キーでSTOPPED ⇔ RUNNING切り替え（WDT異常時はF5で異常解除・停止）
+        F7/F8キーでスキャン周期を変更
         """
+        if self.current_mode != SimulatorMode.RUN:
+            return
+
         # F5キーでのPLC制御（RUNモードのみ）
-        if pyxel.btnp(pyxel.KEY_F5) and self.current_mode == SimulatorMode.RUN:
+        if pyxel.btnp(pyxel.KEY_F5):
             if self.plc_run_state == PLCRunState.STOPPED:
                 self.plc_run_state = PLCRunState.RUNNING
+                self.scan_scheduler.restart()  # 停止中の経過時間は遅れとして扱わない
             else:
                 self.plc_run_state = PLCRunState.STOPPED
-                self._reset_all_systems()  # 停止時は全システムリセット
+                self._reset_all_systems()  # 停止時・WDT異常解除時は全システムリセット
+            self.scene_generation += 1
+
+        # F7/F8キーでスキャン周期を短く/長く（PLCConfig.MIN_SCAN_TIME_MS～MAX_SCAN_TIME_MS）
+        step = 0
+        if pyxel.btnp(pyxel.KEY_F7):
+            step = -PLCConfig.SCAN_TIME_STEP_MS
+        elif pyxel.btnp(pyxel.KEY_F8):
+            step = PLCConfig.SCAN_TIME_STEP_MS
+        if step:
+            scan_time_ms = self.scan_scheduler.set_scan_time(self.scan_scheduler.scan_time_ms + step)
+            self.circuit_analyzer.scan_time_ms = scan_time_ms
+            self._show_status_message(f"Scan time: {scan_time_ms} ms", 2.0, "info")
 
     def _handle_full_system_reset(self) -> None:
         """
@@ -977,6 +1162,7 @@ class PyPlcVer3:
             
             # デバイス個別状態のリセット（接点のON/OFF状態など）
             self._reset_all_device_states()
+            self.scene_generation += 1
 
     def _reset_all_systems(self) -> None:
         """
@@ -989,9 +1175,11 @@ class PyPlcVer3:
         # タイマー・カウンターの値リセット
         self._reset_timer_counter_values()
         
+        # スキャン統計・WDT異常のクリア
+        self.scan_scheduler.reset()
+
         # 追加のリセット処理（将来拡張時）
         # - 内部リレー状態リセット
-        # - エラー状態クリア
 
     def _reset_all_device_states(self) -> None:
         """
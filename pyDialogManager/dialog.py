@@ -7,6 +7,7 @@ class Dialog:
     ウィジェットのリストを保持し、それらの更新と描画を制御する。
     """
     def __init__(self, definition, widgets):
+        self.definition = definition
         self.x = definition.get("x", 0)
         self.y = definition.get("y", 0)
         self.width = definition.get("width", 100)
@@ -21,6 +22,13 @@ class Dialog:
         self.title_text_color = resolve_color(definition.get("title_text_color", "COLOR_WHITE"))
         self.border_color = resolve_color(definition.get("border_color", "COLOR_BLACK"))
 
+    def reset(self):
+        """ダイアログとウィジェットの状態を定義直後に戻す（DialogManagerがインスタンスを再利用する際に呼び出す）"""
+        self.title = self.definition.get("title", "Dialog")
+        self.is_active = True
+        for widget in self.widgets:
+            widget.reset()
+
     def update(self):
         if not self.is_active:
             return
@@ -1,65 +1,22 @@
 import json
-import pyxel
 from .dialog import Dialog
-from .widgets import LabelWidget, ButtonWidget, TextBoxWidget, ListBoxWidget, DropdownWidget, CheckboxWidget
+from .widgets import (LabelWidget, ButtonWidget, TextBoxWidget, ListBoxWidget, DropdownWidget, CheckboxWidget,
+                      resolve_definition_colors)
 
 
-def resolve_color(color_value):
-    """
-    色定義を解決する関数
-    
-    Args:
-        color_value: 数値、"COLOR_xxx"文字列、またはNone
-        
-    Returns:
-        int: pyxel色定数
-    """
-    if color_value is None:
-        return None
-        
-    # すでに数値の場合はそのまま返す
-    if isinstance(color_value, int):
-        return color_value
-    
-    # 文字列の場合、COLOR_xxxからpyxel.COLOR_xxxに変換
-    if isinstance(color_value, str) and color_value.startswith("COLOR_"):
-        color_name = color_value  # "COLOR_RED" など
-        
-        # pyxel色定数マッピング
-        color_map = {
-            "COLOR_BLACK": pyxel.COLOR_BLACK,
-            "COLOR_NAVY": pyxel.COLOR_NAVY,
-            "COLOR_PURPLE": pyxel.COLOR_PURPLE,
-            "COLOR_GREEN": pyxel.COLOR_GREEN,
-            "COLOR_BROWN": pyxel.COLOR_BROWN,
-            "COLOR_DARK_BLUE": pyxel.COLOR_DARK_BLUE,
-            "COLOR_LIGHT_BLUE": pyxel.COLOR_LIGHT_BLUE,
-            "COLOR_WHITE": pyxel.COLOR_WHITE,
-            "COLOR_RED": pyxel.COLOR_RED,
-            "COLOR_ORANGE": pyxel.COLOR_ORANGE,
-            "COLOR_YELLOW": pyxel.COLOR_YELLOW,
-            "COLOR_LIME": pyxel.COLOR_LIME,
-            "COLOR_CYAN": pyxel.COLOR_CYAN,
-            "COLOR_GRAY": pyxel.COLOR_GRAY,
-            "COLOR_PINK": pyxel.COLOR_PINK,
-            "COLOR_PEACH": pyxel.COLOR_PEACH,
-        }
-        
-        return color_map.get(color_name, pyxel.COLOR_WHITE)  # デフォルトは白
-    
-    # その他の場合は白をデフォルトに
-    return pyxel.COLOR_WHITE
-
 class DialogManager:
     """
     dialogs.json を読み込み、ダイアログの生成と管理を行うクラス
+    - dialogs.json は最初にダイアログを表示する時（または preload() 時）に読み込む（起動時間短縮）
+    - 色指定は読み込み時に1回だけ数値へ解決する
+    - ダイアログは初回表示時（または preload() 時）に1度だけ生成し、以降は reset() して再利用する
     """
     def __init__(self, json_path):
-        # JSONファイルからダイアログ定義を読み込む
-        with open(json_path, 'r') as f:
-            self.definitions = json.load(f)
+        self.json_path = json_path
+        self._definitions = None  # ダイアログ定義（初回参照時に読み込む）
         
         self.active_dialog = None
+        self._dialog_cache = {}  # ダイアログID → 生成済みDialog
 
         # ウィジェットのタイプ名とクラスをマッピング
         self.widget_factory = {
@@ -71,13 +28,19 @@ class DialogManager:
             "checkbox": CheckboxWidget,
         }
 
-    def show(self, dialog_id):
-        """指定されたIDのダイアログを表示する"""
-        dialog_def = self.definitions.get(dialog_id)
-        if not dialog_def:
-            print(f"Error: Dialog definition for '{dialog_id}' not found.")
-            return
+    @property
+    def definitions(self):
+        """ダイアログ定義（初回参照時にJSONファイルから読み込み、色指定を解決する）"""
+        if self._definitions is None:
+            with open(self.json_path, 'r') as f:
+                definitions = json.load(f)
+            for dialog_def in definitions.values():
+                resolve_definition_colors(dialog_def)
+            self._definitions = definitions
+        return self._definitions
 
+    def _build_dialog(self, dialog_def):
+        """定義からDialogとウィジェットを生成する"""
         # Dialogインスタンスを先に仮作成（ウィジェットが親ダイアログを参照できるようにするため）
         # この時点ではウィジェットリストは空
         new_dialog = Dialog(dialog_def, [])
@@ -95,8 +58,34 @@ class DialogManager:
         
         # 作成したウィジェットリストをダイアログに設定
         new_dialog.widgets = widgets
+        return new_dialog
+
+    def preload(self, dialog_ids=None):
+        """
+        ダイアログを事前生成する（起動時に呼び出すと初回表示時の生成コストを無くせる）
+
+        Args:
+            dialog_ids: 生成するダイアログIDのリスト（Noneの場合は全ダイアログ）
+        """
+        for dialog_id in (dialog_ids if dialog_ids is not None else self.definitions):
+            dialog_def = self.definitions.get(dialog_id)
+            if dialog_def and dialog_id not in self._dialog_cache:
+                self._dialog_cache[dialog_id] = self._build_dialog(dialog_def)
+
+    def show(self, dialog_id):
+        """指定されたIDのダイアログを表示する（生成済みの場合は状態をリセットして再利用）"""
+        dialog = self._dialog_cache.get(dialog_id)
+        if dialog is None:
+            dialog_def = self.definitions.get(dialog_id)
+            if not dialog_def:
+                print(f"Error: Dialog definition for '{dialog_id}' not found.")
+                return
+            dialog = self._build_dialog(dialog_def)
+            self._dialog_cache[dialog_id] = dialog
+        else:
+            dialog.reset()
         
-        self.active_dialog = new_dialog
+        self.active_dialog = dialog
 
     def close(self):
         """現在アクティブなダイアログを閉じる"""
@@ -5,12 +5,15 @@ DialogSystem - ダイアログコントローラー一元管理システム
 作成日: 2025-08-18
 """
 
-from typing import List, Any, Protocol
+import importlib
+from typing import Any, Callable, Dict, List, Optional, Protocol
 
 
 class DialogController(Protocol):
     """ダイアログコントローラーが実装すべきインターフェース"""
     
+    active_dialog: Any  # 表示中のDialog（非表示時None）
+    
     def update(self) -> None:
         """コントローラーの更新処理"""
         ...
@@ -18,6 +21,10 @@ class DialogController(Protocol):
     def is_active(self) -> bool:
         """ダイアログがアクティブかどうかを返す"""
         ...
+    
+    def get_result(self) -> Any:
+        """確定した結果を取り出す（未確定時None）"""
+        ...
 
 
 class DialogSystem:
@@ -26,37 +33,126 @@ class DialogSystem:
     
     機能:
     - 複数のダイアログコントローラーを登録・管理
-    - 全コントローラーの一括更新処理
-    - アクティブダイアログの状態監視
+    - 表示中のダイアログを所有するコントローラー（アクティブコントローラー）のみを1フレーム1回更新
+    - 結果は登録時のコールバックで通知（全コントローラーの get_result() を毎フレーム問い合わせない）
+    - register_lazy_controller() で登録したコントローラーは、初めて get_controller() した時に
+      モジュールをimportして生成する（起動時間短縮）
+    
+    アクティブコントローラーは DialogManager.active_dialog が切り替わった時だけ再判定する
     """
     
-    def __init__(self):
-        """DialogSystemの初期化"""
+    def __init__(self, dialog_manager=None):
+        """
+        DialogSystemの初期化
+        
+        Args:
+            dialog_manager: コントローラーが共有するDialogManager（アクティブダイアログの切り替え検出に使用）
+        """
+        self.dialog_manager = dialog_manager
         self.controllers: List[DialogController] = []
+        self._result_callbacks: Dict[int, Callable[[Any], None]] = {}  # id(controller) → コールバック
+        self.active_controller: Optional[DialogController] = None
+        self._tracked_dialog = None  # アクティブコントローラー判定時の DialogManager.active_dialog
+        # 遅延生成するコントローラー: 名前 → ("モジュール名:クラス名", コールバック)
+        self._lazy_controllers: Dict[str, tuple] = {}
+        self._named_controllers: Dict[str, DialogController] = {}
         
-    def register_controller(self, controller: DialogController) -> DialogController:
+    def register_controller(self, controller: DialogController,
+                            on_result: Optional[Callable[[Any], None]] = None) -> DialogController:
         """
         ダイアログコントローラーを登録
         
         Args:
             controller: 登録するダイアログコントローラー
+            on_result: 結果確定時に on_result(result) を呼び出すコールバック
             
         Returns:
             登録されたコントローラー（チェーン用）
         """
         self.controllers.append(controller)
+        if on_result is not None:
+            self._result_callbacks[id(controller)] = on_result
         return controller
+    
+    def register_lazy_controller(self, name: str, spec: str,
+                                 on_result: Optional[Callable[[Any], None]] = None) -> None:
+        """
+        ダイアログコントローラーを遅延生成として登録（モジュールのimportも初回使用時まで行わない）
+        
+        Args:
+            name: get_controller() で指定する名前
+            spec: "モジュール名:クラス名"（コンストラクタはDialogManagerを受け取る）
+            on_result: 結果確定時に on_result(result) を呼び出すコールバック
+        """
+        self._lazy_controllers[name] = (spec, on_result)
+    
+    def get_controller(self, name: str) -> DialogController:
+        """
+        名前を指定してコントローラーを取得（遅延登録されたものは初回に生成して登録する）
+        
+        Raises:
+            KeyError: 未登録の名前の場合
+        """
+        controller = self._named_controllers.get(name)
+        if controller is None:
+            spec, on_result = self._lazy_controllers[name]
+            module_name, class_name = spec.split(":", 1)
+            controller_class = getattr(importlib.import_module(module_name), class_name)
+            controller = self.register_controller(controller_class(self.dialog_manager), on_result)
+            self._named_controllers[name] = controller
+        return controller
+    
+    def _sync_active_controller(self) -> None:
+        """
+        DialogManagerのアクティブダイアログが切り替わっていれば、所有するコントローラーを再判定する
+        直前のアクティブコントローラーに未通知の結果があれば、ここで通知する
+        """
+        if self.dialog_manager is None:
+            return
+        dialog = self.dialog_manager.active_dialog
+        if dialog is self._tracked_dialog:
+            return
+        
+        previous = self.active_controller
+        self._tracked_dialog = dialog
+        self.active_controller = None
+        if dialog is not None:
+            for controller in self.controllers:
+                if getattr(controller, 'active_dialog', None) is dialog:
+                    self.active_controller = controller
+                    break
+        if previous is not None and previous is not self.active_controller:
+            self._dispatch_result(previous)
+    
+    def _dispatch_result(self, controller: DialogController) -> None:
+        """コントローラーの確定結果をコールバックへ通知する"""
+        callback = self._result_callbacks.get(id(controller))
+        if callback is None:
+            return
+        result = controller.get_result()
+        if result:
+            callback(result)
         
     def update(self) -> None:
         """
-        登録されている全コントローラーの更新処理を実行
+        アクティブコントローラーのみ更新し、確定した結果をコールバックで通知する（1フレーム1回呼び出す）
         
-        各コントローラーのupdate()メソッドを順次呼び出す
-        update()メソッドを持たないコントローラーは安全にスキップされる
+        DialogManager未指定時は従来通り全コントローラーを順次更新する
         """
-        for controller in self.controllers:
-            if hasattr(controller, 'update') and callable(getattr(controller, 'update')):
-                controller.update()
+        if self.dialog_manager is None:
+            for controller in self.controllers:
+                if hasattr(controller, 'update') and callable(getattr(controller, 'update')):
+                    controller.update()
+            return
+        
+        self._sync_active_controller()
+        controller = self.active_controller
+        if controller is None:
+            return
+        controller.update()
+        self._dispatch_result(controller)
+        # update()内でダイアログが閉じられた場合はアクティブ状態を解除
+        self._sync_active_controller()
                 
     @property
     def has_active_dialogs(self) -> bool:
@@ -66,6 +162,9 @@ class DialogSystem:
         Returns:
             bool: いずれかのコントローラーがアクティブな場合True
         """
+        if self.dialog_manager is not None:
+            self._sync_active_controller()
+            return self.active_controller is not None
         for controller in self.controllers:
             if hasattr(controller, 'is_active') and callable(getattr(controller, 'is_active')):
                 if controller.is_active():
@@ -79,6 +178,8 @@ class DialogSystem:
         Returns:
             int: アクティブなダイアログの数
         """
+        if self.dialog_manager is not None:
+            return 1 if self.has_active_dialogs else 0
         count = 0
         for controller in self.controllers:
             if hasattr(controller, 'is_active') and callable(getattr(controller, 'is_active')):
@@ -93,4 +194,4 @@ class DialogSystem:
         Returns:
             List[DialogController]: 登録済みコントローラーのリスト
         """
-        return self.controllers.copy()
\ No newline at end of file
+        return self.controllers.copy()
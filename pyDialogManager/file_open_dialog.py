@@ -6,8 +6,10 @@
 import os
 import re
 import sys
+from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.base_dialog_controller import PyPlcDialogController
+from core.circuit_metadata import CircuitMetadataIndex
 from .dialog_manager import DialogManager
 from .file_utils import FileManager, FileItem
 from .system_settings import settings
@@ -19,6 +21,10 @@ class FileOpenDialogController(PyPlcDialogController):
         super().__init__(dialog_manager)
         self.file_manager = FileManager(initial_directory)
         
+        # 回路プレビュー（索引は最初のプレビュー表示時に読み込む）
+        self.metadata_index = None
+        self._preview_item = None  # 概要の計算待ちファイル（FileItem）
+        
     def show_file_open_dialog(self):
         """ファイルオープンダイアログを表示し、ファイルシステムと連携"""
         if self._safe_show_dialog("IDD_FILE_OPEN"):
@@ -46,6 +52,9 @@ class FileOpenDialogController(PyPlcDialogController):
         if filename_widget:
             filename_widget.text = ""
         
+        # プレビューをクリア
+        self._show_preview(None)
+        
         # デフォルトフィルターを適用
         self._apply_initial_filter()
     
@@ -92,28 +101,113 @@ class FileOpenDialogController(PyPlcDialogController):
         if not file_list_widget:
             return
             
-        try:
-            # ディレクトリ内容を取得
-            file_items = self.file_manager.list_directory()
-            
-            # 表示用の文字列リストを作成
-            display_items = []
-            self.file_items_map = {}  # 表示インデックスと実際のFileItemのマッピング
-            
+        # ディレクトリ内容の取得をワーカースレッドで開始（結果はupdate()で順次反映）
+        # リストボックスは仮想モードで、表示範囲の項目だけ表示名を作る
+        self.file_items = []  # 表示インデックス順のFileItem
+        file_list_widget.set_data_source(lambda: len(self.file_items), self._get_file_display_names)
+        self._listing = self.file_manager.start_listing()
+        self._poll_file_list()
+
+    def _get_file_display_names(self, start: int, stop: int):
+        """リストボックスの表示範囲の表示名を返す（仮想モードのデータソース）"""
+        return [item.get_display_name() for item in self.file_items[start:stop]]
+
+    def _get_file_item(self, index: int):
+        """表示インデックスに対応するFileItemを取得"""
+        if 0 <= index < len(getattr(self, 'file_items', ())):
+            return self.file_items[index]
+        return None
+
+    def _poll_file_list(self):
+        """ワーカースレッドが取得した項目をリストボックスへ反映する"""
+        listing = getattr(self, '_listing', None)
+        if listing is None or listing.done:
+            return
+        file_list_widget = self._find_widget("IDC_FILE_LIST")
+        if not file_list_widget:
+            return
+
+        new_items, file_items = listing.poll()
+        if file_items is None:
+            # 取得途中: 取得済みの項目を末尾に追加
+            if new_items:
+                self.file_items.extend(new_items)
+                file_list_widget.refresh_data_source()
+            return
+
+        # 取得完了: 並び替え済みの一覧に置き換え（選択中の項目は維持）
+        selected = self._get_file_item(file_list_widget.selected_index)
+        self.file_items = file_items
+        file_list_widget.refresh_data_source()
+        file_list_widget.selected_index = -1
+        if selected is not None:
             for i, item in enumerate(file_items):
-                display_name = item.get_display_name()
-                display_items.append(display_name)
-                self.file_items_map[i] = item
-            
-            # リストボックスにアイテムを設定
-            file_list_widget.set_items(display_items)
-            
-            print(f"Loaded {len(display_items)} items from {self.file_manager.get_current_path()}")
-            
-        except Exception as e:
-            print(f"Error loading directory: {e}")
-            file_list_widget.set_items([f"Error: {str(e)}"])
+                if item.path == selected.path:
+                    file_list_widget.selected_index = i
+                    file_list_widget.scroll_to_item(i)
+                    break
+        self._last_selected_index = file_list_widget.selected_index
+
+        print(f"Loaded {len(file_items)} items from {listing.path}")
     
+    def _show_preview(self, file_item):
+        """
+        選択ファイルのプレビューを表示（回路CSVのみ。未計算の場合はワーカースレッドに依頼）
+
+        Args:
+            file_item: 選択されたFileItem（Noneでクリア）
+        """
+        self._preview_item = None
+        if file_item is None or file_item.is_directory or not file_item.name.lower().endswith('.csv'):
+            self._set_preview_lines([])
+            return
+
+        if self.metadata_index is None:
+            self.metadata_index = CircuitMetadataIndex()
+        metadata = self.metadata_index.get(file_item.path)
+        if metadata is not None:
+            self._set_preview_lines(self._format_preview(file_item, metadata))
+            return
+        self._preview_item = file_item
+        self.metadata_index.request(file_item.path)
+        self._set_preview_lines(["Loading..."])
+
+    def _poll_preview(self):
+        """計算待ちの回路概要が揃ったらプレビューを更新"""
+        file_item = self._preview_item
+        if file_item is None:
+            return
+        metadata = self.metadata_index.get(file_item.path)
+        if metadata is not None:
+            self._preview_item = None
+            self._set_preview_lines(self._format_preview(file_item, metadata))
+
+    def _format_preview(self, file_item, metadata: dict):
+        """回路概要をプレビュー用の行リストに変換"""
+        lines = [
+            f"Modified: {datetime.fromtimestamp(metadata['modified']).strftime('%Y-%m-%d %H:%M')}",
+            f"Size: {file_item.size:,} bytes",
+        ]
+        if "error" in metadata:
+            return lines + [f"Error: {metadata['error']}"]
+
+        if metadata.get('created'):
+            lines.append(f"Created: {metadata['created']}")
+        lines.append(f"Grid: {metadata['rows']} rows x {metadata['cols']} cols")
+        lines.append(f"Devices: {metadata['device_total']}")
+        for device_type, count in metadata['device_counts'].items():
+            lines.append(f" {device_type}: {count}")
+        addresses = metadata['addresses']
+        lines.append(f"Addresses: {len(addresses)}")
+        for i in range(0, len(addresses), 5):
+            lines.append(" " + " ".join(addresses[i:i + 5]))
+        return lines
+
+    def _set_preview_lines(self, lines):
+        preview_widget = self._find_widget("IDC_PREVIEW")
+        if preview_widget:
+            preview_widget.set_items(lines)
+
     def _setup_event_handlers(self):
         """イベントハンドラーを設定"""
         file_list_widget = self._find_widget("IDC_FILE_LIST")
@@ -139,10 +233,9 @@ class FileOpenDialogController(PyPlcDialogController):
 
     def handle_file_selection(self, selected_index: int):
         """ファイル選択時の処理（ダブルクリックモードでの選択のみ）"""
-        if selected_index < 0 or selected_index not in self.file_items_map:
+        selected_item = self._get_file_item(selected_index)
+        if selected_item is None:
             return
-            
-        selected_item = self.file_items_map[selected_index]
         
         # ダブルクリックモードでは、ファイルの場合のみファイル名を設定
         # ディレクトリの場合はダブルクリック待ち
@@ -151,13 +244,13 @@ class FileOpenDialogController(PyPlcDialogController):
             if filename_widget:
                 filename_widget.text = selected_item.name
                 print(f"Selected file: {selected_item.name}")
+            self._show_preview(selected_item)
     
     def handle_file_activation(self, selected_index: int):
         """ファイルアクティベート時の処理（実際の動作実行）"""
-        if selected_index < 0 or selected_index not in self.file_items_map:
+        selected_item = self._get_file_item(selected_index)
+        if selected_item is None:
             return
-            
-        selected_item = self.file_items_map[selected_index]
         
         if selected_item.is_directory:
             # ディレクトリの場合は移動
@@ -168,6 +261,7 @@ class FileOpenDialogController(PyPlcDialogController):
             if filename_widget:
                 filename_widget.text = selected_item.name
                 print(f"Activated file: {selected_item.name}")
+            self._show_preview(selected_item)
     
     def _navigate_to_directory(self, directory_path: str):
         """ディレクトリに移動"""
@@ -236,6 +330,10 @@ class FileOpenDialogController(PyPlcDialogController):
         if not self.active_dialog:
             return
             
+        # ディレクトリ一覧の取得結果・回路概要の計算結果を反映
+        self._poll_file_list()
+        self._poll_preview()
+
         # ボタンクリックのチェック
         self._check_button_clicks()
             
@@ -76,27 +76,54 @@ class FileSaveDialogController(PyPlcDialogController):
         if not file_list_widget:
             return
             
-        try:
-            # ディレクトリ内容を取得
-            file_items = self.file_manager.list_directory()
-            
-            # 表示用の文字列リストを作成
-            display_items = []
-            self.file_items_map = {}  # 表示インデックスと実際のFileItemのマッピング
-            
+        # ディレクトリ内容の取得をワーカースレッドで開始（結果はupdate()で順次反映）
+        # リストボックスは仮想モードで、表示範囲の項目だけ表示名を作る
+        self.file_items = []  # 表示インデックス順のFileItem
+        file_list_widget.set_data_source(lambda: len(self.file_items), self._get_file_display_names)
+        self._listing = self.file_manager.start_listing()
+        self._poll_file_list()
+
+    def _get_file_display_names(self, start: int, stop: int):
+        """リストボックスの表示範囲の表示名を返す（仮想モードのデータソース）"""
+        return [item.get_display_name() for item in self.file_items[start:stop]]
+
+    def _get_file_item(self, index: int):
+        """表示インデックスに対応するFileItemを取得"""
+        if 0 <= index < len(getattr(self, 'file_items', ())):
+            return self.file_items[index]
+        return None
+
+    def _poll_file_list(self):
+        """ワーカースレッドが取得した項目をリストボックスへ反映する"""
+        listing = getattr(self, '_listing', None)
+        if listing is None or listing.done:
+            return
+        file_list_widget = self._find_widget("IDC_FILE_LIST")
+        if not file_list_widget:
+            return
+
+        new_items, file_items = listing.poll()
+        if file_items is None:
+            # 取得途中: 取得済みの項目を末尾に追加
+            if new_items:
+                self.file_items.extend(new_items)
+                file_list_widget.refresh_data_source()
+            return
+
+        # 取得完了: 並び替え済みの一覧に置き換え（選択中の項目は維持）
+        selected = self._get_file_item(file_list_widget.selected_index)
+        self.file_items = file_items
+        file_list_widget.refresh_data_source()
+        file_list_widget.selected_index = -1
+        if selected is not None:
             for i, item in enumerate(file_items):
-                display_name = item.get_display_name()
-                display_items.append(display_name)
-                self.file_items_map[i] = item
-            
-            # リストボックスにアイテムを設定
-            file_list_widget.set_items(display_items)
-            
-            print(f"Loaded {len(display_items)} items from {self.file_manager.get_current_path()}")
-            
-        except Exception as e:
-            print(f"Error loading directory: {e}")
-            file_list_widget.set_items([f"Error: {str(e)}"])
+                if item.path == selected.path:
+                    file_list_widget.selected_index = i
+                    file_list_widget.scroll_to_item(i)
+                    break
+        self._last_selected_index = file_list_widget.selected_index
+
+        print(f"Loaded {len(file_items)} items from {listing.path}")
     
     def _setup_event_handlers(self):
         """イベントハンドラーを設定"""
@@ -119,10 +146,9 @@ class FileSaveDialogController(PyPlcDialogController):
 
     def handle_file_selection(self, selected_index: int):
         """ファイル選択時の処理（ダブルクリックモードでの選択のみ）"""
-        if selected_index < 0 or selected_index not in self.file_items_map:
+        selected_item = self._get_file_item(selected_index)
+        if selected_item is None:
             return
-            
-        selected_item = self.file_items_map[selected_index]
         
         # ダブルクリックモードでは、ファイルの場合のみファイル名を設定
         # ディレクトリの場合はダブルクリック待ち
@@ -137,10 +163,9 @@ class FileSaveDialogController(PyPlcDialogController):
     
     def handle_file_activation(self, selected_index: int):
         """ファイルアクティベート時の処理（実際の動作実行）"""
-        if selected_index < 0 or selected_index not in self.file_items_map:
+        selected_item = self._get_file_item(selected_index)
+        if selected_item is None:
             return
-            
-        selected_item = self.file_items_map[selected_index]
         
         if selected_item.is_directory:
             # ディレクトリの場合は移動
@@ -285,6 +310,9 @@ class FileSaveDialogController(PyPlcDialogController):
             return
             
             
+        # ディレクトリ一覧の取得結果を反映
+        self._poll_file_list()
+
         # ボタンクリックのチェック
         self._check_button_clicks()
             
@@ -2,28 +2,69 @@
 ファイルオープンダイアログ用のファイルシステムユーティリティ
 
 シンプルなファイル操作とディレクトリ一覧機能を提供
+- ディレクトリ一覧は os.scandir で取得し、1エントリにつき最大1回のstatで済ませる
+- 一覧はディレクトリごとに更新時刻（mtime）付きでキャッシュし、変更がなければ再走査しない
+- start_listing() はワーカースレッドで走査し、取得済みの項目を poll() で少しずつ受け取れる
 """
+import fnmatch
+import logging
 import os
-from typing import List, Dict, Optional
-from pathlib import Path
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ワーカースレッドが1回に公開する項目数
+LISTING_BATCH_SIZE = 64
+
 
 class FileItem:
     """ファイルまたはディレクトリの情報を保持するクラス"""
-    def __init__(self, path: str):
+    def __init__(self, path: str, is_directory: Optional[bool] = None, size: Optional[int] = None):
+        """
+        Args:
+            path: フルパス
+            is_directory: 種別が判明している場合に指定（未指定時はファイルシステムに問い合わせる）
+            size: ファイルサイズが判明している場合に指定
+        """
         self.path = path
         self.name = os.path.basename(path)
-        self.is_directory = os.path.isdir(path)
-        self.is_file = os.path.isfile(path)
-        
+        if is_directory is None:
+            self.is_directory = os.path.isdir(path)
+            self.is_file = os.path.isfile(path)
+        else:
+            self.is_directory = is_directory
+            self.is_file = not is_directory
+
         # サイズ情報
-        try:
-            if self.is_file:
-                self.size = os.path.getsize(path)
-            else:
+        if size is not None:
+            self.size = size
+        else:
+            try:
+                if self.is_file:
+                    self.size = os.path.getsize(path)
+                else:
+                    self.size = 0
+            except OSError:
                 self.size = 0
-        except:
-            self.size = 0
-    
+
+    @classmethod
+    def from_entry(cls, entry: os.DirEntry) -> Optional["FileItem"]:
+        """
+        os.scandir のエントリから生成する（ディレクトリ・通常ファイル以外はNone）
+
+        Returns:
+            Optional[FileItem]: 生成したFileItem（アクセスできない場合もNone）
+        """
+        try:
+            if entry.is_dir():
+                return cls(entry.path, is_directory=True, size=0)
+            if entry.is_file():
+                return cls(entry.path, is_directory=False, size=entry.stat().st_size)
+        except OSError:
+            pass
+        return None
+
     def get_display_name(self) -> str:
         """表示用の名前を取得（ディレクトリには[DIR]プレフィックス）"""
         if self.is_directory:
@@ -31,6 +72,162 @@ class FileItem:
         else:
             return self.name
 
+
+def _sort_items(items: List[FileItem]) -> List[FileItem]:
+    """ディレクトリを先に、それぞれ名前順に並べる（従来の表示順）"""
+    directories = sorted((item for item in items if item.is_directory), key=lambda item: item.name)
+    files = sorted((item for item in items if not item.is_directory), key=lambda item: item.name)
+    return directories + files
+
+
+class DirectoryCache:
+    """
+    ディレクトリ一覧のキャッシュ（パス → (mtime, 全項目)）
+    ファイルの追加・削除・名前変更でディレクトリのmtimeが変わるため、mtime一致なら再走査しない
+    開く・保存ダイアログで共有するため、スレッドセーフにする
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, List[FileItem]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, path: str) -> Optional[List[FileItem]]:
+        """キャッシュが有効な場合は全項目（並び替え済み）を返す"""
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached is None:
+            return None
+        mtime = self._mtime(path)
+        if mtime is None or mtime != cached[0]:
+            return None
+        return cached[1]
+
+    def put(self, path: str, mtime: Optional[int], items: List[FileItem]) -> None:
+        if mtime is None:
+            return
+        with self._lock:
+            self._entries[path] = (mtime, items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+directory_cache = DirectoryCache()
+
+
+def scan_directory(path: str, cancel_event: Optional[threading.Event] = None,
+                   on_batch=None) -> Optional[List[FileItem]]:
+    """
+    ディレクトリを走査して全項目を返す（結果はキャッシュに登録）
+
+    Args:
+        path: 走査するディレクトリ
+        cancel_event: セットされた場合は走査を中断する
+        on_batch: LISTING_BATCH_SIZE件ごとに on_batch(items) を呼び出す（途中経過の通知）
+
+    Returns:
+        Optional[List[FileItem]]: 並び替え済みの全項目（中断時None）
+    """
+    cached = directory_cache.get(path)
+    if cached is not None:
+        logger.debug("Directory cache hit: %s", path)
+        if on_batch:
+            on_batch(cached)
+        return cached
+
+    mtime = DirectoryCache._mtime(path)  # 走査中の変更を見逃さないよう走査前に取得
+    items: List[FileItem] = []
+    batch: List[FileItem] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if cancel_event is not None and cancel_event.is_set():
+                    logger.debug("Directory scan cancelled: %s", path)
+                    return None
+                item = FileItem.from_entry(entry)
+                if item is None:
+                    continue
+                items.append(item)
+                if on_batch:
+                    batch.append(item)
+                    if len(batch) >= LISTING_BATCH_SIZE:
+                        on_batch(batch)
+                        batch = []
+    except OSError as e:
+        logger.warning("Cannot list directory %s: %s", path, e)  # アクセス権限エラーなどは空一覧として扱う
+        items = []
+    if batch:
+        on_batch(batch)
+
+    items = _sort_items(items)
+    directory_cache.put(path, mtime, items)
+    logger.debug("Scanned %d entries in %s", len(items), path)
+    return items
+
+
+class DirectoryListing:
+    """
+    ワーカースレッドによるディレクトリ一覧の取得
+    UIスレッドは毎フレーム poll() を呼び出し、新たに取得できた項目（フィルター適用済み）を受け取る
+    """
+
+    def __init__(self, path: str, item_filter):
+        """
+        Args:
+            path: 走査するディレクトリ
+            item_filter: 表示対象か判定する関数 item_filter(FileItem) -> bool
+        """
+        self.path = path
+        self._item_filter = item_filter
+        self._lock = threading.Lock()
+        self._pending: List[FileItem] = []
+        self._result: Optional[List[FileItem]] = None
+        self._cancel_event = threading.Event()
+        self.done = False
+
+        self._thread = threading.Thread(target=self._run, name="DirectoryListing", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        result = scan_directory(self.path, self._cancel_event, self._publish)
+        with self._lock:
+            self._result = result if result is not None else []
+
+    def _publish(self, items: List[FileItem]) -> None:
+        with self._lock:
+            self._pending.extend(items)
+
+    def cancel(self) -> None:
+        """走査を中断する（別ディレクトリへの移動時など）"""
+        self._cancel_event.set()
+
+    def poll(self) -> Tuple[List[FileItem], Optional[List[FileItem]]]:
+        """
+        取得済みの項目を受け取る
+
+        Returns:
+            Tuple[List[FileItem], Optional[List[FileItem]]]:
+                (前回以降に取得した項目（走査順）, 完了時は並び替え済みの全項目・未完了時None)
+        """
+        if self.done:
+            return [], None
+        with self._lock:
+            pending, self._pending = self._pending, []
+            result = self._result
+        if result is not None:
+            self.done = True
+            return [], [item for item in result if self._item_filter(item)]
+        return [item for item in pending if self._item_filter(item)], None
+
+
 class FileManager:
     """ファイルマネージャークラス"""
     def __init__(self, initial_path: Optional[str] = None):
@@ -41,79 +238,72 @@ class FileManager:
             self.current_path = os.getcwd()  # カレントディレクトリから開始
         self.file_filters = ["*.*"]  # デフォルトはすべてのファイル
         self.show_directories = True  # ディレクトリ表示フラグ
-    
+        self._listing: Optional[DirectoryListing] = None
+
     def get_current_path(self) -> str:
         """現在のパスを取得"""
         return self.current_path
-    
+
     def set_current_path(self, path: str) -> bool:
         """現在のパスを設定"""
         try:
             if os.path.exists(path) and os.path.isdir(path):
                 self.current_path = os.path.abspath(path)
                 return True
-        except:
+        except OSError:
             pass
         return False
-    
+
     def get_parent_directory(self) -> Optional[str]:
         """親ディレクトリのパスを取得"""
         parent = os.path.dirname(self.current_path)
         if parent != self.current_path:  # ルートディレクトリでない場合
             return parent
         return None
-    
+
     def go_up(self) -> bool:
         """親ディレクトリに移動"""
         parent = self.get_parent_directory()
         if parent:
             return self.set_current_path(parent)
         return False
-    
+
     def list_directory(self) -> List[FileItem]:
-        """現在のディレクトリの内容を取得"""
-        items = []
-        try:
-            # ディレクトリとファイルを分けて取得
-            entries = os.listdir(self.current_path)
-            
-            # ディレクトリを先に追加（表示フラグがTrueの場合のみ）
-            if self.show_directories:
-                for entry in sorted(entries):
-                    full_path = os.path.join(self.current_path, entry)
-                    if os.path.isdir(full_path):
-                        items.append(FileItem(full_path))
-                        print(f"[DEBUG] Added directory: {entry}")
-            else:
-                print(f"[DEBUG] Directories hidden by user setting")
-            
-            # ファイルを後に追加
-            for entry in sorted(entries):
-                full_path = os.path.join(self.current_path, entry)
-                if os.path.isfile(full_path):
-                    # フィルターチェック
-                    if self._matches_filter(entry):
-                        items.append(FileItem(full_path))
-        except:
-            pass  # アクセス権限エラーなどは無視
-        
-        return items
-    
+        """現在のディレクトリの内容を取得（同期版。キャッシュが有効なら再走査しない）"""
+        items = scan_directory(self.current_path) or []
+        return [item for item in items if self._is_visible(item)]
+
+    def start_listing(self) -> DirectoryListing:
+        """
+        現在のディレクトリの一覧取得をワーカースレッドで開始する（実行中の取得は中断）
+
+        Returns:
+            DirectoryListing: poll() で結果を受け取るハンドル
+        """
+        if self._listing is not None and not self._listing.done:
+            self._listing.cancel()
+        self._listing = DirectoryListing(self.current_path, self._is_visible)
+        return self._listing
+
+    def _is_visible(self, item: FileItem) -> bool:
+        """表示設定とフィルターに基づき表示対象か判定する"""
+        if item.is_directory:
+            return self.show_directories
+        return self._matches_filter(item.name)
+
     def _matches_filter(self, filename: str) -> bool:
         """ファイルがフィルターにマッチするかチェック"""
-        import fnmatch
+        lower_name = filename.lower()
         for filter_pattern in self.file_filters:
-            if fnmatch.fnmatch(filename.lower(), filter_pattern.lower()):
-                print(f"[DEBUG] File '{filename}' matches filter '{filter_pattern}'")
+            if fnmatch.fnmatch(lower_name, filter_pattern.lower()):
                 return True
-        print(f"[DEBUG] File '{filename}' does not match any filters: {self.file_filters}")
         return False
-    
+
     def set_file_filter(self, filters: List[str]):
         """ファイルフィルターを設定"""
         self.file_filters = filters if filters else ["*.*"]
-        print(f"[DEBUG] FileManager filters set to: {self.file_filters}")
-    
+        logger.debug("FileManager filters set to: %s", self.file_filters)
+
     def get_display_path(self) -> str:
         """表示用のパスを取得（短縮版）"""
         path = self.current_path
@@ -122,4 +312,4 @@ class FileManager:
             parts = path.split(os.sep)
             if len(parts) > 3:
                 return os.sep.join(["...", parts[-2], parts[-1]])
-        return path
\ No newline at end of file
+        return path
@@ -3,6 +3,7 @@
 
 ダイアログシステムの全体的な設定を管理
 """
+import logging
 
 class SystemSettings:
     """システム設定を管理するシングルトンクラス"""
@@ -29,6 +30,10 @@ class SystemSettings:
         # UI設定
         self.double_click_interval = 0.5  # 秒
         
+        # ログ設定（pyDialogManager配下のロガーに適用）
+        self.log_level = "WARNING"
+        logging.getLogger("pyDialogManager").setLevel(self.log_level)
+        
         self._initialized = True
     
     def set_click_mode(self, mode: str):
@@ -69,6 +74,15 @@ class SystemSettings:
         else:
             print(f"Invalid double click interval: {interval}")
     
+    def set_log_level(self, level: str):
+        """ログレベルを設定（"DEBUG" / "INFO" / "WARNING" / "ERROR"）"""
+        level = level.upper()
+        if level in ["DEBUG", "INFO", "WARNING", "ERROR"]:
+            self.log_level = level
+            logging.getLogger("pyDialogManager").setLevel(level)
+        else:
+            print(f"Invalid log level: {level}")
+    
     def get_settings_info(self) -> str:
         """設定情報の文字列を取得"""
         mode_text = "Single-click" if self.is_single_click_mode() else "Double-click"
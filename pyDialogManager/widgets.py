@@ -4,6 +4,27 @@ from typing import List, Optional
 from .system_settings import settings
 
 
+# pyxel色定数マッピング（"COLOR_xxx" → pyxel.COLOR_xxx）
+COLOR_MAP = {
+    "COLOR_BLACK": pyxel.COLOR_BLACK,
+    "COLOR_NAVY": pyxel.COLOR_NAVY,
+    "COLOR_PURPLE": pyxel.COLOR_PURPLE,
+    "COLOR_GREEN": pyxel.COLOR_GREEN,
+    "COLOR_BROWN": pyxel.COLOR_BROWN,
+    "COLOR_DARK_BLUE": pyxel.COLOR_DARK_BLUE,
+    "COLOR_LIGHT_BLUE": pyxel.COLOR_LIGHT_BLUE,
+    "COLOR_WHITE": pyxel.COLOR_WHITE,
+    "COLOR_RED": pyxel.COLOR_RED,
+    "COLOR_ORANGE": pyxel.COLOR_ORANGE,
+    "COLOR_YELLOW": pyxel.COLOR_YELLOW,
+    "COLOR_LIME": pyxel.COLOR_LIME,
+    "COLOR_CYAN": pyxel.COLOR_CYAN,
+    "COLOR_GRAY": pyxel.COLOR_GRAY,
+    "COLOR_PINK": pyxel.COLOR_PINK,
+    "COLOR_PEACH": pyxel.COLOR_PEACH,
+}
+
+
 def resolve_color(color_value):
     """
     色定義を解決する関数
@@ -23,37 +44,31 @@ def resolve_color(color_value):
     
     # 文字列の場合、COLOR_xxxからpyxel.COLOR_xxxに変換
     if isinstance(color_value, str) and color_value.startswith("COLOR_"):
-        color_name = color_value  # "COLOR_RED" など
-        
-        # pyxel色定数マッピング
-        color_map = {
-            "COLOR_BLACK": pyxel.COLOR_BLACK,
-            "COLOR_NAVY": pyxel.COLOR_NAVY, 
-            "COLOR_PURPLE": pyxel.COLOR_PURPLE,
-            "COLOR_GREEN": pyxel.COLOR_GREEN,
-            "COLOR_BROWN": pyxel.COLOR_BROWN,
-            "COLOR_DARK_BLUE": pyxel.COLOR_DARK_BLUE,
-            "COLOR_LIGHT_BLUE": pyxel.COLOR_LIGHT_BLUE,
-            "COLOR_WHITE": pyxel.COLOR_WHITE,
-            "COLOR_RED": pyxel.COLOR_RED,
-            "COLOR_ORANGE": pyxel.COLOR_ORANGE,
-            "COLOR_YELLOW": pyxel.COLOR_YELLOW,
-            "COLOR_LIME": pyxel.COLOR_LIME,
-            "COLOR_CYAN": pyxel.COLOR_CYAN,
-            "COLOR_GRAY": pyxel.COLOR_GRAY,
-            "COLOR_PINK": pyxel.COLOR_PINK,
-            "COLOR_PEACH": pyxel.COLOR_PEACH,
-        }
-        
-        return color_map.get(color_name, pyxel.COLOR_WHITE)  # デフォルトは白
+        return COLOR_MAP.get(color_value, pyxel.COLOR_WHITE)  # デフォルトは白
     
     # その他の場合は白をデフォルトに
     return pyxel.COLOR_WHITE
 
+
+def resolve_definition_colors(definition):
+    """
+    ダイアログ／ウィジェット定義内の色指定（"color" / "xxx_color"）を数値に置き換える
+    dialogs.json 読み込み時に1回だけ呼び出し、ウィジェット生成時の文字列解決を不要にする
+
+    Args:
+        definition: ダイアログまたはウィジェットの定義（dict、その場で書き換える）
+    """
+    for key, value in definition.items():
+        if key == "color" or key.endswith("_color"):
+            definition[key] = resolve_color(value)
+    for widget_def in definition.get("widgets", []):
+        resolve_definition_colors(widget_def)
+
 class WidgetBase:
     """すべてのウィジェットの基底クラス"""
     def __init__(self, dialog, definition):
         self.dialog = dialog
+        self.definition = definition
         self.id = definition.get("id")
         self.x = definition.get("x", 0)
         self.y = definition.get("y", 0)
@@ -61,6 +76,15 @@ class WidgetBase:
         self.height = definition.get("height", 0)
         self.text = definition.get("text", "")
 
+    def reset(self):
+        """
+        状態を定義直後に戻す（ダイアログ再利用時に呼び出される）
+        コントローラーが設定したイベントハンドラー（on_xxx）も解除する
+        """
+        self.text = self.definition.get("text", "")
+        for name in [name for name in self.__dict__ if name.startswith("on_")]:
+            delattr(self, name)
+
     def update(self):
         pass
 
@@ -98,6 +122,11 @@ class ButtonWidget(WidgetBase):
         self.pressed_color = resolve_color(definition.get("pressed_color", "COLOR_DARK_BLUE"))
         self.border_color = resolve_color(definition.get("border_color", "COLOR_BLACK"))
 
+    def reset(self):
+        super().reset()
+        self.is_hover = False
+        self.is_pressed = False
+
     def update(self):
         # マウスカーソルがボタンの領域内にあるかチェック
         mx, my = pyxel.mouse_x, pyxel.mouse_y
@@ -155,6 +184,13 @@ class TextBoxWidget(WidgetBase):
         if self.height == 0:
             self.height = 20
 
+    def reset(self):
+        super().reset()
+        self.has_focus = False
+        self.cursor_pos = len(self.text)
+        self.cursor_visible = True
+        self.last_blink_time = time.time()
+
     def update(self):
         # マウスクリックでフォーカス取得
         mx, my = pyxel.mouse_x, pyxel.mouse_y
@@ -281,10 +317,21 @@ class TextBoxWidget(WidgetBase):
             pyxel.line(cursor_x, cursor_y, cursor_x, cursor_y + self.height - 4, pyxel.COLOR_BLACK)  # 黒いカーソル
 
 class ListBoxWidget(WidgetBase):
-    """複数項目から選択可能なリストボックスウィジェット"""
+    """
+    複数項目から選択可能なリストボックスウィジェット
+    - 通常モード: set_items() で全項目のリストを渡す
+    - 仮想モード: set_data_source() で項目数と表示範囲の項目を返すコールバックを渡す
+      （表示範囲の項目だけを取得するため、項目数に関係なく一定コストで表示・スクロールできる）
+    """
     def __init__(self, dialog, definition):
         super().__init__(dialog, definition)
         self.items = []  # 表示項目のリスト
+        
+        # 仮想モード用データソース（Noneなら通常モード）
+        self.count_source = None  # count_source() -> 項目数
+        self.items_source = None  # items_source(start, stop) -> 表示項目のリスト
+        self._window_start = 0  # 取得済み表示範囲の先頭インデックス
+        self._window_items = None  # 取得済み表示範囲の項目（Noneなら未取得）
         self.selected_index = -1  # 選択されたアイテムのインデックス
         self.scroll_offset = 0  # スクロールオフセット
         self.item_height = definition.get("item_height", 12)  # 1項目の高さ
@@ -304,17 +351,70 @@ class ListBoxWidget(WidgetBase):
         if self.height == 0:
             self.height = 100
 
+    def reset(self):
+        super().reset()
+        self.set_items([])
+        self.last_click_time = 0
+        self.last_clicked_index = -1
+        self.hovered_scroll_button = None
+
     def set_items(self, items):
-        """リストアイテムを設定"""
+        """リストアイテムを設定（仮想モードは解除）"""
         self.items = items
+        self.count_source = None
+        self.items_source = None
+        self._window_items = None
         self.selected_index = -1
         self.scroll_offset = 0
         self.hover_index = -1
 
+    def set_data_source(self, count_source, items_source):
+        """
+        仮想モードに切り替える
+
+        Args:
+            count_source: 項目数を返す関数 count_source() -> int
+            items_source: 指定範囲の表示項目を返す関数 items_source(start, stop) -> list
+        """
+        self.items = []
+        self.count_source = count_source
+        self.items_source = items_source
+        self._window_items = None
+        self.selected_index = -1
+        self.scroll_offset = 0
+        self.hover_index = -1
+
+    def refresh_data_source(self):
+        """データソースの内容が変わったことを通知する（表示範囲を再取得）"""
+        self._window_items = None
+
+    def get_item_count(self):
+        """項目数を取得"""
+        if self.count_source is not None:
+            return self.count_source()
+        return len(self.items)
+
+    def get_item(self, index):
+        """指定インデックスの項目を取得（仮想モードでは表示範囲単位で取得してキャッシュ）"""
+        if self.items_source is None:
+            return self.items[index]
+        window = self._window_items
+        if window is None or not self._window_start <= index < self._window_start + len(window):
+            if self.scroll_offset <= index < self.scroll_offset + self.visible_items:
+                start = self.scroll_offset
+            else:
+                start = index
+            window = list(self.items_source(start, min(start + self.visible_items, self.get_item_count())))
+            self._window_start = start
+            self._window_items = window
+            if index - start >= len(window):
+                return None
+        return window[index - self._window_start]
+
     def get_selected_item(self):
         """選択されたアイテムを取得"""
-        if 0 <= self.selected_index < len(self.items):
-            return self.items[self.selected_index]
+        if 0 <= self.selected_index < self.get_item_count():
+            return self.get_item(self.selected_index)
         return None
 
     def update(self):
@@ -323,7 +423,7 @@ class ListBoxWidget(WidgetBase):
         dx, dy = self.dialog.x, self.dialog.y
         
         # スクロールボタンの処理（項目数が表示可能数を超える場合）
-        if len(self.items) > self.visible_items:
+        if self.get_item_count() > self.visible_items:
             button_width = 16
             button_height = 14
             scroll_area_x = dx + self.x + self.width - button_width
@@ -370,7 +470,7 @@ class ListBoxWidget(WidgetBase):
                     return
         
         # リストボックス内でのマウス処理（スクロールボタン領域を除く）
-        list_width = self.width - (16 if len(self.items) > self.visible_items else 0)
+        list_width = self.width - (16 if self.get_item_count() > self.visible_items else 0)
         if (dx + self.x <= mx < dx + self.x + list_width and
             dy + self.y <= my < dy + self.y + self.height):
             
@@ -378,7 +478,7 @@ class ListBoxWidget(WidgetBase):
             list_y = my - (dy + self.y + 2)  # パディングを考慮
             item_index = list_y // self.item_height + self.scroll_offset
             
-            if 0 <= item_index < len(self.items):
+            if 0 <= item_index < self.get_item_count():
                 self.hover_index = item_index
                 
                 # クリックで選択
@@ -398,7 +498,7 @@ class ListBoxWidget(WidgetBase):
                     # クリックモードに応じて処理を分岐
                     if settings.is_single_click_mode():
                         # シングルクリックモード: 即座にアクション実行
-                        print(f"Single-click selected: {self.items[item_index]}")
+                        print(f"Single-click selected: {self.get_item(item_index)}")
                         if hasattr(self, 'on_item_activated'):
                             self.on_item_activated(self.selected_index)
                         
@@ -409,12 +509,12 @@ class ListBoxWidget(WidgetBase):
                     else:  # ダブルクリックモード
                         if is_double_click:
                             # ダブルクリック: アクション実行
-                            print(f"Double-click activated: {self.items[item_index]}")
+                            print(f"Double-click activated: {self.get_item(item_index)}")
                             if hasattr(self, 'on_item_activated'):
                                 self.on_item_activated(self.selected_index)
                         else:
                             # シングルクリック: 選択のみ
-                            print(f"Selected item: {self.items[item_index]}")
+                            print(f"Selected item: {self.get_item(item_index)}")
                             if old_selection != self.selected_index and hasattr(self, 'on_selection_changed'):
                                 self.on_selection_changed(self.selected_index)
                     
@@ -434,7 +534,7 @@ class ListBoxWidget(WidgetBase):
             self.scroll_offset = index - self.visible_items + 1
         
         # スクロール範囲制限
-        max_scroll = max(0, len(self.items) - self.visible_items)
+        max_scroll = max(0, self.get_item_count() - self.visible_items)
         self.scroll_offset = max(0, min(self.scroll_offset, max_scroll))
 
     def scroll_up(self):
@@ -444,7 +544,7 @@ class ListBoxWidget(WidgetBase):
 
     def scroll_down(self):
         """下にスクロール"""
-        max_scroll = max(0, len(self.items) - self.visible_items)
+        max_scroll = max(0, self.get_item_count() - self.visible_items)
         if self.scroll_offset < max_scroll:
             self.scroll_offset += 1
 
@@ -454,7 +554,7 @@ class ListBoxWidget(WidgetBase):
 
     def scroll_down_fast(self):
         """下に5行スクロール"""
-        max_scroll = max(0, len(self.items) - self.visible_items)
+        max_scroll = max(0, self.get_item_count() - self.visible_items)
         self.scroll_offset = min(max_scroll, self.scroll_offset + 5)
 
     def draw(self):
@@ -466,13 +566,14 @@ class ListBoxWidget(WidgetBase):
         pyxel.rectb(x, y, self.width, self.height, pyxel.COLOR_BLACK)
         
         # 項目を描画
+        item_count = self.get_item_count()
         for i in range(self.visible_items):
             item_index = i + self.scroll_offset
-            if item_index >= len(self.items):
+            if item_index >= item_count:
                 break
                 
             item_y = y + 2 + i * self.item_height
-            item = self.items[item_index]
+            item = self.get_item(item_index)
             
             # 選択状態の背景
             if item_index == self.selected_index:
@@ -492,7 +593,7 @@ class ListBoxWidget(WidgetBase):
             pyxel.text(x + 4, item_y + 2, display_text, text_color)
         
         # 上下スクロールボタン表示（項目数が表示可能数を超える場合）
-        if len(self.items) > self.visible_items:
+        if item_count > self.visible_items:
             self._draw_scroll_buttons(x, y)
 
     def _draw_scroll_buttons(self, x, y):
@@ -581,6 +682,13 @@ class DropdownWidget(WidgetBase):
         
         # イベントハンドラー（動的属性システム）
         # hasattr パターンでイベントハンドラーを実装
+
+    def reset(self):
+        super().reset()
+        self.selected_index = self.definition.get("selected_index", -1)
+        self.is_open = False
+        self.is_hover = False
+        self.hover_item_index = -1
         
     def get_selected_value(self) -> Optional[str]:
         """現在選択されている値を取得"""
@@ -778,6 +886,11 @@ class CheckboxWidget(WidgetBase):
             self.width = self.checkbox_size + 4 + text_width
         if self.height == 0:
             self.height = max(self.checkbox_size, pyxel.FONT_HEIGHT)
+
+    def reset(self):
+        super().reset()
+        self.is_checked = self.definition.get("checked", False)
+        self.is_hover = False
     
     def get_checked(self) -> bool:
         """チェック状態を取得"""
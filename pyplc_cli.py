@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+PyPlc Ver3 Headless CLI Runner
+作成日: 2025-08-24
+目標: pyxelを起動せずに回路ファイルを一括実行し、最終値・トレースを出力する（CI回帰テスト用）
+
+使用例:
+    python pyplc_cli.py Sumple001.csv --scans 100 --trace Y001
+    python pyplc_cli.py circuits/ --seconds 5 --schedule inputs.json --output results.json --jobs 4
+    python pyplc_cli.py Sumple001.csv --seconds 60 --modbus-port 5020   # Modbus-TCPで公開しながら実時間実行
+    python pyplc_cli.py Sumple001.csv --scans 1000 --shm pyplc_io --sync lockstep   # プラントモデルと同期実行
+    python pyplc_cli.py tank.csv --seconds 30 --plant tank   # 組み込みプラントモデルをプロセス内で実行
+    python pyplc_cli.py Sumple001.csv --seconds 5 --scan-time 50   # スキャン周期を指定（既定はGUIと同じ）
+
+終了コード:
+    0: 全回路成功 / 1: 期待値不一致あり / 2: 読み込み・実行エラーあり（引数エラーも2）
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+EXIT_OK = 0
+EXIT_EXPECTATION_FAILED = 1
+EXIT_ERROR = 2
+
+CIRCUIT_EXTENSIONS = (".csv", ".pyplc")
+
+
+def collect_circuit_files(paths: List[str]) -> List[str]:
+    """引数のファイル・ディレクトリから回路ファイル一覧を作成する（ディレクトリは直下の.csv/.pyplc）"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                files.extend(sorted(entry.path for entry in entries
+                                    if entry.is_file() and entry.name.lower().endswith(CIRCUIT_EXTENSIONS)))
+        else:
+            files.append(path)
+    return [os.path.abspath(f) for f in files]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run PyPlc circuits without display.")
+    parser.add_argument("paths", nargs="+", help="circuit files (.csv/.pyplc) or directories")
+    length = parser.add_mutually_exclusive_group()
+    length.add_argument("--scans", type=int, default=None, help="number of scans to run (default: 100)")
+    length.add_argument("--seconds", type=float, default=None, help="simulated seconds to run")
+    parser.add_argument("--schedule", help="input schedule JSON (default: <circuit>.schedule.json if present)")
+    parser.add_argument("--trace", action="append", metavar="ADDR",
+                        help="record changes of ADDR per scan (repeatable, '*' for all)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--jobs", type=int, default=0, help="parallel worker processes (default: CPU count)")
+    parser.add_argument("--modbus-port", type=int, default=None,
+                        help="serve the device image over Modbus-TCP on localhost and run scans in real time "
+                             "(single circuit only)")
+    parser.add_argument("--shm", metavar="NAME",
+                        help="share the X/Y/M/D image with a plant model via shared memory NAME (single circuit only)")
+    parser.add_argument("--sync", choices=("free", "lockstep"), default="free",
+                        help="shared memory synchronization: free-running real time or lockstep with the plant")
+    parser.add_argument("--plant", action="append", metavar="MODEL",
+                        help="run an in-process plant model each scan: conveyor, tank, motor or module:Class "
+                             "(repeatable; parameters via the schedule's 'plants' entry)")
+    parser.add_argument("--scan-time", type=int, default=None, metavar="MS",
+                        help="main scan period in ms, clamped to the GUI's range "
+                             "(default: PLCConfig.DEFAULT_SCAN_TIME_MS, same as the GUI)")
+    return parser
+
+
+def print_result(result) -> None:
+    """1回路分の結果を標準出力へ表示する"""
+    status = "OK" if result.passed else ("ERROR" if result.error else "FAIL")
+    print(f"[{status}] {result.filename} ({result.scans} scans)")
+    stats = result.statistics
+    if stats:
+        print(f"  scan avg={stats['scan_avg_ms']}ms max={stats['scan_max_ms']}ms "
+              f"overruns={stats.get('overruns', 0)}{' WDT' if stats.get('watchdog_tripped') else ''}")
+        for task in stats.get("tasks", []):
+            print(f"  task {task['name']} rows {task['rows'][0]}-{task['rows'][1]} every {task['period_ms']}ms: "
+                  f"scans={task['scans']} avg={task['scan_avg_ms']}ms max={task['scan_max_ms']}ms "
+                  f"overruns={task['overruns']}{' WDT' if task['watchdog_tripped'] else ''}")
+        for plant in stats.get("plants", []):
+            print(f"  plant {plant['model']}: avg={plant['avg_ms']}ms max={plant['max_ms']}ms total={plant['total_ms']}ms")
+    if result.error:
+        print(f"  {result.error}")
+    for failure in result.failures:
+        print(f"  {failure}")
+    for address, entry in result.values.items():
+        value = f" value={entry['value']}" if "value" in entry else ""
+        print(f"  {address}: {'ON' if entry['state'] else 'OFF'}{value}")
+    for scan, address, state, value in result.trace:
+        print(f"  trace scan={scan} {address}={'ON' if state else 'OFF'} value={value}")
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # 相対パスは呼び出し時のカレントディレクトリ基準で解決しておく
+    circuit_files = collect_circuit_files(args.paths)
+    schedule_filename = os.path.abspath(args.schedule) if args.schedule else None
+    output_filename = os.path.abspath(args.output) if args.output else None
+    if not circuit_files:
+        print("No circuit files found.", file=sys.stderr)
+        return EXIT_ERROR
+    if (args.modbus_port is not None or args.shm) and len(circuit_files) != 1:
+        print("--modbus-port / --shm require exactly one circuit file.", file=sys.stderr)
+        return EXIT_ERROR
+
+    # sprites.json等の相対パス参照はmain.pyと同じくスクリプト配置ディレクトリ基準
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from core.plc_runtime import DEFAULT_SCAN_TIME_MS, run_circuit_file, scans_for_seconds
+    from core.scan_scheduler import clamp_scan_time
+
+    scan_time_ms = clamp_scan_time(args.scan_time) if args.scan_time is not None else DEFAULT_SCAN_TIME_MS
+    if args.seconds is not None:
+        scans = scans_for_seconds(args.seconds, scan_time_ms)
+    else:
+        scans = args.scans if args.scans is not None else 100
+
+    jobs = args.jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(circuit_files))
+    task_args = [(f, scans, schedule_filename, args.trace, None, None, "free", args.plant, scan_time_ms)
+                 for f in circuit_files]
+    if args.modbus_port is not None or args.shm:
+        results = [run_circuit_file(circuit_files[0], scans, schedule_filename, args.trace,
+                                    modbus_port=args.modbus_port, shm_name=args.shm, sync_mode=args.sync,
+                                    plant_specs=args.plant, scan_time_ms=scan_time_ms)]
+    elif jobs <= 1:
+        results = [run_circuit_file(*task) for task in task_args]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(run_circuit_file, *zip(*task_args)))
+
+    for result in results:
+        print_result(result)
+
+    if output_filename:
+        with open(output_filename, 'w', encoding='utf-8') as f:
+            json.dump([result.to_dict() for result in results], f, indent=2, ensure_ascii=False)
+
+    passed = sum(1 for result in results if result.passed)
+    print(f"{passed}/{len(results)} circuits passed")
+    if any(result.error for result in results):
+        return EXIT_ERROR
+    if passed != len(results):
+        return EXIT_EXPECTATION_FAILED
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
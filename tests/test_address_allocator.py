@@ -0,0 +1,77 @@
+"""
+AddressAllocator のテスト（最小空き番号・解放・重複使用・GridSystem連携）
+"""
+
+from config import DeviceType
+from core.address_allocator import AddressAllocator, LAST_NUMBER
+from core.grid_system import GridSystem
+
+
+def test_allocates_lowest_free_number():
+    allocator = AddressAllocator()
+    assert allocator.next_free_address("X") == "X001"
+
+    allocator.acquire("X001")
+    allocator.acquire("X002")
+    allocator.acquire("X004")
+    assert allocator.next_free_address("X") == "X003"
+    assert allocator.next_free_address("Y") == "Y001"
+
+
+def test_released_number_is_reused_first():
+    allocator = AddressAllocator()
+    for number in range(1, 6):
+        allocator.acquire(f"M{number:03d}")
+    allocator.release("M004")
+    allocator.release("M002")
+
+    assert allocator.next_free_address("M") == "M002"
+    allocator.acquire("M002")
+    assert allocator.next_free_address("M") == "M004"
+    allocator.acquire("M004")
+    assert allocator.next_free_address("M") == "M006"
+
+
+def test_address_shared_by_several_devices_stays_used():
+    allocator = AddressAllocator()
+    allocator.acquire("X001")
+    allocator.acquire("x001")
+    allocator.release("X001")
+
+    assert allocator.next_free_address("X") == "X002"
+    allocator.release("X001")
+    assert allocator.next_free_address("X") == "X001"
+
+
+def test_non_canonical_addresses_are_ignored():
+    allocator = AddressAllocator()
+    for address in ("", "X1", "X0001", "X000", "Z001", "WIRE"):
+        allocator.acquire(address)
+        allocator.release(address)
+
+    assert allocator.next_free_address("X") == "X001"
+
+
+def test_exhausted_prefix_returns_last_number():
+    allocator = AddressAllocator()
+    allocator.reset(f"T{number:03d}" for number in range(1, LAST_NUMBER + 1))
+
+    assert allocator.next_free_address("T") == f"T{LAST_NUMBER:03d}"
+
+
+def test_grid_edits_and_undo_keep_allocator_in_sync():
+    grid = GridSystem()
+    allocator = grid.address_allocator
+    grid.place_device(1, 1, DeviceType.CONTACT_A, "X001")
+    grid.place_device(1, 2, DeviceType.CONTACT_A, "X002")
+    assert allocator.next_free_address("X") == "X003"
+
+    grid.remove_device(1, 1)
+    assert allocator.next_free_address("X") == "X001"
+    grid.undo()
+    assert allocator.next_free_address("X") == "X003"
+
+    grid.update_device_address(1, 2, "X005")
+    assert allocator.next_free_address("X") == "X002"
+    grid.undo()
+    assert allocator.next_free_address("X") == "X003"
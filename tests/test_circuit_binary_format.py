@@ -0,0 +1,118 @@
+"""
+CircuitBinaryFormat のテスト（保存・読み込みの往復、旧バージョン、不正ファイル）
+"""
+
+import struct
+
+import pytest
+
+from config import DeviceType
+from core.circuit_binary_format import (CircuitBinaryFormat, FORMAT_VERSION, HEADER_STRUCT, RECORD_STRUCTS)
+from core.grid_system import GridSystem
+
+
+def build_circuit() -> GridSystem:
+    grid = GridSystem()
+    grid.place_device(1, 1, DeviceType.CONTACT_A, "X001").state = True
+    grid.place_device(1, 2, DeviceType.LINK_HORZ, "")
+    grid.place_device(1, 3, DeviceType.COIL_STD, "Y001")
+    timer = grid.place_device(2, 1, DeviceType.TIMER_TON, "T001")
+    timer.preset_value = 30
+    timer.current_value = 12
+    timer.timer_active = True
+    register = grid.place_device(3, 1, DeviceType.DATA_REGISTER, "D001")
+    register.operation = "ADD"
+    register.preset_value = -5
+    register.current_value = 2 ** 40  # int32 を超える演算結果
+    compare = grid.place_device(4, 1, DeviceType.COMPARE_DEVICE, "")
+    compare.compare_left = "D001"
+    compare.compare_operator = ">="
+    compare.compare_right = "100"
+    return grid
+
+
+def device_fields(grid: GridSystem):
+    """比較用: バスバーを除くデバイスの保存対象属性"""
+    fields = {}
+    for row_devices in grid.grid_data:
+        for device in row_devices:
+            if device is None or device.device_type in (DeviceType.L_SIDE, DeviceType.R_SIDE):
+                continue
+            fields[device.position] = (device.device_type, device.address, device.state,
+                                       device.preset_value, device.current_value, device.timer_active,
+                                       getattr(device, "operation", None), device.compare_left,
+                                       device.compare_operator, device.compare_right)
+    return fields
+
+
+def test_encode_decode_round_trip():
+    grid = build_circuit()
+    loaded = GridSystem()
+
+    count = CircuitBinaryFormat.decode_into(loaded, CircuitBinaryFormat.encode(grid))
+
+    assert count == len(device_fields(grid))
+    assert device_fields(loaded) == device_fields(grid)
+
+
+def test_save_load_round_trip_with_mmap(tmp_path):
+    grid = build_circuit()
+    filename = str(tmp_path / "circuit.pyplc")
+    CircuitBinaryFormat.save(grid, filename)
+
+    for use_mmap in (True, False):
+        loaded = GridSystem()
+        CircuitBinaryFormat.load(loaded, filename, use_mmap=use_mmap)
+        assert device_fields(loaded) == device_fields(grid)
+
+
+def test_version1_file_is_still_readable():
+    grid = GridSystem()
+    timer = grid.place_device(2, 1, DeviceType.TIMER_TON, "T001")
+    timer.preset_value = 30
+    data = CircuitBinaryFormat.encode(grid)
+
+    # 現行形式のレコードを int32 のバージョン1形式へ詰め直す
+    header = list(HEADER_STRUCT.unpack_from(data, 0))
+    record_size = RECORD_STRUCTS[FORMAT_VERSION][0].size
+    body, records = data[HEADER_STRUCT.size:-record_size * header[6]], data[-record_size * header[6]:]
+    header[1] = 1
+    v1_struct = RECORD_STRUCTS[1][0]
+    v1_records = b"".join(v1_struct.pack(*record)
+                          for record in RECORD_STRUCTS[FORMAT_VERSION][0].iter_unpack(records))
+    loaded = GridSystem()
+    CircuitBinaryFormat.decode_into(loaded, HEADER_STRUCT.pack(*header) + body + v1_records)
+
+    assert device_fields(loaded) == device_fields(grid)
+
+
+def test_grid_size_mismatch_is_rejected():
+    data = bytearray(CircuitBinaryFormat.encode(build_circuit()))
+    magic, version, rows, cols, flags, string_count, device_count = HEADER_STRUCT.unpack_from(data, 0)
+    HEADER_STRUCT.pack_into(data, 0, magic, version, rows + 1, cols, flags, string_count, device_count)
+
+    with pytest.raises(ValueError):
+        CircuitBinaryFormat.decode_into(GridSystem(), bytes(data))
+
+
+def test_invalid_files_are_rejected():
+    data = CircuitBinaryFormat.encode(build_circuit())
+
+    with pytest.raises(ValueError):
+        CircuitBinaryFormat.decode_into(GridSystem(), data[:4])
+    with pytest.raises(ValueError):
+        CircuitBinaryFormat.decode_into(GridSystem(), b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        CircuitBinaryFormat.decode_into(GridSystem(), data[:-1])
+    unsupported = bytearray(data)
+    struct.pack_into("<H", unsupported, 4, FORMAT_VERSION + 1)
+    with pytest.raises(ValueError):
+        CircuitBinaryFormat.decode_into(GridSystem(), bytes(unsupported))
+
+
+def test_out_of_range_value_raises_value_error():
+    grid = GridSystem()
+    grid.place_device(3, 1, DeviceType.DATA_REGISTER, "D001").current_value = 2 ** 70
+
+    with pytest.raises(ValueError):
+        CircuitBinaryFormat.encode(grid)
@@ -0,0 +1,103 @@
+"""
+EditJournal（GridSystemのUndo/Redo）のテスト: グループ化・ネスト・Redo破棄
+"""
+
+from config import DeviceType
+from core.grid_system import GridSystem
+
+
+def user_devices(grid: GridSystem):
+    """比較用: バスバーを除くデバイスの (位置, 種別, アドレス)"""
+    return sorted((device.position, device.device_type.value, device.address)
+                  for row_devices in grid.grid_data for device in row_devices
+                  if device is not None and device.device_type not in (DeviceType.L_SIDE, DeviceType.R_SIDE))
+
+
+def test_single_edits_undo_and_redo_one_at_a_time():
+    grid = GridSystem()
+    grid.place_device(1, 1, DeviceType.CONTACT_A, "X001")
+    grid.place_device(1, 2, DeviceType.COIL_STD, "Y001")
+
+    assert grid.undo()
+    assert user_devices(grid) == [((1, 1), "CONTACT_A", "X001")]
+    assert grid.undo()
+    assert user_devices(grid) == []
+    assert not grid.undo()
+
+    assert grid.redo()
+    assert grid.redo()
+    assert len(user_devices(grid)) == 2
+    assert not grid.redo()
+
+
+def test_group_is_one_undo_entry():
+    grid = GridSystem()
+    grid.place_device(1, 1, DeviceType.CONTACT_A, "X001")
+    before = user_devices(grid)
+
+    grid.journal.begin_group()
+    for col in range(2, 6):
+        grid.place_device(1, col, DeviceType.LINK_HORZ, "")
+    grid.journal.end_group()
+    after = user_devices(grid)
+
+    assert grid.undo()
+    assert user_devices(grid) == before
+    assert grid.redo()
+    assert user_devices(grid) == after
+
+
+def test_nested_groups_commit_at_outermost_end():
+    grid = GridSystem()
+    with grid.journal.group():
+        grid.place_device(1, 1, DeviceType.CONTACT_A, "X001")
+        with grid.journal.group():
+            grid.remove_device(1, 1)
+            grid.place_device(1, 1, DeviceType.CONTACT_B, "X002")
+        # 内側のグループ終了後もグループ中のためUndoできない
+        assert not grid.undo()
+
+    assert grid.undo()
+    assert user_devices(grid) == []
+    assert not grid.journal.can_undo
+
+
+def test_empty_group_is_not_recorded():
+    grid = GridSystem()
+    grid.place_device(1, 1, DeviceType.CONTACT_A, "X001")
+    with grid.journal.group():
+        pass
+
+    assert grid.undo()
+    assert user_devices(grid) == []
+    assert not grid.journal.can_undo
+
+
+def test_end_group_without_begin_is_ignored():
+    grid = GridSystem()
+    grid.journal.end_group()
+    grid.place_device(1, 1, DeviceType.CONTACT_A, "X001")
+
+    assert grid.undo()
+    assert user_devices(grid) == []
+
+
+def test_new_edit_clears_redo():
+    grid = GridSystem()
+    grid.place_device(1, 1, DeviceType.CONTACT_A, "X001")
+    grid.undo()
+    grid.place_device(2, 1, DeviceType.CONTACT_A, "X002")
+
+    assert not grid.redo()
+
+
+def test_parameter_change_round_trip():
+    grid = GridSystem()
+    timer = grid.place_device(2, 1, DeviceType.TIMER_TON, "T001")
+    timer.preset_value = 10
+    grid.update_device_parameters(2, 1, preset_value=50)
+
+    assert grid.undo()
+    assert grid.get_device(2, 1).preset_value == 10
+    assert grid.redo()
+    assert grid.get_device(2, 1).preset_value == 50
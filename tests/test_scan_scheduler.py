@@ -0,0 +1,136 @@
+"""
+ScanScheduler / PlcTask のテスト
+仮想時刻（run_until）と擬似時計で、追いつき実行・周期の読み捨て・実行順・WDTを確認する
+"""
+
+import pytest
+
+from config import PLCConfig
+from core.scan_scheduler import ScanScheduler, WatchdogTimeoutError
+
+ROW_COUNT = 15
+
+
+class FakeClock:
+    """スキャン実行時間の計測に使う擬似時計（秒）"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_scheduler(scan_time_ms=100, watchdog_ms=200, scan_cost=0.0):
+    """
+    実行したタスク名を記録するスケジューラーを作成する
+
+    Args:
+        scan_cost: 1スキャンの実行時間（秒）。擬似時計をこの分だけ進める
+    """
+    clock = FakeClock()
+    executed = []
+
+    def scan_fn(task):
+        executed.append(task.name)
+        clock.now += scan_cost
+
+    scheduler = ScanScheduler(scan_fn, scan_time_ms, watchdog_ms, clock=clock, row_count=ROW_COUNT)
+    return scheduler, executed, clock
+
+
+@pytest.fixture(autouse=True)
+def catchup_scans(monkeypatch):
+    monkeypatch.setattr(PLCConfig, "MAX_CATCHUP_SCANS", 3)
+
+
+def test_first_run_executes_immediately_then_every_period():
+    scheduler, executed, _clock = make_scheduler()
+    main = scheduler.MAIN_TASK_NAME
+
+    assert scheduler.run_until(0.0) == 1
+    assert scheduler.run_until(0.099) == 0
+    assert scheduler.run_until(0.1) == 1
+    assert scheduler.run_until(0.25) == 1
+    assert executed == [main, main, main]
+
+
+def test_catchup_within_window_runs_every_missed_period():
+    scheduler, _executed, _clock = make_scheduler()
+    scheduler.run_until(0.0)
+
+    # 次回予定 100ms から 250ms 遅れ（窓 = 3周期 = 300ms 未満）: 100, 200, 300ms の3回を連続実行
+    assert scheduler.run_until(0.35) == 3
+    assert scheduler.skipped_periods == 0
+
+
+def test_lag_beyond_window_skips_periods():
+    scheduler, _executed, _clock = make_scheduler()
+    scheduler.run_until(0.0)
+
+    # 次回予定 100ms から 900ms 遅れ: 窓を超えた分の周期を読み捨て、直近3周期のみ実行する
+    assert scheduler.run_until(1.0) == PLCConfig.MAX_CATCHUP_SCANS
+    assert scheduler.skipped_periods == 7
+    assert scheduler.main_task.next_due_us == 1_100_000
+    assert scheduler.statistics()["skipped_periods"] == 7
+
+
+def test_tasks_run_in_time_then_priority_order():
+    scheduler, executed, _clock = make_scheduler()
+    scheduler.add_task("FAST", 0, 1, 50, priority=0)
+    scheduler.add_task("SLOW", 2, 3, 100, priority=40)
+    main = scheduler.MAIN_TASK_NAME
+
+    scheduler.run_until(0.0)
+    assert executed == ["FAST", main, "SLOW"]
+
+    executed.clear()
+    scheduler.run_until(0.1)
+    # 50ms の FAST が先、100ms は優先度順（FAST=0, メイン=31, SLOW=40）
+    assert executed == ["FAST", "FAST", main, "SLOW"]
+
+
+def test_add_task_assigns_rows_and_rejects_overlap():
+    scheduler, _executed, _clock = make_scheduler()
+    scheduler.add_task("FAST", 0, 2, 20)
+
+    assert scheduler.main_task.rows == tuple(range(3, ROW_COUNT))
+    with pytest.raises(ValueError):
+        scheduler.add_task("OVERLAP", 2, 4, 20)
+    with pytest.raises(ValueError):
+        scheduler.add_task("FAST", 5, 6, 20)
+    with pytest.raises(ValueError):
+        scheduler.add_task("OUTSIDE", 10, ROW_COUNT, 20)
+
+    scheduler.clear_tasks()
+    assert scheduler.main_task.rows is None
+
+
+def test_overrun_is_counted_without_tripping_watchdog():
+    scheduler, _executed, _clock = make_scheduler(scan_cost=0.15)
+
+    scheduler.run_until(0.0)
+    assert scheduler.watchdog.overruns == 1
+    assert scheduler.total_overruns == 1
+    assert not scheduler.tripped
+
+
+def test_watchdog_trip_stops_all_tasks_until_reset():
+    scheduler, executed, _clock = make_scheduler(scan_cost=0.25)
+
+    with pytest.raises(WatchdogTimeoutError):
+        scheduler.run_until(0.0)
+    assert scheduler.tripped
+    assert scheduler.run_until(1.0) == 0
+    assert len(executed) == 1
+
+    scheduler.reset()
+    assert not scheduler.tripped
+    assert scheduler.watchdog.scans == 0
+
+
+def test_set_scan_time_is_clamped_to_config_range():
+    scheduler, _executed, _clock = make_scheduler()
+
+    assert scheduler.set_scan_time(1) == PLCConfig.MIN_SCAN_TIME_MS
+    assert scheduler.set_scan_time(10_000) == PLCConfig.MAX_SCAN_TIME_MS